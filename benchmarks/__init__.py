@@ -0,0 +1,9 @@
+"""
+Benchmarks of the integrations.  They run larger workloads than the unit
+tests and print their timings instead of asserting on them, so they are
+not part of the test suite.  Run them with::
+
+    python runtests.py benchmarks
+
+or a single module with ``python runtests.py benchmarks.test_soap``.
+"""
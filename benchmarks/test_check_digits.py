@@ -0,0 +1,38 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import time
+
+from django.test import SimpleTestCase
+from gs123.check_digit import calculate_check_digit as gs123_check_digit
+
+from quartet_integrations.generic import check_digits
+from tests.test_check_digits import sscc_payloads
+
+
+class CheckDigitBenchmark(SimpleTestCase):
+
+    def test_sscc_check_digits(self):
+        for size in (1000, 75000):
+            payloads = sscc_payloads(size)
+            start = time.perf_counter()
+            list(map(gs123_check_digit, payloads))
+            per_number = time.perf_counter() - start
+            start = time.perf_counter()
+            check_digits.calculate_check_digits(payloads)
+            batch = time.perf_counter() - start
+            print('%d SSCC check digits: %.4fs one by one, %.4fs batched '
+                  '(numpy %s)' % (size, per_number, batch,
+                                  'installed' if check_digits.numpy
+                                  else 'not installed'))
@@ -0,0 +1,65 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from EPCPyYes.core.v1_2 import template_events
+from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
+from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
+
+from quartet_integrations import environment
+from tests.test_environment import INTEGRATION_TEMPLATES
+
+EVENT_COUNT = 10000
+
+
+def render_events(get_env, template_name, count=EVENT_COUNT):
+    start = time.perf_counter()
+    for i in range(count):
+        env = get_env()
+        event = template_events.ObjectEvent(
+            epc_list=['urn:epc:id:sgtin:305555.0555555.%s' % i],
+            record_time='2019-01-01T00:00:00Z',
+            event_time='2019-01-01T00:00:00Z',
+            action='ADD',
+            biz_step=BusinessSteps.commissioning.value,
+            disposition=Disposition.active.value,
+            read_point='urn:epc:id:sgln:305555.123456.0',
+            biz_location='urn:epc:id:sgln:305555.123456.0',
+            env=env,
+            template=env.get_template(template_name)
+        )
+        event._context['lot'] = 'LOT123'
+        event.render()
+    return time.perf_counter() - start
+
+
+class EnvironmentBenchmark(SimpleTestCase):
+
+    def tearDown(self):
+        environment.clear_environments()
+
+    def test_render(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with mock.patch.object(environment, 'JINJA_BYTECODE_CACHE_DIR',
+                                   cache_dir):
+                for name, get_env, template_name in INTEGRATION_TEMPLATES:
+                    environment.clear_environments()
+                    cold = render_events(get_env, template_name)
+                    warm = render_events(get_env, template_name)
+                    print('%s: %s events cold %.3fs, warm %.3fs' % (
+                        name, EVENT_COUNT, cold, warm))
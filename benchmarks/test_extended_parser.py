@@ -0,0 +1,47 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import time
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.extended.parsers import ExtendedParser
+from tests.test_extended_parser import build_document, REG_EX
+
+
+class TimedExtendedParser(ExtendedParser):
+    """
+    Records the time spent in the aggregation bookkeeping so that the
+    benchmark is not dominated by the XML parsing itself.
+    """
+    aggregation_time = 0
+
+    def handle_aggregation_event(self, epcis_event):
+        start = time.perf_counter()
+        super().handle_aggregation_event(epcis_event)
+        self.aggregation_time += time.perf_counter() - start
+
+
+class ExtendedParserBenchmark(SimpleTestCase):
+
+    def test_aggregation(self):
+        # the cost per child stays flat as the document grows
+        for sscc_count in (100, 1000, 10000, 100000):
+            parser = TimedExtendedParser(
+                io.BytesIO(build_document(sscc_count)), reg_ex=REG_EX)
+            parser.parse()
+            children = sscc_count // 2
+            print('%s SSCCs: %.2f us per child' % (
+                sscc_count, parser.aggregation_time / children * 1000000))
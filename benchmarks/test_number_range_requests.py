@@ -0,0 +1,44 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import time
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.systech.guardian.views import \
+    GuardianNumberRangeView
+from quartet_integrations.systech.unitrace.views import \
+    UniTraceNumberRangeView
+from quartet_integrations.tracelink.views import TraceLinkNumberRangeView
+from tests.test_number_range_requests import parse, read
+
+
+class NumberRangeRequestBenchmark(SimpleTestCase):
+
+    def test_parse(self):
+        for view_class, path in (
+            (GuardianNumberRangeView,
+             'systech/gtin_sequential_number_request.xml'),
+            (UniTraceNumberRangeView, 'unitrace/range_gtin_request.xml'),
+            (TraceLinkNumberRangeView,
+             'tracelink/SN_Request_SGTIN_Range.xml'),
+        ):
+            body = read(path)
+            requests = 2000
+            start = time.perf_counter()
+            for i in range(requests):
+                parse(view_class, body)
+            elapsed = time.perf_counter() - start
+            print('%s: %d requests/second' % (view_class.__name__,
+                                              requests / elapsed))
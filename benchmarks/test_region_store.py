@@ -0,0 +1,89 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.test import TestCase
+from list_based_flavorpack.models import ListBasedRegion
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_region_table
+from serialbox import models as sb_models
+
+from quartet_integrations.generic.region_store import RegionNumberStore
+
+BENCHMARK_SIZE = 250000
+
+
+class RegionNumberStoreBenchmark(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def create_region(self, machine_name):
+        pool = sb_models.Pool.objects.create(
+            readable_name=machine_name, machine_name=machine_name,
+            active=True, request_threshold=1000
+        )
+        return ListBasedRegion.objects.create(
+            pool=pool,
+            readable_name=machine_name,
+            machine_name=machine_name,
+            processing_class_path=(
+                "list_based_flavorpack."
+                "processing_classes.third_party_processing."
+                "processing.ThirdPartyProcessingClass"
+            ),
+            directory_path=self.directory,
+            number_replenishment_size=20
+        )
+
+    def test_write(self):
+        numbers = ['%012d' % i for i in range(BENCHMARK_SIZE)]
+        row_by_row = min(self.insert_row_by_row(numbers, '0030007778930%d' % i)
+                         for i in range(3))
+        bulk = min(self.insert_bulk(numbers, '0030007778940%d' % i)
+                   for i in range(3))
+        print('\n%d numbers: row by row %.3fs, bulk %.3fs' %
+              (BENCHMARK_SIZE, row_by_row, bulk))
+
+    def insert_row_by_row(self, numbers, machine_name):
+        # the insert loop the number response steps used before the store
+        region = self.create_region(machine_name)
+        table = get_region_table(region)
+        start = time.perf_counter()
+        connection = sqlite3.connect(region.db_file_path)
+        connection.execute(
+            "create table if not exists %s "
+            "(serial_number text not null unique, used integer not null)"
+            % table
+        )
+        cursor = connection.cursor()
+        cursor.execute('begin transaction')
+        for number in numbers:
+            cursor.execute('insert into %s (serial_number, used) values '
+                           '(?, ?)' % table, (number, 0))
+        connection.commit()
+        connection.close()
+        return time.perf_counter() - start
+
+    def insert_bulk(self, numbers, machine_name):
+        region = self.create_region(machine_name)
+        start = time.perf_counter()
+        with RegionNumberStore(region) as store:
+            store.write(iter(numbers))
+        return time.perf_counter() - start
@@ -0,0 +1,62 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import time
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.generic.soap import parse_request
+from quartet_integrations.opsm.views import OPSMNumberRangeView
+from quartet_integrations.rocit.views import RetrievePackagingHierarchyView
+from quartet_integrations.systech.guardian.views import \
+    GuardianNumberRangeView
+from quartet_integrations.tracelink.views import TraceLinkNumberRangeView
+from tests.test_soap import parse_opsm_uncompiled, read
+
+
+def guardian(view_class):
+    def parse(body):
+        view = view_class()
+        return view.parse_xml(view.iterparse_request(body))
+    return parse
+
+
+class SoapBenchmark(SimpleTestCase):
+
+    def test_parse(self):
+        rocit = RetrievePackagingHierarchyView()
+        for name, parse, path in (
+            ('OPSMNumberRangeView (uncompiled)', parse_opsm_uncompiled,
+             'opsm_gtin_request.xml'),
+            ('OPSMNumberRangeView',
+             lambda body: OPSMNumberRangeView().parse_request(body),
+             'opsm_gtin_request.xml'),
+            ('RetrievePackagingHierarchyView',
+             lambda body: rocit.get_rows(parse_request(body)),
+             'rocit-search-sscc-request.xml'),
+            ('GuardianNumberRangeView', guardian(GuardianNumberRangeView),
+             'systech/gtin_sequential_number_request.xml'),
+            ('TraceLinkNumberRangeView', guardian(TraceLinkNumberRangeView),
+             'tracelink/SN_Request_SGTIN_Range.xml'),
+        ):
+            body = read(path)
+            for i in range(100):
+                parse(body)
+            requests = 2000
+            start = time.perf_counter()
+            for i in range(requests):
+                parse(body)
+            elapsed = time.perf_counter() - start
+            print('%s: %.1f microseconds/request' % (
+                name, elapsed / requests * 1000000))
@@ -0,0 +1,35 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import time
+
+from django.test import SimpleTestCase
+
+from tests.test_streaming_responses import serials
+
+
+class StreamingTemplateBenchmark(SimpleTestCase):
+
+    def test_request_size(self):
+        # the first chunk is ready as soon for a large request as a small one
+        for size in (1000, 1000000):
+            start = time.perf_counter()
+            next(iter(serials(size)))
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            for chunk in serials(size):
+                pass
+            total = time.perf_counter() - start
+            print('%d serials: first chunk %.4fs, all chunks %.4fs' %
+                  (size, first, total))
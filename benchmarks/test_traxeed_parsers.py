@@ -0,0 +1,35 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import time
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.traxeed.parsers import TraxeedRfxcelParser
+from tests.test_traxeed_parsers import build_document, REG_EX
+
+
+class TraxeedParserBenchmark(SimpleTestCase):
+
+    def test_aggregation(self):
+        # the time per SSCC stays flat as the document grows
+        for sscc_count in (2000, 20000, 200000):
+            data = build_document(sscc_count)
+            parser = TraxeedRfxcelParser(io.BytesIO(data), reg_ex=REG_EX)
+            start = time.perf_counter()
+            parser.parse()
+            per_sscc = (time.perf_counter() - start) / sscc_count
+            print('%s SSCCs: %.2f us per SSCC' % (sscc_count,
+                                                  per_sscc * 1000000))
@@ -0,0 +1,40 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import time
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.traxeed import timeshift
+from tests.test_traxeed_timeshift import RECORD_TIMES, uncached_shift
+
+EVENT_COUNT = 50000
+
+
+class TimeShiftBenchmark(SimpleTestCase):
+
+    def test_shift_time(self):
+        timeshift.shift_time.cache_clear()
+        values = [RECORD_TIMES[i % len(RECORD_TIMES)]
+                  for i in range(EVENT_COUNT)]
+        start = time.perf_counter()
+        for value in values:
+            uncached_shift(value)
+        uncached = time.perf_counter() - start
+        start = time.perf_counter()
+        for value in values:
+            timeshift.shift_time(value, 10)
+        cached = time.perf_counter() - start
+        print('%s event times: uncached %.3fs, cached %.3fs' % (
+            EVENT_COUNT, uncached, cached))
@@ -0,0 +1,56 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import time
+
+from django.test import TestCase
+from quartet_capture.models import Rule, Step, Task
+from quartet_capture.rules import Rule as RuleEngine
+
+from quartet_integrations.serialbox.urns import UrnList
+from tests.test_urn_batch import CP, EXTENSION
+
+
+class UrnBatchBenchmark(TestCase):
+
+    def setUp(self):
+        rule = Rule.objects.create(name='URNs')
+        Step.objects.create(
+            rule=rule, order=1, name='URNs',
+            step_class='quartet_integrations.serialbox.steps.'
+                       'ListToUrnConversionStep')
+        task = Task.objects.create(name='URN Task', rule=rule)
+        self.step = RuleEngine(rule, task).steps[1]
+
+    def test_sscc_urns(self):
+        step = self.step
+        for size in (1000, 75000, 1000000):
+            numbers = range(1, size + 1)
+            rounds = 3 if size < 1000000 else 1
+            per_number = batch = lazy = float('inf')
+            for i in range(rounds):
+                start = time.perf_counter()
+                [step.format_sscc_urn(CP, EXTENSION, number, 9)
+                 for number in numbers]
+                per_number = min(per_number, time.perf_counter() - start)
+                start = time.perf_counter()
+                list(step.format_sscc_urns(CP, EXTENSION, numbers, 9))
+                batch = min(batch, time.perf_counter() - start)
+                start = time.perf_counter()
+                urn_list = UrnList()
+                urn_list.extend(step.format_sscc_urns(CP, EXTENSION,
+                                                      numbers, 9))
+                lazy = min(lazy, time.perf_counter() - start)
+            print('%d SSCC URNs: %.4fs one by one, %.4fs batched, %.6fs '
+                  'lazy' % (size, per_number, batch, lazy))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 
 class QuartetIntegrationsConfig(AppConfig):
     name = 'quartet_integrations'
+
+    def ready(self):
+        from quartet_integrations.serialbox import metadata
+        metadata.connect_signals()
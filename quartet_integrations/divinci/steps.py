@@ -16,11 +16,13 @@ import io
 from django.db import transaction
 from django.core.files.base import File
 from quartet_integrations.divinci.parsing import JSONParser
+from quartet_integrations.generic.hierarchy_cache import \
+    HierarchyCacheInvalidationMixin
 from quartet_output.steps import OutputParsingStep, ContextKeys
 from quartet_capture.rules import Step, RuleContext
 
 
-class JSONParsingStep(OutputParsingStep):
+class JSONParsingStep(HierarchyCacheInvalidationMixin, OutputParsingStep):
     def execute(self, data, rule_context: RuleContext):
         # before we start, make sure we make the output criteria available
         # to any downstream steps that need it in order to send data.
@@ -32,10 +34,11 @@ class JSONParsingStep(OutputParsingStep):
         self.info('Parsing inbound data...')
         with transaction.atomic():
             parser = JSONParser(data, self.epc_output_criteria)
-            parser.parse()
+            message_id = parser.parse()
             rule_context.context[
                 ContextKeys.FILTERED_EVENTS_KEY.value] = parser.filtered_events
         self.info('Parsing complete.')
+        self.invalidate_hierarchies([message_id])
 
     def get_data(self, data):
         try:
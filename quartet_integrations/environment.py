@@ -0,0 +1,118 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+"""
+Process-wide registry of the Jinja2 environments used by the integrations.
+
+Each integration used to build a new ``ChoiceLoader`` and ``Environment``
+every time a template was needed, which meant every template was loaded and
+compiled again on every task.  Environments are now created once per
+loader configuration and shared; Jinja keeps the compiled templates in
+memory and the bytecode cache keeps them on disk between worker restarts.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from jinja2.bccache import FileSystemBytecodeCache
+from jinja2.environment import Environment
+from jinja2.loaders import ChoiceLoader, PackageLoader
+
+# the directory for the on-disk bytecode cache.  When not set, Jinja uses
+# a per-user directory under the system temp directory.
+JINJA_BYTECODE_CACHE_DIR = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_JINJA_BYTECODE_CACHE_DIR',
+    None
+)
+
+# the number of templates created from database content (see
+# `get_template_from_string`) that are kept compiled in memory.
+STRING_TEMPLATE_CACHE_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_STRING_TEMPLATE_CACHE_SIZE',
+    128
+)
+
+_environments = {}
+_string_templates = OrderedDict()
+_lock = threading.RLock()
+
+
+def get_environment(*packages: str) -> Environment:
+    '''
+    Returns the shared Jinja2 environment that loads templates from the
+    `templates` directory of each of the packages, in order.  The environment
+    is created on first use and returned as-is on every later call.
+
+    :param packages: The names of the packages to load templates from.
+    :return: A Jinja2 environment.
+    '''
+    env = _environments.get(packages)
+    if env is None:
+        with _lock:
+            env = _environments.get(packages)
+            if env is None:
+                env = _create_environment(packages)
+                _environments[packages] = env
+    return env
+
+
+def get_template_from_string(env: Environment, source: str):
+    '''
+    Compiles a template from a string (typically the content of a
+    quartet_templates Template) and caches the compiled template so
+    that repeated calls with the same source do not compile it again.
+
+    :param env: An environment returned by `get_environment`.
+    :param source: The template source.
+    :return: A Jinja2 template.
+    '''
+    key = (id(env), source)
+    with _lock:
+        template = _string_templates.get(key)
+        if template is not None:
+            _string_templates.move_to_end(key)
+            return template
+    template = env.from_string(source)
+    with _lock:
+        _string_templates[key] = template
+        while len(_string_templates) > STRING_TEMPLATE_CACHE_SIZE:
+            _string_templates.popitem(last=False)
+    return template
+
+
+def clear_environments():
+    '''
+    Drops every cached environment and string template.  The next call to
+    `get_environment` will build a new environment.
+    '''
+    with _lock:
+        _environments.clear()
+        _string_templates.clear()
+
+
+def _create_environment(packages: tuple) -> Environment:
+    loader = ChoiceLoader(
+        [PackageLoader(package, 'templates') for package in packages]
+    )
+    if JINJA_BYTECODE_CACHE_DIR:
+        bytecode_cache = FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    else:
+        bytecode_cache = FileSystemBytecodeCache()
+    env = Environment(loader=loader,
+                      extensions=['jinja2.ext.with_'], trim_blocks=True,
+                      lstrip_blocks=True, bytecode_cache=bytecode_cache,
+                      auto_reload=False)
+    return env
@@ -12,8 +12,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 # Copyright 2019 SerialLab Corp.  All rights reserved.
-from jinja2.environment import Environment
-from jinja2.loaders import ChoiceLoader, PackageLoader
+from quartet_integrations.environment import get_environment
 
 def get_default_environment():
     '''
@@ -23,14 +22,8 @@ def get_default_environment():
 
     :return: The defualt Jinja2 environment for this package.
     '''
-    loader = ChoiceLoader(
-        [
-            PackageLoader('EPCPyYes', 'templates'),
-            PackageLoader('quartet_integrations', 'templates'),
-            PackageLoader('quartet_tracelink', 'templates')
-        ]
+    return get_environment(
+        'EPCPyYes',
+        'quartet_integrations',
+        'quartet_tracelink'
     )
-    env = Environment(loader=loader,
-                      extensions=['jinja2.ext.with_'], trim_blocks=True,
-                      lstrip_blocks=True)
-    return env
@@ -15,8 +15,12 @@
 from datetime import datetime
 
 
+from quartet_integrations.environment import get_template_from_string
 from quartet_integrations.extended.environment import get_default_environment
+from quartet_integrations.generic.parse_result import ParseResult
 from EPCPyYes.core.v1_2 import template_events, json_encoders
+from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
+from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
 from EPCPyYes.core.v1_2.events import ErrorDeclaration, Action
 from EPCPyYes.core.v1_2.template_events import TemplateMixin
 
@@ -41,7 +45,7 @@ class AppendedShippingObjectEvent(template_events.ObjectEvent):
 
         self._qty = qty
         env = get_default_environment()
-        template = env.from_string(template)
+        template = get_template_from_string(env, template)
 
         super().__init__(event_time, event_timezone_offset, record_time,
                          action, epc_list, biz_step, disposition, read_point,
@@ -50,3 +54,35 @@ class AppendedShippingObjectEvent(template_events.ObjectEvent):
                          business_transaction_list, ilmd, quantity_list, env,
                          template, render_xml_declaration)
 
+
+def build_appended_shipping_event(result: ParseResult, template: str,
+                                  product_code: str):
+    """
+    Builds the shipping event appended to an inbound document from the
+    facts a parser collected.
+    :param result: The ParseResult of the inbound document.
+    :param template: The content of the shipping event template.
+    :param product_code: The product code rendered in the event.
+    :return: An AppendedShippingObjectEvent.
+    """
+    shipping_event = AppendedShippingObjectEvent(
+        epc_list=result.sscc_list,
+        record_time=datetime.utcnow(),
+        action='OBSERVE',
+        biz_step=BusinessSteps.shipping.value,
+        disposition=Disposition.in_transit.value,
+        read_point=result.read_point,
+        biz_location=result.biz_location,
+        template=template,
+    )
+    shipping_event._context['count'] = result.quantity
+    shipping_event._context['product_code'] = product_code
+    shipping_event._context['lot'] = result.lot_number
+    shipping_event._context['exp_date'] = result.exp_date
+    shipping_event._context['biz_location'] = result.biz_location
+    shipping_event._context['read_point'] = result.read_point
+    shipping_event._context['PO'] = result.PO
+    today = datetime.now()
+    shipping_event._context['trans_date'] = "{0}-{1}-{2}".format(
+        today.year, today.month, today.day)
+    return shipping_event
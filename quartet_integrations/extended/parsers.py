@@ -19,6 +19,8 @@ from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
 from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
 from eparsecis.eparsecis import FlexibleNSParser
 from quartet_integrations.extended.environment import get_default_environment
+from quartet_integrations.generic.ordered_set import OrderedSet
+from quartet_integrations.generic.parse_result import ParseResult
 
 """
     The ExtendedParser Parser puts epcs in commissioning events into the Packaging Level Order.    
@@ -29,7 +31,7 @@ class ExtendedParser(FlexibleNSParser):
     """
     def __init__(self, data, reg_ex):
 
-        self._ssccs = []  # internal list to hold collected SSCCs
+        self._ssccs = OrderedSet()  # internal set to hold collected SSCCs
         self._quantity = 0
         self._po = ""
         self._regEx = re.compile(reg_ex)
@@ -45,11 +47,19 @@ class ExtendedParser(FlexibleNSParser):
         self.comm_pallets_event = None
 
         env = get_default_environment()
+        self._env = env
         temp = env.get_template('extended/ext_object_events.xml')
         self._template = temp
         # call the base constructor with the stream
         super(ExtendedParser, self).__init__(stream=data)
 
+    def get_epcpyyes_object_event(self):
+        return template_events.ObjectEvent(epc_list=[], quantity_list=[],
+                                           env=self._env)
+
+    def get_epcpyyes_aggregation_event(self):
+        return template_events.AggregationEvent(env=self._env)
+
     """
         When the base parser sees an ObjectEvent, this method is called
         The event is passed in as a parameter. The epcis_event's epc_list
@@ -129,6 +139,7 @@ class ExtendedParser(FlexibleNSParser):
                              disposition = Disposition.active.value,
                              read_point = epcis_event.read_point,
                              biz_location = epcis_event.biz_location,
+                             env=self._env,
                              template=self._template
                         )
 
@@ -151,7 +162,7 @@ class ExtendedParser(FlexibleNSParser):
            # A commissioning event for the Cartons does not exist
            # Create one
             self.comm_cartons_event = template_events.ObjectEvent(
-                             epc_list=[epc],
+                             epc_list=OrderedSet([epc]),
                              record_time=epcis_event.record_time,
                              event_time=epcis_event.event_time,
                              event_timezone_offset=epcis_event.event_timezone_offset,
@@ -160,6 +171,7 @@ class ExtendedParser(FlexibleNSParser):
                              disposition = Disposition.active.value,
                              read_point = epcis_event.read_point,
                              biz_location = epcis_event.biz_location,
+                             env=self._env,
                              template=self._template
                         )
             self.comm_cartons_event._context['product_code'] = self.product_code
@@ -181,7 +193,7 @@ class ExtendedParser(FlexibleNSParser):
            # A commissioning event for the Cartons does not exist
            # Create one
             self.comm_pallets_event = template_events.ObjectEvent(
-                             epc_list=[epc],
+                             epc_list=OrderedSet([epc]),
                              record_time=epcis_event.record_time,
                              event_time=epcis_event.event_time,
                              event_timezone_offset=epcis_event.event_timezone_offset,
@@ -190,6 +202,7 @@ class ExtendedParser(FlexibleNSParser):
                              disposition = Disposition.active.value,
                              read_point = epcis_event.read_point,
                              biz_location = epcis_event.biz_location,
+                             env=self._env,
                              template=self._template
                         )
             self.comm_pallets_event._context['product_code'] = self.product_code
@@ -205,6 +218,23 @@ class ExtendedParser(FlexibleNSParser):
             # Add the epc to the epc_list of the event.
             self.comm_pallets_event.epc_list.append(epc)
 
+    def get_parse_result(self) -> ParseResult:
+        """
+        Returns the SSCCs, quantity and ILMD collected by the parse.  The
+        GTIN is the product code converted from the NDC.
+        Only call after parse() is called.
+        """
+        return ParseResult(
+            sscc_list=self._ssccs,
+            quantity=self._quantity,
+            lot_number=self._lot_number,
+            exp_date=self._exp_date,
+            gtin=self._product_code,
+            PO=self._po,
+            biz_location=self._biz_location,
+            read_point=self._read_point
+        )
+
     @property
     def quantity(self):
         return self._quantity
@@ -213,7 +243,7 @@ class ExtendedParser(FlexibleNSParser):
     def sscc_list(self):
         # Returns the SSCCs collected in self.handle_object_event
         # Only call after parse() is called.
-        return self._ssccs
+        return list(self._ssccs)
 
     @property
     def lot_number(self):
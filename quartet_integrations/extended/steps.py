@@ -12,18 +12,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 # Copyright 2018 SerialLab Corp.  All rights reserved.
-import datetime
 import io
 import uuid
 from django.core.files.base import File
 from EPCPyYes.core.v1_2 import template_events
-from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
-from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
 from quartet_capture import models, rules
 from quartet_capture.rules import RuleContext
 from quartet_integrations.extended.environment import get_default_environment
-from quartet_integrations.extended.events import AppendedShippingObjectEvent
+from quartet_integrations.extended.events import \
+    build_appended_shipping_event
 from quartet_integrations.extended.parsers import ExtendedParser
+from quartet_integrations.generic.parse_result import PARSE_RESULT_KEY
 from quartet_output.steps import ContextKeys, DynamicTemplateMixin, \
     EPCPyYesOutputStep
 from quartet_templates.models import Template
@@ -88,35 +87,12 @@ class AppendShippingStep(rules.Step):
                                     reg_ex=self._regEx)
         # parse
         parser.parse()
-        # Set qty, ndc, exp_date, and lot
-        qty = parser.quantity
         # All SSCCs found in the ObjectEvents of the EPCIS Document (data parameter)
-        # are now in the ExtendedParser's sscc_list
-        ssccs = parser.sscc_list
-
-        shipping_event = AppendedShippingObjectEvent(
-            epc_list=ssccs,
-            record_time=datetime.datetime.utcnow(),
-            action='OBSERVE',
-            biz_step=BusinessSteps.shipping.value,
-            disposition=Disposition.in_transit.value,
-            read_point=parser.read_point,
-            biz_location=parser.biz_location,
-            template=self.get_template(),
-
-        )
-
-        shipping_event._context['count'] = parser.quantity
-        shipping_event._context['product_code'] = parser.product_code
-        shipping_event._context['lot'] = parser.lot_number
-        shipping_event._context['exp_date'] = parser.exp_date
-        shipping_event._context['biz_location'] = parser.biz_location
-        shipping_event._context['read_point'] = parser.read_point
-        shipping_event._context['PO'] = parser.PO
-        trans_date = "{0}-{1}-{2}".format(datetime.datetime.now().year,
-                                          datetime.datetime.now().month,
-                                          datetime.datetime.now().day)
-        shipping_event._context['trans_date'] = trans_date
+        # are now in the parse result's sscc_list
+        result = parser.get_parse_result()
+        rule_context.context[PARSE_RESULT_KEY] = result
+        shipping_event = build_appended_shipping_event(
+            result, self.get_template(), result.gtin)
 
         rule_context.context[ContextKeys.FILTERED_EVENTS_KEY.value] = [
             shipping_event, ]
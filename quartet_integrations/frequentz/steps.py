@@ -12,22 +12,23 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 # Copyright 2019 SerialLab Corp.  All rights reserved.
-import io, os
+import io
 import datetime
 import time
-import sqlite3
-import requests
 from django.core.files.base import File
 from django.utils.translation import gettext as _
 from xml.etree import ElementTree
 from requests.auth import HTTPBasicAuth, HTTPProxyAuth
-from list_based_flavorpack.processing_classes.third_party_processing.rules import \
-    get_region_table
 from EPCPyYes.core.v1_2 import template_events
 from quartet_capture import models, rules, errors as capture_errors
 from quartet_capture.rules import RuleContext
 from quartet_output.transport.http import HttpTransportMixin, user_agent
 from quartet_integrations.frequentz.environment import get_default_environment
+from quartet_integrations.generic.number_response import \
+    SerialNumberExtractor
+from quartet_integrations.generic.check_digits import iter_check_digits
+from quartet_integrations.generic.region_store import RegionNumberStore
+from quartet_integrations.generic.sessions import get_session
 from quartet_integrations.frequentz.parsers import FrequentzOutputParser
 from quartet_masterdata.models import TradeItem
 from list_based_flavorpack.models import ListBasedRegion
@@ -36,6 +37,15 @@ from gs123 import conversion
 from quartet_templates.steps import TemplateStep
 from quartet_output.steps import ContextKeys, EPCPyYesOutputStep
 
+# the tags in the tagList of an IRIS getTagsResponse
+TAG_LIST_PATH = (
+    './/{http://www.ibm.com/epcis/serialid/TagManagerTypes}tagList/'
+    '{http://www.ibm.com/epcis/serialid/TagManagerTypes}tag'
+)
+
+# the quantity every IRIS getTagsResponse has
+TAG_QUANTITY = '{http://www.ibm.com/epcis/serialid/TagManagerTypes}quantity'
+
 
 class FrequentzOutputStep(EPCPyYesOutputStep):
 
@@ -175,7 +185,8 @@ class IRISNumberRequestTransportStep(rules.Step, HttpTransportMixin):
         :return: The response.
         '''
 
-        response = requests.post(
+        response = get_session(region.end_point,
+                               region.authentication_info).post(
             region.end_point.urn,
             data,
             auth=self.get_auth(region),
@@ -352,67 +363,50 @@ class IRISNumberRequestProcessStep(rules.Step):
 
     def execute(self, data, rule_context: RuleContext):
 
-        # Set up namespaces for returned xml from IRIS
-        ns = {
-            "soapenv": "http://schemas.xmlsoap.org/soap/envelope/",
-            "ns2": "http://www.ibm.com/epcis/serialid/TagManagerTypes"
-        }
-
         # Get xml response from context
         xml = rule_context.context['NUMBER_RESPONSE']
         region_name = rule_context.context['region_name']
         region = self.get_list_based_region(region_name)
         format = region.processing_parameters.get(key='format').value
-        # Load XML
-        root = ElementTree.fromstring(xml)
-        # Get quantity
-        quantity_returned = root.find(
-            'soapenv:Body/ns2:getTagsResponse/ns2:tagResponse/ns2:quantity',
-            ns).text
-        # Get Serial Numbers
-        tags = root.findall(
-            'soapenv:Body/ns2:getTagsResponse/ns2:tagResponse/ns2:tagList/ns2:tag',
-            ns)
-        serial_numbers = []
-        # add tags to serial_numbers array
-        for tag in tags:
-            if format.lower() == 'sgtin-198' or format.lower() == 'sgtin-96':
-                sn = tag.text.split('.')[3]
-                serial_numbers.append(sn)
-            elif format.lower() == 'sscc-96':
-                urn = tag.text.replace('urn:epc:tag:sscc-96:',
-                                       'urn:epc:id:sscc:')
-                # sn = conversion.URNConverter(urn)
-                parts = urn.split('.')
-                ext = parts[2][0]
-                cp = parts[1]
-                sn = parts[2][1:]
-                sscc18 = '{0}{1}{2}'.format(ext, cp, sn)
-                sscc18 = conversion.calculate_check_digit(sscc18)
-                serial_numbers.append(sscc18)
-
+        # Stream the tags out of the response, a fault or a response
+        # without a quantity raises once it has been read
+        tags = SerialNumberExtractor(xml, TAG_LIST_PATH,
+                                     required=[TAG_QUANTITY])
+        serial_numbers = self.get_serial_numbers(tags, format)
         self.write_list(serial_numbers, region)
 
+    def get_serial_numbers(self, tags, format):
+        '''
+        Converts the tags returned by IRIS to serial numbers.
+        :param tags: An iterable of the tag URN strings.
+        :param format: The format of the region, SGTIN-198, SGTIN-96 or
+            SSCC-96.
+        :return: A generator of serial numbers.
+        '''
+        format = format.lower()
+        if format == 'sgtin-198' or format == 'sgtin-96':
+            return (tag.split('.')[3] for tag in tags)
+        elif format == 'sscc-96':
+            return iter_check_digits(map(self.get_sscc_payload, tags))
+        return iter(())
+
+    def get_sscc_payload(self, tag):
+        '''
+        :param tag: An SSCC-96 tag URN returned by IRIS.
+        :return: The 17 digits of the SSCC in front of the check digit.
+        '''
+        parts = tag.split('.')
+        ext = parts[2][0]
+        cp = parts[1]
+        sn = parts[2][1:]
+        return '{0}{1}{2}'.format(ext, cp, sn)
+
     def write_list(self, serial_numbers, region: ListBasedRegion):
 
         start = time.time()
-        if not os.path.exists(region.db_file_path):
-            connection = sqlite3.connect(region.db_file_path)
-            connection.execute(
-                "create table if not exists %s "
-                "(serial_number text not null unique, used integer not null)"
-                % get_region_table(region)
-            )
-        else:
-            connection = sqlite3.connect(region.db_file_path)
-
-        cursor = connection.cursor()
-        cursor.execute('begin transaction')
         self.info('storing the numbers. {0}'.format(region.db_file_path))
-        for id in serial_numbers:
-            cursor.execute('insert into %s (serial_number, used) values '
-                           '(?, ?)' % get_region_table(region), (id, 0))
-        connection.commit()
+        with RegionNumberStore(region) as store:
+            store.write(serial_numbers)
         self.info("Execution time: %.3f seconds." % (time.time() - start))
 
     def get_list_based_region(self, machine_name):
@@ -0,0 +1,97 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from itertools import islice
+from operator import add
+from typing import Iterable, Iterator, List, Sequence
+
+from django.conf import settings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# the number of payloads the streaming helper hands to one batch
+CHECK_DIGIT_BATCH_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_CHECK_DIGIT_BATCH_SIZE',
+    10000
+)
+
+
+def calculate_check_digit(data: str) -> str:
+    '''
+    Calculates the GS1 mod 10 check digit of a numeric string, the same
+    as gs123.check_digit.calculate_check_digit: the last digit and every
+    second digit before it are weighted 3, the others 1.
+    :param data: A numeric string such as a 17 digit SSCC payload.
+    :return: The input string with the check digit appended.
+    '''
+    digits = data.encode('ascii')
+    if not digits.isdigit():
+        raise ValueError('%r is not a numeric string.' % data)
+    length = len(digits)
+    # summing the ascii codes is done in C, the '0's are subtracted after
+    total = 3 * sum(digits[-1::-2]) + sum(digits[-2::-2]) - \
+        48 * (3 * ((length + 1) // 2) + length // 2)
+    return data + str(-total % 10)
+
+
+def calculate_check_digits(payloads: Sequence[str]) -> List[str]:
+    '''
+    Calculates the check digits of many numeric strings at once.  With
+    NumPy installed, payloads of equal length are computed as one array;
+    otherwise each is computed by calculate_check_digit.
+    :param payloads: A sequence of numeric strings.
+    :return: The payloads with their check digits appended, in order.
+    '''
+    if not payloads:
+        return []
+    if numpy is not None:
+        lengths = set(map(len, payloads))
+        if len(lengths) == 1:
+            return _numpy_check_digits(payloads, lengths.pop())
+    return list(map(calculate_check_digit, payloads))
+
+
+def _numpy_check_digits(payloads: Sequence[str], length: int) -> List[str]:
+    digits = numpy.frombuffer(
+        ''.join(payloads).encode('ascii'), dtype=numpy.uint8
+    ).reshape(len(payloads), length) - ord('0')
+    # anything below '0' wraps around to above 9
+    if (digits > 9).any():
+        raise ValueError('The payloads must be numeric strings.')
+    weights = numpy.where(numpy.arange(length)[::-1] % 2 == 0, 3, 1)
+    checks = (-(digits @ weights) % 10 + ord('0')).astype(numpy.uint8)
+    return list(map(add, payloads, checks.tobytes().decode('ascii')))
+
+
+def iter_check_digits(payloads: Iterable[str],
+                      batch_size: int = CHECK_DIGIT_BATCH_SIZE
+                      ) -> Iterator[str]:
+    '''
+    Streams payloads through calculate_check_digits `batch_size` at a time
+    so generators, such as the serial numbers of a number response, are
+    never held in memory as a whole.
+    :param payloads: An iterable of numeric strings.
+    :param batch_size: The number of payloads computed together.
+    :return: A generator of the payloads with their check digits appended.
+    '''
+    payloads = iter(payloads)
+    while True:
+        batch = list(islice(payloads, batch_size))
+        if not batch:
+            return
+        yield from calculate_check_digits(batch)
@@ -0,0 +1,352 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+"""
+A per process cache of packaging hierarchy snapshots keyed by the EPC at
+the top of the hierarchy.
+
+Each top EPC has a version token kept in a Django cache.  A snapshot is
+served only while the token it was loaded under is still current, so a
+lookup costs one cache read and a dictionary lookup.  The parsing steps
+that use the `HierarchyCacheInvalidationMixin` replace the tokens of every
+EPC touched by a parsed aggregation, decommissioning or shipping event and
+of everything above them.  For the web processes to see the new tokens
+written by the workers that parse the messages, the tokens must be kept in
+a cache they share (memcached, redis or the database cache), so the
+hierarchy cache is off until QUARTET_INTEGRATIONS_HIERARCHY_CACHE_ALIAS
+names one.  Snapshots are also dropped after
+QUARTET_INTEGRATIONS_HIERARCHY_CACHE_TIMEOUT seconds, which bounds how long
+a change parsed by a step without the mixin goes unnoticed.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from logging import getLogger
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from quartet_capture.rules import RuleContext
+from quartet_epcis.models import choices
+from quartet_epcis.models.entries import Entry, EntryEvent
+from quartet_epcis.models.events import Event
+from quartet_epcis.parsing.steps import ContextKeys
+
+logger = getLogger(__name__)
+
+# the Django cache the hierarchy versions are kept in.  It must be shared by
+# every process; packaging hierarchies are not cached unless it is set.
+HIERARCHY_CACHE_ALIAS = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HIERARCHY_CACHE_ALIAS',
+    None
+)
+
+# whether packaging hierarchy lookups are cached once a cache alias is set
+HIERARCHY_CACHE_ENABLED = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HIERARCHY_CACHE_ENABLED',
+    True
+)
+
+# the number of seconds a snapshot is served for at most, whether or not
+# the hierarchy was invalidated
+HIERARCHY_CACHE_TIMEOUT = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HIERARCHY_CACHE_TIMEOUT',
+    300
+)
+
+# the number of identifiers the cached snapshots of a process may hold in
+# total.  The least recently used snapshots are dropped past this.
+HIERARCHY_CACHE_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HIERARCHY_CACHE_SIZE',
+    200000
+)
+
+# the number of identifiers whose parents are read with one query when
+# looking for the hierarchies a parsed message changed
+HIERARCHY_CACHE_BATCH_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HIERARCHY_CACHE_BATCH_SIZE',
+    1000
+)
+
+# the number of levels above a changed EPC whose hierarchies are invalidated
+HIERARCHY_CACHE_MAX_DEPTH = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HIERARCHY_CACHE_MAX_DEPTH',
+    10
+)
+
+_VERSION_KEY = 'quartet_integrations:hierarchy:%s'
+
+
+class HierarchyCache:
+    """
+    Caches snapshots of packaging hierarchies by the identifier of the EPC
+    at the top.  Snapshots of different kinds are kept apart by a
+    namespace; all of them are invalidated together when the hierarchy
+    below the EPC changes.
+
+    Cached snapshots are shared by every caller and must not be modified.
+    """
+
+    def __init__(self, size: int = HIERARCHY_CACHE_SIZE,
+                 cache_alias: str = HIERARCHY_CACHE_ALIAS,
+                 timeout: float = HIERARCHY_CACHE_TIMEOUT,
+                 enabled: bool = HIERARCHY_CACHE_ENABLED):
+        '''
+        :param size: The number of identifiers the snapshots may hold in
+            total.
+        :param cache_alias: The Django cache the versions are kept in.
+            Nothing is cached if it is None.
+        :param timeout: The number of seconds a snapshot is served for.
+        :param enabled: Whether anything is cached.
+        '''
+        self.size = size
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.enabled = enabled and cache_alias is not None
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def versions(self):
+        return caches[self.cache_alias]
+
+    def get(self, tag_id: str, loader, namespace: str = '',
+            weigher=len):
+        '''
+        Returns the cached snapshot of the hierarchy below the tag_id or
+        loads and caches it.
+        :param tag_id: The identifier of the EPC at the top.
+        :param loader: A callable without arguments that returns the
+            snapshot.
+        :param namespace: The kind of snapshot.
+        :param weigher: A callable that returns the number of identifiers a
+            snapshot holds.  Defaults to `len`.
+        :return: The snapshot.
+        '''
+        if not self.enabled:
+            return loader()
+        # the version is read before loading so a change made while the
+        # snapshot is loaded invalidates it
+        version = self._get_version(tag_id)
+        key = (namespace, tag_id)
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] == version and item[3] > now:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        value = loader()
+        self._put(key, version, value, weigher)
+        return value
+
+    def get_many(self, tag_ids, loader, namespace: str = '',
+                 weigher=len) -> dict:
+        '''
+        Returns the snapshots of the hierarchies below each of the tag_ids,
+        loading the ones that are not cached with a single call to the
+        loader.
+        :param tag_ids: The identifiers of the EPCs at the top.
+        :param loader: A callable that takes a list of identifiers and
+            returns a dictionary of their snapshots.
+        :param namespace: The kind of snapshot.
+        :param weigher: A callable that returns the number of identifiers a
+            snapshot holds.  Defaults to `len`.
+        :return: A dictionary of the snapshots by identifier.
+        '''
+        tag_ids = list(dict.fromkeys(tag_ids))
+        if not self.enabled:
+            return loader(tag_ids)
+        versions = self._get_versions(tag_ids)
+        ret_val = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for tag_id in tag_ids:
+                key = (namespace, tag_id)
+                item = self._items.get(key)
+                if item is not None and item[0] == versions[tag_id] and \
+                    item[3] > now:
+                    self._items.move_to_end(key)
+                    ret_val[tag_id] = item[1]
+                else:
+                    missing.append(tag_id)
+            self.hits += len(ret_val)
+            self.misses += len(missing)
+        if missing:
+            loaded = loader(missing)
+            for tag_id in missing:
+                self._put((namespace, tag_id), versions[tag_id],
+                          loaded[tag_id], weigher)
+            ret_val.update(loaded)
+        return ret_val
+
+    def invalidate(self, identifiers):
+        '''
+        Invalidates the cached snapshots of the hierarchies below the
+        identifiers in every process.
+        :param identifiers: The identifiers of the EPCs whose hierarchies
+            changed.
+        :return: None
+        '''
+        if not self.enabled:
+            return
+        version = uuid.uuid4().hex
+        self.versions.set_many(
+            {_VERSION_KEY % identifier: version
+             for identifier in identifiers}, timeout=None)
+
+    def invalidate_message(self, message_id: str):
+        '''
+        Invalidates the hierarchies changed by the aggregation,
+        decommissioning and shipping events of a parsed message: those
+        below every EPC of those events and below everything above them.
+        :param message_id: The message id the events were parsed under.
+        :return: The number of hierarchies invalidated.
+        '''
+        db_events = Event.objects.filter(message_id=message_id).filter(
+            Q(type=choices.EventTypeChoicesEnum.AGGREGATION.value) |
+            Q(action='DELETE') |
+            Q(biz_step__endswith='shipping') |
+            Q(disposition__endswith='in_transit')
+        ).values('id')
+        level = set(EntryEvent.objects.filter(
+            event__in=db_events).values_list('identifier', flat=True))
+        identifiers = set(level)
+        depth = 0
+        while level and depth < HIERARCHY_CACHE_MAX_DEPTH:
+            depth += 1
+            level = list(level)
+            parents = set()
+            for i in range(0, len(level), HIERARCHY_CACHE_BATCH_SIZE):
+                parents.update(Entry.objects.filter(
+                    identifier__in=level[i:i + HIERARCHY_CACHE_BATCH_SIZE],
+                    parent_id__isnull=False
+                ).values_list('parent_id__identifier', flat=True))
+            level = parents - identifiers
+            identifiers |= level
+        if identifiers:
+            self.invalidate(identifiers)
+        return len(identifiers)
+
+    def clear(self):
+        '''
+        Drops the snapshots cached by this process.
+        '''
+        with self._lock:
+            self._items.clear()
+            self.weight = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _get_version(self, tag_id: str) -> str:
+        key = _VERSION_KEY % tag_id
+        versions = self.versions
+        version = versions.get(key)
+        if version is None:
+            # a missing version is given a value so that a snapshot loaded
+            # under it is not served again if the version is later evicted
+            versions.add(key, uuid.uuid4().hex, timeout=None)
+            version = versions.get(key)
+        return version
+
+    def _get_versions(self, tag_ids: list) -> dict:
+        keys = {_VERSION_KEY % tag_id: tag_id for tag_id in tag_ids}
+        versions = self.versions
+        found = versions.get_many(list(keys))
+        missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+        if missing:
+            # a new version can replace one written meanwhile, that only
+            # causes a cache miss
+            versions.set_many(missing, timeout=None)
+            found.update(missing)
+        return {tag_id: found[key] for key, tag_id in keys.items()}
+
+    def _put(self, key, version, value, weigher):
+        weight = weigher(value) + 1
+        if weight > self.size:
+            return
+        with self._lock:
+            self._pop(key)
+            self._items[key] = (version, value, weight,
+                                time.monotonic() + self.timeout)
+            self.weight += weight
+            while self.weight > self.size:
+                self._pop(next(iter(self._items)))
+
+    def _pop(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.weight -= item[2]
+
+
+_hierarchy_cache = HierarchyCache()
+
+
+def get_hierarchy_cache() -> HierarchyCache:
+    return _hierarchy_cache
+
+
+class HierarchyCacheInvalidationMixin:
+    """
+    Mix into a parsing step, ahead of the step class, to invalidate the
+    cached hierarchies the parsed message changed.  By default the message
+    id is read from the EPCIS message id context key the quartet_epcis
+    EPCISParsingStep puts it under; steps that do not put it there override
+    `get_message_ids` or call `invalidate_hierarchies` themselves.
+    """
+
+    def execute(self, data, rule_context: RuleContext):
+        ret = super().execute(data, rule_context)
+        self.invalidate_hierarchies(self.get_message_ids(rule_context))
+        return ret
+
+    def get_message_ids(self, rule_context: RuleContext) -> list:
+        '''
+        :param rule_context: The context of the rule the step ran in.
+        :return: The ids of the messages the step parsed.
+        '''
+        message_id = rule_context.context.get(
+            ContextKeys.EPCIS_MESSAGE_ID_KEY.value)
+        return [message_id] if message_id else []
+
+    def invalidate_hierarchies(self, message_ids):
+        '''
+        Invalidates the cached hierarchies changed by the parsed messages.
+        Failures are logged, the messages are parsed either way.
+        :param message_ids: The ids of the parsed messages.
+        :return: None
+        '''
+        cache = get_hierarchy_cache()
+        if not cache.enabled:
+            return
+        for message_id in message_ids:
+            try:
+                count = cache.invalidate_message(message_id)
+                self.info('Invalidated %s cached packaging hierarchies.',
+                          count)
+            except Exception:
+                logger.exception('Could not invalidate the cached packaging '
+                                 'hierarchies of message %s.', message_id)
@@ -0,0 +1,201 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import re
+from typing import Iterator
+
+from lxml import etree
+
+# .//Tag, //Tag or Tag, optionally with one parent step: .//Parent/Tag.
+# Tags may be in Clark notation ({namespace}Tag) and the last step may be *.
+_TAG = r'(?:\{[^}]*\})?[\w.-]+'
+_STREAMABLE_PATH = re.compile(
+    r'^(?:\.?//)?(?:(?P<parent>%s)/)?(?P<tag>%s|\*)$' % (_TAG, _TAG)
+)
+
+
+# the Fault elements of SOAP 1.1 and 1.2 responses
+_SOAP_FAULTS = (
+    '{http://schemas.xmlsoap.org/soap/envelope/}Fault',
+    '{http://www.w3.org/2003/05/soap-envelope}Fault',
+)
+
+
+def _local_name(tag: str):
+    return tag.rpartition('}')[2]
+
+
+def _strip_namespaces(root: etree._Element):
+    for element in root.iter(tag=etree.Element):
+        element.tag = etree.QName(element).localname
+    etree.cleanup_namespaces(root)
+
+
+class SerialNumberExtractor:
+    """
+    Pulls the serial numbers out of a number response message without
+    keeping the message's serial number elements in memory.
+
+    Iterating over the extractor runs lxml's iterparse over the message
+    and yields the text of each serial number element as soon as the
+    element closes.  The element and the ones before it are then
+    discarded, so memory use does not grow with the size of the
+    replenishment and the numbers can be handed straight to a
+    RegionNumberStore.
+
+    Paths of the form `.//Tag` or `.//Parent/Tag` (where Tag may be `*`)
+    are streamed.  Any other XPath falls back to parsing the whole message
+    and running `findall`.
+
+    A message with a SOAP Fault raises a `SoapFault` and one without the
+    `required` elements a `MissingElement` once it has been read, so a
+    store writing the numbers in one transaction rolls them back.
+
+    Usage::
+
+        extractor = SerialNumberExtractor(response, './/SerialNo')
+        with RegionNumberStore(region) as store:
+            store.write(extractor)
+    """
+
+    def __init__(self, source, path: str, strip_namespaces=False,
+                 required=()):
+        '''
+        :param source: The message as bytes, a str or a file-like object.
+        :param path: The path of the serial number elements.
+        :param strip_namespaces: Match the tags in the path by local name
+            so the message's namespaces are ignored.
+        :param required: The tags of the elements a valid response always
+            has, such as the list the serial numbers are in.
+        '''
+        self.source = source
+        self.path = path
+        self.strip_namespaces = strip_namespaces
+        self.required = list(required)
+        match = _STREAMABLE_PATH.match(path.strip())
+        self.streamable = match is not None
+        if self.streamable:
+            self.tag = match.group('tag')
+            self.parent = match.group('parent')
+            if strip_namespaces:
+                self.tag = _local_name(self.tag)
+                self.parent = self.parent and _local_name(self.parent)
+
+    def _open(self):
+        if hasattr(self.source, 'read'):
+            if hasattr(self.source, 'seek'):
+                self.source.seek(0)
+            return self.source
+        if isinstance(self.source, str):
+            return io.BytesIO(self.source.encode('utf-8'))
+        return io.BytesIO(self.source)
+
+    def _matches(self, name: str, tag: str):
+        if name == '*':
+            return True
+        if self.strip_namespaces:
+            return name == _local_name(tag)
+        return name == tag
+
+    def is_serial_number(self, element: etree._Element):
+        '''
+        :return: True if the element is one of the serial number elements
+            the path points to.
+        '''
+        if not self._matches(self.tag, element.tag):
+            return False
+        if self.parent:
+            parent = element.getparent()
+            return parent is not None and self._matches(self.parent,
+                                                         parent.tag)
+        return True
+
+    def check_element(self, element: etree._Element, missing: list):
+        '''
+        Raises a SoapFault if the element is a SOAP Fault and removes it
+        from the missing required tags.
+        '''
+        if element.tag in _SOAP_FAULTS:
+            raise self.SoapFault(
+                'The number response is a SOAP Fault: %s' %
+                ' '.join(''.join(element.itertext()).split()))
+        for tag in missing:
+            if self._matches(tag, element.tag):
+                missing.remove(tag)
+                break
+
+    def check_missing(self, missing: list):
+        if missing:
+            raise self.MissingElement(
+                'The number response has no %s element.' %
+                ', '.join(missing))
+
+    def _iterparse(self):
+        missing = list(self.required)
+        for event, element in etree.iterparse(self._open(), events=('end',)):
+            self.check_element(element, missing)
+            if self.is_serial_number(element):
+                yield element
+        self.check_missing(missing)
+
+    def parse(self) -> etree._Element:
+        '''
+        :return: The root element of the whole message.
+        '''
+        root = etree.parse(self._open()).getroot()
+        missing = list(self.required)
+        for element in root.iter(tag=etree.Element):
+            self.check_element(element, missing)
+        self.check_missing(missing)
+        return root
+
+    def skeleton(self) -> etree._Element:
+        '''
+        Parses the message without its serial number elements, for steps
+        that need to look up other values, such as the machine name, before
+        the numbers are written.
+        :return: The root element of the message minus the serial numbers.
+        '''
+        if not self.streamable:
+            return self.parse()
+        root = None
+        for element in self._iterparse():
+            parent = element.getparent()
+            if parent is not None:
+                parent.remove(element)
+                root = parent.getroottree().getroot()
+        return root if root is not None else self.parse()
+
+    def __iter__(self) -> Iterator[str]:
+        if not self.streamable:
+            root = self.parse()
+            if self.strip_namespaces:
+                _strip_namespaces(root)
+            for element in root.findall(self.path):
+                yield element.text
+            return
+        for element in self._iterparse():
+            yield element.text
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    class SoapFault(Exception):
+        pass
+
+    class MissingElement(Exception):
+        pass
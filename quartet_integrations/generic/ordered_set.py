@@ -0,0 +1,76 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from itertools import islice
+
+
+class OrderedSet:
+    """
+    An insertion-ordered set with the parts of the `list` interface the
+    parsers use for EPC lists (`append`, `remove`, `in`, iteration and
+    indexing).  Membership tests and removals are O(1) where a list scans
+    every element, so it can be handed to EPCPyYes events as an `epc_list`
+    and still render in the order the EPCs were added.
+    """
+
+    def __init__(self, iterable=None):
+        self._items = dict.fromkeys(iterable or ())
+
+    def append(self, item):
+        self._items[item] = None
+
+    add = append
+
+    def extend(self, iterable):
+        self._items.update(dict.fromkeys(iterable))
+
+    def remove(self, item):
+        try:
+            del self._items[item]
+        except KeyError:
+            raise ValueError('%s is not in the set.' % item)
+
+    def discard(self, item):
+        self._items.pop(item, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items)[index]
+        if index < 0:
+            index += len(self._items)
+        if index < 0 or index >= len(self._items):
+            raise IndexError('OrderedSet index out of range')
+        return next(islice(self._items, index, None))
+
+    def __eq__(self, other):
+        if isinstance(other, OrderedSet):
+            return list(self._items) == list(other._items)
+        if isinstance(other, (list, tuple)):
+            return list(self._items) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self._items))
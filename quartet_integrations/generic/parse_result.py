@@ -0,0 +1,73 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+
+# the rule context key parsing steps put their ParseResult under
+PARSE_RESULT_KEY = 'PARSE_RESULT'
+
+
+class ParseResult:
+    """
+    The shipment facts a parser collected from an inbound document.  Steps
+    put this on the rule context instead of the parser itself so that the
+    context stays small and can be pickled and handed to another worker
+    without the parser's events and templates.
+
+    The attribute names match the parser properties of the same name so a
+    ParseResult can be used wherever those properties were read.
+    """
+    __slots__ = (
+        'sscc_list',
+        'quantity',
+        'lot_number',
+        'exp_date',
+        'ndc',
+        'gtin',
+        'PO',
+        'biz_location',
+        'read_point',
+    )
+
+    def __init__(self, sscc_list=None, quantity=0, lot_number='',
+                 exp_date='', ndc='', gtin='', PO='', biz_location='',
+                 read_point=''):
+        self.sscc_list = list(sscc_list or [])
+        self.quantity = quantity
+        self.lot_number = lot_number
+        self.exp_date = exp_date
+        self.ndc = ndc
+        self.gtin = gtin
+        self.PO = PO
+        self.biz_location = biz_location
+        self.read_point = read_point
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, ParseResult):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    def __repr__(self):
+        # the SSCC list can be very long so only its length is shown
+        return 'ParseResult(%s)' % ', '.join(
+            '%s=%r' % (name, getattr(self, name))
+            if name != 'sscc_list' else '%d SSCCs' % len(self.sscc_list)
+            for name in self.__slots__
+        )
@@ -0,0 +1,313 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+from list_based_flavorpack.models import ListBasedRegion
+from list_based_flavorpack.processing_classes.third_party_processing.processing import \
+    DBProcessingClass
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_db_number_count
+
+from quartet_integrations.generic.replenishment import \
+    ReplenishmentScheduler
+
+logger = getLogger(__name__)
+
+# whether number range views replenish list based regions ahead of demand
+PREFETCH_ENABLED = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_PREFETCH_ENABLED',
+    False
+)
+
+# the seconds a replenishment is expected to take before one was observed
+PREFETCH_LEAD_TIME = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_PREFETCH_LEAD_TIME',
+    30.0
+)
+
+# the low watermark covers this many replenishment lead times of draws
+PREFETCH_SAFETY_FACTOR = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_PREFETCH_SAFETY_FACTOR',
+    2.0
+)
+
+# the seconds of draws the consumption rate of a pool is measured over
+PREFETCH_RATE_WINDOW = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_PREFETCH_RATE_WINDOW',
+    600.0
+)
+
+
+class DrawRate:
+    """
+    The rate at which numbers are drawn from a pool, measured over the
+    draws of the last `window` seconds.
+    """
+
+    def __init__(self, window=PREFETCH_RATE_WINDOW, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._draws = deque()
+        self._total = 0
+
+    def record(self, size: int):
+        now = self.clock()
+        self._draws.append((now, size))
+        self._total += size
+        self._expire(now)
+
+    def _expire(self, now):
+        while self._draws and now - self._draws[0][0] > self.window:
+            self._total -= self._draws.popleft()[1]
+
+    @property
+    def per_second(self) -> float:
+        '''
+        :return: The numbers drawn per second.  The span is at least a
+            minute so a burst of draws does not look like a huge rate.
+        '''
+        now = self.clock()
+        self._expire(now)
+        if not self._draws:
+            return 0.0
+        span = max(now - self._draws[0][0], 60.0)
+        return self._total / span
+
+
+class Watermarks:
+    """
+    The low and high watermarks of a region.  A replenishment is started
+    when the region holds `low` numbers or fewer and requests enough
+    numbers to bring it up to `high`.
+    """
+    __slots__ = ('low', 'high')
+
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def compute(cls, rate: float, lead_time: float, replenishment_size: int,
+                safety_factor=PREFETCH_SAFETY_FACTOR):
+        '''
+        :param rate: The numbers drawn from the pool per second.
+        :param lead_time: The seconds a replenishment takes.
+        :param replenishment_size: The region's number_replenishment_size.
+        :param safety_factor: How many lead times of draws the low
+            watermark covers.
+        :return: The Watermarks of the region.
+        '''
+        low = int(math.ceil(rate * lead_time * safety_factor))
+        return cls(low, low + (replenishment_size or 0))
+
+    def __repr__(self):
+        return 'Watermarks(low=%d, high=%d)' % (self.low, self.high)
+
+
+class PreFetcher:
+    """
+    Replenishes list based regions before they run out.
+
+    The number range views record every allocation with `record`.  The
+    draw rate of each pool and the duration of each region's last
+    replenishment give the region's watermarks; once an allocation leaves
+    a region at or below its low watermark, a background thread
+    replenishes it through the ReplenishmentScheduler.  Allocations
+    therefore only wait on a partner system if they outpace the
+    watermarks.
+
+    The rates are kept per process, so with several web workers each one
+    measures the share of the traffic it serves.  A pool has at most one
+    check waiting for the background thread; allocations made meanwhile
+    are covered by it.
+    """
+
+    def __init__(self, executor=None, scheduler: ReplenishmentScheduler = None,
+                 lead_time=PREFETCH_LEAD_TIME, clock=time.monotonic):
+        '''
+        :param executor: The concurrent.futures executor the checks and
+            replenishments run in; a single background thread by default.
+        :param scheduler: The ReplenishmentScheduler used to replenish.
+        :param lead_time: The replenishment lead time assumed for a region
+            until one of its replenishments was timed.
+        :param clock: Returns the current time in seconds.
+        '''
+        self.executor = executor or ThreadPoolExecutor(
+            1, thread_name_prefix='prefetch')
+        self.scheduler = scheduler or ReplenishmentScheduler()
+        self.lead_time = lead_time
+        self.clock = clock
+        self._rates = {}
+        self._lead_times = {}
+        self._in_flight = set()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def get_rate(self, pool: str) -> DrawRate:
+        with self._lock:
+            rate = self._rates.get(pool)
+            if rate is None:
+                rate = self._rates[pool] = DrawRate(clock=self.clock)
+            return rate
+
+    def record(self, pool: str, size: int):
+        '''
+        Records numbers drawn from a pool and checks its regions in the
+        background.
+        :param pool: The machine name of the pool.
+        :param size: The number of numbers drawn.
+        '''
+        rate = self.get_rate(pool)
+        with self._lock:
+            rate.record(size)
+            if pool in self._pending:
+                return
+            self._pending.add(pool)
+        try:
+            self.executor.submit(self._check_in_thread, pool)
+        except Exception:
+            with self._lock:
+                self._pending.discard(pool)
+            raise
+
+    def get_watermarks(self, pool: str,
+                       region: ListBasedRegion) -> Watermarks:
+        '''
+        :param pool: The machine name of the region's pool.
+        :param region: The region.
+        :return: The region's current Watermarks.
+        '''
+        rate = self.get_rate(pool)
+        with self._lock:
+            per_second = rate.per_second
+        return Watermarks.compute(
+            per_second,
+            self._lead_times.get(region.machine_name, self.lead_time),
+            region.number_replenishment_size
+        )
+
+    def get_regions(self, pool: str):
+        '''
+        :return: The active regions of the pool that keep their numbers in
+            a region database and have a rule to replenish it.
+        '''
+        regions = ListBasedRegion.objects.filter(
+            pool__machine_name=pool, active=True, rule__isnull=False
+        ).select_related('pool', 'rule', 'template', 'end_point',
+                         'authentication_info')
+        return [region for region in regions
+                if issubclass(import_string(region.processing_class_path),
+                              DBProcessingClass)]
+
+    def check(self, pool: str):
+        '''
+        Replenishes the regions of the pool that are at or below their low
+        watermark and not already being replenished.
+        :param pool: The machine name of the pool.
+        :return: The ReplenishmentResults of the replenishments started.
+        '''
+        due = {}
+        for region in self.get_regions(pool):
+            watermarks = self.get_watermarks(pool, region)
+            available = get_db_number_count(region)
+            if available > watermarks.low:
+                continue
+            with self._lock:
+                if region.machine_name in self._in_flight:
+                    continue
+                self._in_flight.add(region.machine_name)
+            logger.info('Region %s holds %d numbers, %r; replenishing.',
+                        region.machine_name, available, watermarks)
+            due[region.machine_name] = (region, watermarks.high - available)
+        if not due:
+            return []
+        try:
+            results = self.scheduler.replenish(
+                [region for region, size in due.values()],
+                lambda region: due[region.machine_name][1]
+            )
+        finally:
+            with self._lock:
+                self._in_flight.difference_update(due)
+        for result in results:
+            if result.succeeded:
+                self._lead_times[result.machine_name] = result.latency
+        return results
+
+    def _check_in_thread(self, pool: str):
+        # allocations made from here on need a check of their own
+        with self._lock:
+            self._pending.discard(pool)
+        try:
+            self.check(pool)
+        except Exception:
+            logger.exception('Pre-fetching numbers for pool %s failed.', pool)
+        finally:
+            connections.close_all()
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> PreFetcher:
+    '''
+    :return: The PreFetcher of this process.
+    '''
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = PreFetcher()
+    return _prefetcher
+
+
+class PreFetchMixin:
+    """
+    Mix into a serialbox AllocateView to record each successful allocation
+    with the PreFetcher once the response has been built.
+    """
+
+    def get(self, request, pool=None, size=None, region=None):
+        ret = super().get(request, pool, size, region)
+        if PREFETCH_ENABLED and pool and size and self.allocated(ret):
+            try:
+                get_prefetcher().record(pool, int(size))
+            except Exception:
+                logger.exception('Could not record the allocation from '
+                                 'pool %s.', pool)
+        return ret
+
+    def allocated(self, response) -> bool:
+        '''
+        :param response: The response of the AllocateView.
+        :return: False if the response reports an error, in which case no
+            numbers were drawn from the pool.
+        '''
+        if getattr(response, 'exception', False):
+            return False
+        return getattr(response, 'status_code', 200) < 400
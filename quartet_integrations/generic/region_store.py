@@ -0,0 +1,135 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import sqlite3
+from typing import Iterable
+
+from django.conf import settings
+from list_based_flavorpack.models import ListBasedRegion
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_region_table
+
+# the sqlite journal mode of the list based region database files.  WAL
+# lets the number allocation read while a replenishment is being written.
+SQLITE_JOURNAL_MODE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_SQLITE_JOURNAL_MODE',
+    'WAL'
+)
+
+# the sqlite synchronous level used while writing numbers.  NORMAL is safe
+# in WAL mode; a power loss can only lose the last committed transactions.
+SQLITE_SYNCHRONOUS = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_SQLITE_SYNCHRONOUS',
+    'NORMAL'
+)
+
+
+class RegionNumberStore:
+    """
+    Writes serial numbers into the sqlite database file of a list based
+    region.
+
+    The numbers are inserted with a single `executemany` call so sqlite
+    prepares the insert statement once, and the input is consumed as an
+    iterable so a generator never has to be turned into a list.  The
+    table, and with it the unique index on `serial_number`, is created
+    when the database file is opened if it does not exist.
+
+    Usage::
+
+        with RegionNumberStore(region) as store:
+            store.write(number.text for number in number_elements)
+    """
+
+    def __init__(self, region: ListBasedRegion,
+                 journal_mode=SQLITE_JOURNAL_MODE,
+                 synchronous=SQLITE_SYNCHRONOUS):
+        '''
+        :param region: The list based region to write to.
+        :param journal_mode: The sqlite journal_mode pragma value.
+        :param synchronous: The sqlite synchronous pragma value.
+        '''
+        self.region = region
+        self.db_file_path = region.db_file_path
+        self.table = get_region_table(region)
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        # the number being inserted, used to report duplicates
+        self.current = None
+        self._connection = None
+        self._insert = 'insert into %s (serial_number, used) values ' \
+                       '(?, 0)' % self.table
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = self.connect()
+        return self._connection
+
+    def connect(self) -> sqlite3.Connection:
+        '''
+        Opens the database file, applies the pragmas and creates the table
+        if it does not exist.
+        :return: The sqlite connection.
+        '''
+        connection = sqlite3.connect(self.db_file_path)
+        connection.execute('pragma journal_mode=%s' % self.journal_mode)
+        connection.execute('pragma synchronous=%s' % self.synchronous)
+        self.create_table(connection)
+        return connection
+
+    def create_table(self, connection: sqlite3.Connection):
+        '''
+        Creates the region table.  The unique constraint is the only index;
+        allocated numbers are deleted so `used` needs none.
+        :param connection: An open connection to the database file.
+        '''
+        with connection:
+            connection.execute(
+                "create table if not exists %s "
+                "(serial_number text not null unique, used integer not null)"
+                % self.table
+            )
+
+    def _rows(self, serial_numbers: Iterable[str]):
+        for serial_number in serial_numbers:
+            self.current = serial_number
+            yield (serial_number,)
+
+    def write(self, serial_numbers: Iterable[str]) -> int:
+        '''
+        Inserts the serial numbers as unused numbers in one transaction.
+        If any number already exists the transaction is rolled back, the
+        sqlite3.IntegrityError is raised and `current` holds the duplicate.
+        :param serial_numbers: Any iterable of serial number strings.
+        :return: The number of serial numbers written.
+        '''
+        connection = self.connection
+        with connection:
+            cursor = connection.executemany(self._insert,
+                                            self._rows(serial_numbers))
+        return cursor.rowcount
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,197 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Callable, Iterable, List, Union
+
+from django.conf import settings
+from django.db import connections
+from list_based_flavorpack.models import ListBasedRegion
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    SufficientDBNumbers, get_db_number_count
+
+logger = getLogger(__name__)
+
+# how many replenishments may run against one end point at the same time
+REPLENISHMENT_CONCURRENCY = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_REPLENISHMENT_CONCURRENCY',
+    4
+)
+
+# the number of threads running replenishments across all end points
+REPLENISHMENT_WORKERS = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_REPLENISHMENT_WORKERS',
+    16
+)
+
+
+def replenish_region(region: ListBasedRegion, size: int = 0) -> int:
+    '''
+    Requests numbers for a region by running the region's rule, exactly as
+    the list based flavorpack does when an allocation finds the region
+    empty.  The number response steps write the numbers through a
+    RegionNumberStore.
+    :param region: The region to replenish.
+    :param size: The minimum number of numbers to request.  The region's
+        number_replenishment_size is used when it is larger.
+    :return: The number of numbers added to the region.
+    '''
+    before = get_db_number_count(region)
+    SufficientDBNumbers().fetch_more_numbers(None, region.pool, region, size)
+    return get_db_number_count(region) - before
+
+
+class ReplenishmentResult:
+    """
+    The outcome of one region's replenishment.
+    """
+    __slots__ = ('machine_name', 'count', 'latency', 'error')
+
+    def __init__(self, machine_name: str, count: int = 0,
+                 latency: float = 0.0, error: Exception = None):
+        '''
+        :param machine_name: The machine name of the region.
+        :param count: The number of numbers added to the region.
+        :param latency: The seconds the replenishment took, including the
+            time spent waiting for its end point.
+        :param error: The exception raised by the replenishment, if any.
+        '''
+        self.machine_name = machine_name
+        self.count = count
+        self.latency = latency
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        return 'ReplenishmentResult(%s, count=%d, latency=%.3f, error=%r)' % (
+            self.machine_name, self.count, self.latency, self.error
+        )
+
+
+class ReplenishmentScheduler:
+    """
+    Replenishes many list based regions at once.
+
+    Each region's replenishment is an asyncio task; the blocking rule
+    execution, SOAP calls and sqlite writes run in a thread pool while the
+    event loop limits how many replenishments share an end point, so one
+    slow partner system does not hold up the regions served by the others
+    and no partner receives more than `concurrency` parallel requests.
+
+    Usage::
+
+        results = ReplenishmentScheduler().replenish(
+            ListBasedRegion.objects.filter(active=True)
+                .select_related('end_point', 'pool', 'rule', 'template')
+        )
+    """
+
+    def __init__(self, replenish: Callable[[ListBasedRegion, int], int] = None,
+                 concurrency: int = REPLENISHMENT_CONCURRENCY,
+                 workers: int = REPLENISHMENT_WORKERS):
+        '''
+        :param replenish: Called with a region and a size in a worker
+            thread, returns the number of numbers added.  Defaults to
+            replenish_region.
+        :param concurrency: The maximum number of replenishments running
+            against one end point.
+        :param workers: The maximum number of replenishments running in
+            total.
+        '''
+        self.replenish_function = replenish or replenish_region
+        self.concurrency = concurrency
+        self.workers = workers
+
+    def replenish(self, regions: Iterable[ListBasedRegion],
+                  size: Union[int, Callable] = 0
+                  ) -> List[ReplenishmentResult]:
+        '''
+        Replenishes the regions and waits until all of them are done.  Must
+        not be called from a running event loop; use `run` there.
+        :param regions: The regions to replenish.
+        :param size: The minimum number of numbers to request per region,
+            or a callable returning it for a region.
+        :return: A ReplenishmentResult per region, in the order given.
+        '''
+        # evaluate querysets here, the ORM can not be used inside the loop
+        return asyncio.run(self.run(list(regions), size))
+
+    async def run(self, regions: List[ListBasedRegion],
+                  size: Union[int, Callable] = 0
+                  ) -> List[ReplenishmentResult]:
+        '''
+        :param regions: The regions to replenish.  Their related records are
+            read from worker threads, so the list must already be evaluated.
+        :param size: The minimum number of numbers to request per region,
+            or a callable returning it for a region.
+        :return: A ReplenishmentResult per region, in the order given.
+        '''
+        semaphores = {}
+        with ThreadPoolExecutor(self.workers,
+                                thread_name_prefix='replenish') as executor:
+            return await asyncio.gather(*[
+                self._replenish(
+                    region, size(region) if callable(size) else size,
+                    executor,
+                    semaphores.setdefault(
+                        self.get_end_point_key(region),
+                        asyncio.Semaphore(self.concurrency)
+                    )
+                ) for region in regions
+            ])
+
+    def get_end_point_key(self, region: ListBasedRegion):
+        '''
+        :return: The key of the end point the region's requests go to.
+            Regions without an end point are not limited as a group.
+        '''
+        return region.end_point_id or ('region', region.machine_name)
+
+    async def _replenish(self, region: ListBasedRegion, size: int,
+                         executor: ThreadPoolExecutor,
+                         semaphore: asyncio.Semaphore) -> ReplenishmentResult:
+        result = ReplenishmentResult(region.machine_name)
+        start = time.perf_counter()
+        async with semaphore:
+            try:
+                result.count = await asyncio.get_running_loop() \
+                    .run_in_executor(executor, self._run_in_thread, region,
+                                     size)
+            except Exception as e:
+                result.error = e
+        result.latency = time.perf_counter() - start
+        if result.succeeded:
+            logger.info('Replenished region %s with %d numbers in %.3f '
+                        'seconds.', result.machine_name, result.count,
+                        result.latency)
+        else:
+            logger.error('Replenishing region %s failed after %.3f seconds: '
+                         '%s', result.machine_name, result.latency,
+                         result.error)
+        return result
+
+    def _run_in_thread(self, region: ListBasedRegion, size: int) -> int:
+        try:
+            return self.replenish_function(region, size)
+        finally:
+            # the worker threads outlive the request that started them
+            connections.close_all()
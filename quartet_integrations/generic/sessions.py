@@ -0,0 +1,130 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import threading
+
+import requests
+from django.conf import settings
+from quartet_output.models import AuthenticationInfo, EndPoint
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# the number of connections kept open to each end point
+HTTP_POOL_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HTTP_POOL_SIZE',
+    10
+)
+
+# how many times a request is retried when the connection to the end point
+# can not be established
+HTTP_RETRIES = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HTTP_RETRIES',
+    3
+)
+
+# the urllib3 backoff factor between retries, 0.5 waits 0.5, 1, 2... seconds
+HTTP_BACKOFF_FACTOR = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HTTP_BACKOFF_FACTOR',
+    0.5
+)
+
+# the (connect, read) timeout in seconds of the requests sent on a session.
+# None waits indefinitely, as the requests sent without a session did.
+HTTP_TIMEOUT = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_HTTP_TIMEOUT',
+    None
+)
+
+# (end point URL, authentication info id) -> requests.Session
+_sessions = {}
+_lock = threading.Lock()
+
+
+class EndPointSession(requests.Session):
+    """
+    A requests.Session that applies the default timeout to every request
+    that does not set its own.
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES,
+                   backoff_factor=HTTP_BACKOFF_FACTOR,
+                   timeout=HTTP_TIMEOUT) -> EndPointSession:
+    '''
+    Creates a session with a keep-alive connection pool.  Only failed
+    connection attempts are retried: the number request calls are POSTs
+    that a partner may already have acted on once the request was sent.
+    :param pool_size: The number of connections kept in the pool.
+    :param retries: The number of times to retry a failed connection.
+    :param backoff_factor: The urllib3 backoff factor between retries.
+    :param timeout: The default (connect, read) timeout of each request.
+    :return: A new EndPointSession.
+    '''
+    session = EndPointSession(timeout)
+    retry = Retry(total=retries, connect=retries, read=0, status=0,
+                  other=0, backoff_factor=backoff_factor,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(end_point: EndPoint,
+                authentication_info: AuthenticationInfo = None
+                ) -> EndPointSession:
+    '''
+    Returns the session of an end point and the credentials sent to it,
+    creating it the first time they are used in this process.  Requests
+    sent through the same session reuse its open connections instead of
+    connecting for each call.  Each set of credentials gets a session of
+    its own so the cookies a partner sets for one, such as JSESSIONID or
+    LTPA tokens, are never sent with another.
+    :param end_point: The quartet_output EndPoint of a region.
+    :param authentication_info: The AuthenticationInfo the requests are
+        sent with, if any.
+    :return: The EndPointSession of the end point's URL and credentials.
+    '''
+    key = (end_point.urn,
+           authentication_info.pk if authentication_info else None)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = create_session()
+    return session
+
+
+def close_sessions():
+    '''
+    Closes every pooled session and its connections.
+    '''
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
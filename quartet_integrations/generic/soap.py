@@ -0,0 +1,117 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+"""
+Helpers for reading the fields of inbound SOAP requests.
+
+The XPath expressions of a request format are compiled once, when the
+view module is imported, instead of on every request.  Small requests that
+are read completely are parsed into a tree and read with `SoapFields`;
+the number range requests that only need a few elements near the top are
+read with `iterparse_fields`, which stops parsing as soon as the caller
+has what it needs.
+"""
+import threading
+from io import BytesIO
+from typing import Iterable
+
+from lxml import etree
+
+SOAP_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+
+_local = threading.local()
+
+
+def get_parser() -> etree.XMLParser:
+    '''
+    :return: The XML parser of the current thread.  lxml parsers must not be
+        shared between threads.  The parser does not resolve entities or
+        read from the network.
+    '''
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = _local.parser = etree.XMLParser(
+            resolve_entities=False, no_network=True, remove_comments=True)
+    return parser
+
+
+def parse_request(body: bytes) -> etree._Element:
+    '''
+    Parses a request body into a tree.
+    :param body: The raw request body.
+    :return: The root element.
+    :raises etree.XMLSyntaxError: If the body is not well formed XML.
+    '''
+    return etree.fromstring(body, get_parser())
+
+
+def iterparse_fields(body: bytes, local_names: Iterable[str] = None):
+    '''
+    Returns an iterparse over the request body that only reports the end of
+    the elements with the local names, in any namespace.
+    :param body: The raw request body.
+    :param local_names: The local names of the elements to report.  lxml
+        matches them case-sensitively; pass None to report every element.
+    :return: An lxml iterparse of (event, element) tuples.
+    '''
+    return etree.iterparse(
+        BytesIO(body),
+        events=('end',),
+        tag=None if local_names is None else [
+            '{*}%s' % name for name in local_names],
+        remove_comments=True,
+        resolve_entities=False,
+        no_network=True
+    )
+
+
+class SoapFields:
+    """
+    Reads the text of a set of request elements with precompiled XPath
+    expressions.
+
+    Usage::
+
+        REQUEST_FIELDS = SoapFields(
+            {'size': 'com:SerialQuantity', 'gtin': 'com:Gtin'},
+            NAMESPACES, prefix='//soapenv:Body/typ:request/')
+
+        values = REQUEST_FIELDS.extract(parse_request(request.body))
+    """
+
+    def __init__(self, fields: dict, namespaces: dict, prefix: str = ''):
+        '''
+        :param fields: The XPath expression of the element of each field by
+            field name.
+        :param namespaces: The namespace prefixes used by the expressions.
+        :param prefix: The expression prepended to each of the fields'.
+        '''
+        self.namespaces = namespaces
+        self.xpaths = {
+            name: etree.XPath('%s%s/text()' % (prefix, path),
+                              namespaces=namespaces, smart_strings=False)
+            for name, path in fields.items()
+        }
+
+    def extract(self, element: etree._Element) -> dict:
+        '''
+        :param element: The element the expressions are evaluated against.
+        :return: The text of the first element of each field by field name,
+            None if there is no such element or it has no text.
+        '''
+        ret_val = {}
+        for name, xpath in self.xpaths.items():
+            result = xpath(element)
+            ret_val[name] = result[0] if result else None
+        return ret_val
@@ -12,12 +12,23 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 # Copyright 2020 SerialLab Corp.  All rights reserved.
+import random
+import sys
+from datetime import datetime
+from time import time
 from typing import List
+from uuid import uuid4
+
+from jinja2.environment import Environment
 from quartet_capture import models, errors as capture_errors
 from quartet_capture.rules import Step, RuleContext
 from quartet_epcis.parsing.steps import EPCISParsingStep
 from quartet_epcis.parsing.errors import EntryException
+from quartet_integrations.environment import get_template_from_string
+from quartet_integrations.generic.hierarchy_cache import \
+    HierarchyCacheInvalidationMixin
 from quartet_integrations.generic.parsing import FailedMessageParser
+from quartet_integrations.generic.streaming import StreamingTemplate
 from quartet_integrations.optel.epcpyyes import ObjectEvent
 from quartet_output.steps import ContextKeys, CreateOutputTaskStep as COTS
 from io import BytesIO
@@ -25,6 +36,16 @@ from quartet_output.steps import TransportStep
 from quartet_output.models import EPCISOutputCriteria, EndPoint
 from django.utils.translation import gettext as _
 from EPCPyYes.core.v1_2.template_events import EPCISDocument
+from quartet_templates.models import Template
+from quartet_templates.steps import TemplateStep
+
+# the environments of the StreamingTemplateStep keyed by their autoescape
+# setting, shared so the compiled templates are cached.
+_streaming_environments = {
+    autoescape: Environment(trim_blocks=True, lstrip_blocks=True,
+                            autoescape=autoescape)
+    for autoescape in (True, False)
+}
 
 
 class MyStep(Step):
@@ -45,7 +66,8 @@ class MyStep(Step):
         self.error('That was a terrible error.')
 
 
-class EPCISNotifcationStep(EPCISParsingStep):
+class EPCISNotifcationStep(HierarchyCacheInvalidationMixin,
+                           EPCISParsingStep):
     # we need to create a task para
     def __init__(self, db_task: models.Task, **kwargs):
         super().__init__(db_task, **kwargs)
@@ -217,7 +239,8 @@ class ErrorReportTransportStep(TransportStep):
         pass
 
 
-class FilteredEventsParsingStep(EPCISParsingStep):
+class FilteredEventsParsingStep(HierarchyCacheInvalidationMixin,
+                                EPCISParsingStep):
     '''
     Designed to parse and save all of the filtered events 
     from rule context in FILTERED_EVENTS_KEY context key.
@@ -232,3 +255,54 @@ class FilteredEventsParsingStep(EPCISParsingStep):
             ContextKeys.FILTERED_EVENTS_KEY.value)
         epcis_doc = self.prepare_epcis_doc(filtered_events)
         return super().execute(epcis_doc, rule_context)
+
+
+class HierarchyCacheEPCISParsingStep(HierarchyCacheInvalidationMixin,
+                                     EPCISParsingStep):
+    """
+    The quartet_epcis EPCISParsingStep that also invalidates the cached
+    packaging hierarchies the parsed message changed.  Use it in place of
+    the quartet_epcis step in rules that receive aggregation,
+    decommissioning or shipping events.
+    """
+    pass
+
+
+class StreamingTemplateStep(TemplateStep):
+    """
+    Works like the quartet_templates TemplateStep but returns a
+    StreamingTemplate instead of the rendered string.  Number range views
+    that mix in the StreamingResponseMixin send it as a streamed response,
+    so the response to a large request is rendered while it is sent and
+    never built in memory.  The template is compiled once per process.
+    """
+
+    def execute(self, data, rule_context: RuleContext):
+        template_name = self.get_parameter('Template Name',
+                                           raise_exception=True)
+        context_key = self.get_parameter('Context Key')
+        self.info('Rendering template %s as a stream.', template_name)
+        content = Template.objects.values_list(
+            'content', flat=True).get(name=template_name)
+        environment = _streaming_environments[
+            self.get_boolean_parameter('Auto Escape', True)]
+        ret = StreamingTemplate(
+            get_template_from_string(environment, content),
+            {
+                'data': data,
+                'rule_context': rule_context,
+                'step_parameters': self.parameters,
+                'task_parameters': self.get_task_parameters(rule_context),
+                'epoch': time(),
+                'random': random.randint(1, sys.maxsize),
+                'UUID': str(uuid4()),
+                'datetime': datetime.isoformat(datetime.now()),
+            }
+        )
+        ret.prime()
+        if context_key:
+            self.info('Placing the stream into context key %s.', context_key)
+            rule_context.context[context_key] = ret
+        else:
+            data = ret
+        return data
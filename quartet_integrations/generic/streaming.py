@@ -0,0 +1,241 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import tempfile
+from itertools import chain
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from EPCPyYes.core.v1_2 import template_events
+from jinja2 import Template
+from rest_framework.response import Response
+
+from quartet_integrations.environment import get_template_from_string
+
+# the size in bytes a streamed document is kept in memory before it is
+# rolled over to a temporary file on disk.
+SPOOL_MAX_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_SPOOL_MAX_SIZE',
+    10 * 1024 * 1024
+)
+
+# the number of characters a streamed template response is sent in at a time
+STREAMING_CHUNK_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_STREAMING_CHUNK_SIZE',
+    64 * 1024
+)
+
+_EVENTS_MARKER = '<!--quartet-integrations-events-->'
+
+
+class _MarkerEvent:
+    """
+    Stands in for the event list when the document template is rendered so
+    the output can be split into the text before and after the events.
+    """
+
+    def __init__(self, env):
+        self.template = get_template_from_string(env, _EVENTS_MARKER)
+
+
+class StreamingEPCISDocument:
+    """
+    Writes an EPCIS document to a file-like sink one event at a time instead
+    of rendering the whole event list into a single string.
+
+    The document template is any template that renders its events with
+    `{% for event in template_events %}{% include event.template %}` (the
+    EPCPyYes and integration document templates all do).  The head of the
+    document is written before the first event, each event is rendered and
+    written as it is passed to `write_event` and `close` writes the tail and
+    rewinds the sink.  An instance can be passed directly to a parser as an
+    event sink since calling it writes the event.
+
+    When no sink is supplied a binary `SpooledTemporaryFile` is used which
+    stays in memory up to the `QUARTET_INTEGRATIONS_SPOOL_MAX_SIZE` setting.
+    """
+
+    def __init__(self, template: Template, sink=None,
+                 additional_context: dict = None, encoding='utf-8'):
+        '''
+        :param template: The compiled Jinja2 document template.
+        :param sink: A binary file-like object to write to.  Defaults to a
+        new spooled temporary file.
+        :param additional_context: The additional context passed to the
+        document template.
+        :param encoding: The encoding used to write the rendered text.
+        '''
+        self.sink = sink if sink is not None else \
+            tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.encoding = encoding
+        self.event_count = 0
+        self._started = False
+        self._closed = False
+        self._head, self._tail = self._split_document(template,
+                                                      additional_context)
+
+    def _split_document(self, template: Template, additional_context: dict):
+        document = template_events.EPCISEventListDocument(
+            [_MarkerEvent(template.environment)],
+            None,
+            template=template,
+            additional_context=additional_context
+        ).render()
+        head, marker, tail = document.partition(_EVENTS_MARKER)
+        if not marker:
+            raise self.TemplateError(
+                'The document template does not render its events through '
+                'the template_events list.'
+            )
+        return head, tail
+
+    def _write(self, text: str):
+        self.sink.write(text.encode(self.encoding))
+
+    def write_event(self, event):
+        '''
+        Renders an event and writes it to the sink.
+        :param event: An EPCPyYes template event.
+        :return: None
+        '''
+        if not self._started:
+            self._write(self._head)
+            self._started = True
+        self._write(event.render())
+        self.event_count += 1
+
+    __call__ = write_event
+
+    def write_events(self, events):
+        '''
+        Writes each event in an iterable of events.
+        :param events: An iterable of EPCPyYes template events.
+        :return: None
+        '''
+        for event in events:
+            self.write_event(event)
+
+    def close(self):
+        '''
+        Writes the end of the document and rewinds the sink so it can be
+        read from the start.
+        :return: The sink.
+        '''
+        if not self._closed:
+            if not self._started:
+                self._write(self._head)
+                self._started = True
+            self._write(self._tail)
+            self._closed = True
+            if self.sink.seekable():
+                self.sink.seek(0)
+        return self.sink
+
+    class TemplateError(Exception):
+        pass
+
+
+class StreamingTemplate:
+    """
+    A Jinja2 template and its context, rendered while it is read instead of
+    into a single string.
+
+    Iterating yields the output in chunks of about `chunk_size` characters
+    using the template's `generate`, so a number range response that renders
+    a lazy list of serial numbers is never held in memory as a whole.
+    `prime` renders the first chunk ahead of time so errors in the head of
+    the template are raised by the step rendering it and not after the
+    response has started.  `str()` renders the whole template for anything
+    that needs a string.
+    """
+
+    def __init__(self, template: Template, context: dict,
+                 chunk_size: int = None):
+        '''
+        :param template: The compiled Jinja2 template.
+        :param context: The context the template is rendered with.
+        :param chunk_size: The number of characters buffered before a chunk
+            is yielded.  Defaults to QUARTET_INTEGRATIONS_STREAMING_CHUNK_SIZE.
+        '''
+        self.template = template
+        self.context = context
+        self.chunk_size = chunk_size or STREAMING_CHUNK_SIZE
+        self._primed = None
+
+    def prime(self):
+        '''
+        Renders the first chunk of the template, the next iteration starts
+        with it.
+        :return: None
+        '''
+        if self._primed is None:
+            chunks = self._generate()
+            self._primed = (next(chunks, None), chunks)
+
+    def _generate(self):
+        buffer = []
+        size = 0
+        for text in self.template.generate(self.context):
+            buffer.append(text)
+            size += len(text)
+            if size >= self.chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer)
+
+    def __iter__(self):
+        if self._primed is None:
+            return self._generate()
+        first, chunks = self._primed
+        self._primed = None
+        if first is None:
+            return iter(())
+        return chain((first,), chunks)
+
+    def __str__(self):
+        return ''.join(self)
+
+
+class StreamingResponseMixin:
+    """
+    Mix into a serialbox AllocateView to send the StreamingTemplate output
+    of a response rule as a StreamingHttpResponse with the content type of
+    the accepted renderer.  Any other output is returned as it was.
+    """
+
+    def get(self, request, pool=None, size=None, region=None):
+        ret = super().get(request, pool, size, region)
+        if isinstance(ret, Response) and \
+            isinstance(ret.data, StreamingTemplate):
+            ret = self.get_streaming_response(request, ret)
+        return ret
+
+    def get_streaming_response(self, request, response: Response):
+        '''
+        :param request: The request.
+        :param response: The Response with a StreamingTemplate as its data.
+        :return: A StreamingHttpResponse.
+        '''
+        renderer = getattr(request, 'accepted_renderer', None)
+        media_type = getattr(renderer, 'media_type', None) or 'text/xml'
+        charset = getattr(renderer, 'charset', None) or 'utf-8'
+        return StreamingHttpResponse(
+            response.data,
+            status=response.status_code,
+            content_type='%s; charset=%s' % (media_type, charset)
+        )
@@ -0,0 +1,62 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from typing import List
+
+from django.db import transaction
+from quartet_capture.models import Task, TaskParameter
+
+
+class BulkTaskParameterMixin:
+    """
+    Mix into a serialbox AllocateView to create the response rule task and
+    all of its parameters with two inserts in a single transaction instead
+    of one insert per parameter.
+
+    Subclasses add their own parameters by extending `get_task_parameters`
+    rather than overriding `_set_task_parameters`.
+    """
+
+    def get_task_parameters(self, pool, region, size, request) \
+        -> List[TaskParameter]:
+        '''
+        Returns the unsaved parameters of the response rule task.  These are
+        the same parameters the serialbox AllocateView creates: the source,
+        pool, size, region (if any) and each query parameter.
+        :param pool: The machine name of the pool.
+        :param region: The machine name of the region or None.
+        :param size: The size of the request.
+        :param request: The request.
+        :return: A list of TaskParameter instances without a task.
+        '''
+        ret = [
+            TaskParameter(name='source', value='serialbox-allocate'),
+            TaskParameter(name='pool', value=pool),
+            TaskParameter(name='size', value=str(size)),
+        ]
+        if region:
+            ret.append(TaskParameter(name='region', value=region))
+        ret.extend(TaskParameter(name=k, value=v)
+                   for k, v in request.query_params.dict().items())
+        return ret
+
+    def _set_task_parameters(self, pool, region, response_rule, size, request):
+        parameters = self.get_task_parameters(pool, region, size, request)
+        with transaction.atomic():
+            db_task = Task.objects.create(rule=response_rule.rule,
+                                          status='FINISHED')
+            for parameter in parameters:
+                parameter.task = db_task
+            TaskParameter.objects.bulk_create(parameters)
+        return db_task
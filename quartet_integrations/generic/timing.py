@@ -0,0 +1,375 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from logging import getLogger
+
+from django.conf import settings
+
+logger = getLogger(__name__)
+
+# whether the number range views record their request latencies
+TIMING_ENABLED = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_TIMING_ENABLED',
+    True
+)
+
+# the upper bounds, in milliseconds, of the latency histogram buckets
+TIMING_BUCKETS = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_TIMING_BUCKETS',
+    (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+)
+
+# the number of partners, by sending system or location, whose requests
+# are counted separately for each pool.  The requests of any further
+# partners are counted under OTHER_PARTNERS.
+TIMING_MAX_PARTNERS = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_TIMING_MAX_PARTNERS',
+    20
+)
+
+OTHER_PARTNERS = 'other'
+
+PARSE = 'parse'
+ALLOCATE = 'allocate'
+TASK_PARAMETERS = 'task_parameters'
+RULE = 'rule'
+RENDER = 'render'
+TOTAL = 'total'
+
+
+class LatencyHistogram:
+    """
+    Counts latencies into fixed buckets so the memory used does not grow
+    with the number of requests.  Percentiles are estimated as the upper
+    bound of the bucket they fall in.
+    """
+    __slots__ = ('bounds', 'buckets', 'count', 'total', 'max')
+
+    def __init__(self, bounds=TIMING_BUCKETS):
+        '''
+        :param bounds: The ascending upper bounds of the buckets in
+            milliseconds.  Latencies above the last bound are counted in an
+            overflow bucket.
+        '''
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        '''
+        :param seconds: The latency to count.
+        :return: None
+        '''
+        ms = seconds * 1000
+        self.buckets[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction: float):
+        '''
+        :param fraction: The percentile as a fraction, e.g. .95.
+        :return: The upper bound of the bucket holding the percentile in
+            milliseconds, the maximum if it is in the overflow bucket or
+            None if nothing has been counted.
+        '''
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        buckets = {str(bound): count for bound, count
+                   in zip(self.bounds, self.buckets)}
+        buckets['+Inf'] = self.buckets[-1]
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else None,
+            'max_ms': round(self.max, 3),
+            'p50_ms': self.percentile(.5),
+            'p95_ms': self.percentile(.95),
+            'p99_ms': self.percentile(.99),
+            'buckets': buckets,
+        }
+
+
+class PoolTimings:
+    """
+    The request counts and per-phase latency histograms of one pool on one
+    endpoint.
+    """
+
+    def __init__(self, max_partners: int = TIMING_MAX_PARTNERS):
+        '''
+        :param max_partners: The number of partners counted separately.
+            The partner names come from the requests, so any past this
+            are counted together.
+        '''
+        self.max_partners = max_partners
+        self.requests = 0
+        self.errors = 0
+        self.numbers = 0
+        self.partners = {}
+        self.phases = {}
+
+    def record(self, phases: dict, size: int = 0, error: bool = False,
+               partner: str = None):
+        self.requests += 1
+        self.numbers += size
+        if error:
+            self.errors += 1
+        if partner:
+            if partner not in self.partners and \
+                len(self.partners) >= self.max_partners:
+                partner = OTHER_PARTNERS
+            self.partners[partner] = self.partners.get(partner, 0) + 1
+        self.record_phases(phases)
+
+    def record_phases(self, phases: dict):
+        for phase, seconds in phases.items():
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'numbers': self.numbers,
+            'partners': dict(self.partners),
+            'phases': {phase: histogram.as_dict()
+                       for phase, histogram in self.phases.items()},
+        }
+
+
+class RequestTimings:
+    """
+    The per process registry of number range request timings by endpoint
+    and pool.
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint: str, pool: str) -> PoolTimings:
+        pools = self._endpoints.setdefault(endpoint, {})
+        timings = pools.get(pool)
+        if timings is None:
+            timings = pools[pool] = PoolTimings()
+        return timings
+
+    def record(self, endpoint: str, pool: str, phases: dict, size: int = 0,
+               error: bool = False, partner: str = None):
+        '''
+        Records a request.
+        :param endpoint: The name of the endpoint.
+        :param pool: The machine name of the pool or '' if it is not known
+            or does not exist.
+        :param phases: The seconds spent in each phase by phase name.
+        :param size: The number of serial numbers requested.
+        :param error: Whether the response was an error.
+        :param partner: The sending system or location of the request.
+        :return: None
+        '''
+        with self._lock:
+            self._get(endpoint, pool).record(phases, size, error, partner)
+
+    def record_phases(self, endpoint: str, pool: str, phases: dict):
+        '''
+        Records phases of a request that has already been recorded, such as
+        rendering a streamed response.
+        '''
+        with self._lock:
+            self._get(endpoint, pool).record_phases(phases)
+
+    def snapshot(self) -> dict:
+        '''
+        :return: The timings as a JSON serializable dictionary of endpoints,
+            each a dictionary of pools.
+        '''
+        with self._lock:
+            return {
+                endpoint: {pool: timings.as_dict()
+                           for pool, timings in pools.items()}
+                for endpoint, pools in self._endpoints.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+_timings = RequestTimings()
+
+
+def get_timings() -> RequestTimings:
+    return _timings
+
+
+class RequestTiming:
+    """
+    The phases measured for a single request.
+    """
+    __slots__ = ('start', 'phases', 'pool', 'size', 'marks')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.pool = None
+        self.size = 0
+        self.marks = {}
+
+
+class TimingMixin:
+    """
+    Mix into a number range view, ahead of the other mixins and the
+    serialbox AllocateView, to record how long each POST spends in
+
+    * parse: parsing the request, timed by the view with `timed`,
+    * allocate: allocating the numbers in serialbox,
+    * task_parameters: creating the response rule task,
+    * rule: executing the response rule, which includes rendering the
+      response unless it is streamed,
+    * render: sending a streamed response and
+    * total: the whole request up to the response being returned,
+
+    by view and pool.  The timings are served by the NumberRangeTimingView.
+    Requests whose pool was not allocated from, such as requests for a pool
+    that does not exist, are recorded without a pool so the pool names sent
+    by clients can not grow the timings.
+    """
+    # the endpoint name the timings are recorded under, defaults to the
+    # name of the view class
+    timing_name = None
+
+    def get_timing_name(self) -> str:
+        return self.timing_name or type(self).__name__
+
+    def get_timing_partner(self):
+        '''
+        :return: The system or location the request came from, if the view
+            knows it.
+        '''
+        return getattr(self, 'sending_system', None) or \
+            getattr(self, 'location_name', None)
+
+    @contextmanager
+    def timed(self, phase: str):
+        '''
+        Adds the time spent in the block to a phase of the current request.
+        :param phase: The name of the phase.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = getattr(self, 'timing', None)
+            if timing is not None:
+                timing.phases[phase] = timing.phases.get(phase, 0) + \
+                    time.perf_counter() - start
+
+    def dispatch(self, request, *args, **kwargs):
+        self.timing = RequestTiming()
+        response = super().dispatch(request, *args, **kwargs)
+        if TIMING_ENABLED and request.method == 'POST':
+            try:
+                self.record_timing(response)
+            except Exception:
+                logger.exception('Could not record the number range '
+                                 'request timings.')
+        return response
+
+    def record_timing(self, response):
+        timing = self.timing
+        timing.phases[TOTAL] = time.perf_counter() - timing.start
+        endpoint = self.get_timing_name()
+        pool = timing.pool or ''
+        get_timings().record(
+            endpoint, pool, timing.phases, timing.size,
+            error=response.status_code >= 400,
+            partner=self.get_timing_partner()
+        )
+        if getattr(response, 'streaming', False):
+            response.streaming_content = self._timed_stream(
+                response.streaming_content, endpoint, pool)
+
+    def _timed_stream(self, content, endpoint, pool):
+        elapsed = 0.0
+        chunks = iter(content)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield chunk
+        finally:
+            get_timings().record_phases(endpoint, pool, {RENDER: elapsed})
+
+    def get(self, request, pool=None, size=None, region=None):
+        timing = getattr(self, 'timing', None)
+        if timing is None or not pool:
+            return super().get(request, pool, size, region)
+        try:
+            timing.size = int(size)
+        except (TypeError, ValueError):
+            pass
+        start = time.perf_counter()
+        try:
+            ret = super().get(request, pool, size, region)
+            # serialbox found the pool and allocated from it
+            timing.pool = pool
+            return ret
+        finally:
+            end = time.perf_counter()
+            marks = timing.marks
+            if 'task' in marks:
+                task_start, task_end = marks['task']
+                timing.phases[ALLOCATE] = task_start - start
+                timing.phases[TASK_PARAMETERS] = task_end - task_start
+                timing.phases[RULE] = end - task_end
+            else:
+                timing.phases[ALLOCATE] = end - start
+
+    def _set_task_parameters(self, pool, region, response_rule, size, request):
+        start = time.perf_counter()
+        ret = super()._set_task_parameters(pool, region, response_rule, size,
+                                           request)
+        timing = getattr(self, 'timing', None)
+        if timing is not None:
+            timing.marks['task'] = (start, time.perf_counter())
+            # the numbers were allocated, a failing response rule is
+            # recorded under the pool
+            timing.pool = pool
+        return ret
@@ -14,10 +14,13 @@
 # Copyright 2020 SerialLab Corp.  All rights reserved.
 
 from django.urls import re_path
-from quartet_integrations.generic.views import LoggingView
+from quartet_integrations.generic.views import LoggingView, \
+    NumberRangeTimingView
 
 app_name = "quartet_integrations"
 
 urlpatterns = [
     re_path(r"debugging/requestlogger/?", LoggingView.as_view(), name="requestLogger"),
+    re_path(r"debugging/numberrange/timings/?",
+            NumberRangeTimingView.as_view(), name="numberRangeTimings"),
 ]
@@ -14,15 +14,18 @@
 # Copyright 2020 SerialLab Corp.  All rights reserved.
 from os import path
 from django.conf import settings
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.status import HTTP_204_NO_CONTENT
 from rest_framework.views import APIView
 from rest_framework_xml.renderers import XMLRenderer
 from rest_framework.parsers import JSONParser
 from quartet_capture.parsers import RawParser
 import json
 from quartet_capture.models import Task
+from quartet_integrations.generic.timing import get_timings
 
 class TaskXMLRenderer(XMLRenderer):
 
@@ -63,3 +66,25 @@ Request Body:
         log_file = path.join(settings.LOGGING_PATH, 'requests.txt')
         with open(log_file, "w+") as f:
             f.write(raw_request)
+
+
+class NumberRangeTimingView(APIView):
+    """
+    Returns the request counts and per-phase latency histograms the number
+    range views have recorded in this process, by view and pool.  A DELETE
+    by a staff user clears them.
+    """
+    renderer_classes = [JSONRenderer]
+    queryset = Task.objects.all()
+
+    def get_permissions(self):
+        if self.request.method == 'DELETE':
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    def get(self, request):
+        return Response(get_timings().snapshot())
+
+    def delete(self, request):
+        get_timings().clear()
+        return Response(status=HTTP_204_NO_CONTENT)
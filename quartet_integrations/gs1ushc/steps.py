@@ -26,6 +26,8 @@ from quartet_capture import rules, models
 from quartet_capture.rules import RuleContext
 from quartet_integrations.frequentz.environment import get_default_environment
 from quartet_integrations.generic import mixins
+from quartet_integrations.generic.hierarchy_cache import \
+    HierarchyCacheInvalidationMixin
 from quartet_integrations.gs1ushc.parsing import SimpleOutputParser, \
     BusinessOutputParser
 from quartet_masterdata.models import Company, Location, TradeItem
@@ -57,7 +59,16 @@ class ContextKeys(Enum):
     SENDER_COMPANY = 'SENDER_COMPANY'
 
 
-class OutputParsingStep(mixins.ObserveChildrenMixin, QOPS):
+class OutputParsingStep(HierarchyCacheInvalidationMixin,
+                        mixins.ObserveChildrenMixin, QOPS):
+
+    def get_message_ids(self, rule_context: RuleContext) -> list:
+        """
+        The base step does not put the message id on the context, it is
+        read from the parser the base step keeps.
+        """
+        message = getattr(self.parser, '_message', None)
+        return [message.id] if message is not None else []
 
     def get_parser_type(self, *args):
         """
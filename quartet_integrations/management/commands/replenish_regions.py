@@ -0,0 +1,61 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+
+from django.core.management import base
+from list_based_flavorpack.models import ListBasedRegion
+
+from quartet_integrations.generic.replenishment import \
+    ReplenishmentScheduler, REPLENISHMENT_CONCURRENCY
+
+
+class Command(base.BaseCommand):
+    help = 'Replenishes list based regions from their third party systems ' \
+           'in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('machine_names', nargs='*',
+                            help='The machine names of the regions to '
+                                 'replenish.  All active regions with a '
+                                 'rule are replenished if none are given.')
+        parser.add_argument('--size', type=int, default=0,
+                            help='The minimum number of numbers to request '
+                                 'per region.')
+        parser.add_argument('--concurrency', type=int,
+                            default=REPLENISHMENT_CONCURRENCY,
+                            help='The maximum number of parallel requests '
+                                 'per end point.')
+
+    def handle(self, *args, **options):
+        regions = ListBasedRegion.objects.filter(
+            active=True, rule__isnull=False
+        ).select_related('pool', 'rule', 'template', 'end_point',
+                         'authentication_info')
+        if options['machine_names']:
+            regions = regions.filter(
+                machine_name__in=options['machine_names'])
+        scheduler = ReplenishmentScheduler(
+            concurrency=options['concurrency'])
+        failed = False
+        for result in scheduler.replenish(regions, options['size']):
+            if result.succeeded:
+                self.stdout.write('%s: %d numbers in %.3f seconds' % (
+                    result.machine_name, result.count, result.latency))
+            else:
+                failed = True
+                self.stderr.write('%s: failed after %.3f seconds: %s' % (
+                    result.machine_name, result.latency, result.error))
+        if failed:
+            raise base.CommandError('One or more regions could not be '
+                                    'replenished.')
@@ -16,6 +16,7 @@ from gs123.conversion import BarcodeConverter
 from quartet_capture.rules import Step, RuleContext
 from quartet_integrations.serialbox.steps import \
     ListToUrnConversionStep as SBLTU
+from quartet_integrations.serialbox.urns import UrnSequence
 
 
 class ListToUrnConversionStep(SBLTU):
@@ -23,6 +24,13 @@ class ListToUrnConversionStep(SBLTU):
     Converts serialbox lists to OPSM URNs using the data in the result.
     """
 
+    def format_gtin_urns(self, company_prefix: str, indicator: str,
+                         item_reference: str, numbers):
+        return UrnSequence(
+            '0.%s.%s%s.' % (company_prefix, indicator, item_reference),
+            numbers
+        )
+
     def format_gtin_urn(self, company_prefix: str, indicator: str,
                         item_reference: str, serial_number: str):
         return '0.%s.%s%s.%s' % (
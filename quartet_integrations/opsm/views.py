@@ -30,14 +30,44 @@ from serialbox.api.views import AllocateView
 
 logger = getLogger(__name__)
 
+from quartet_integrations.generic.prefetch import PreFetchMixin
+from quartet_integrations.generic.soap import SOAP_NS, SoapFields, \
+    parse_request
+from quartet_integrations.generic.streaming import StreamingResponseMixin
+from quartet_integrations.generic.task_parameters import \
+    BulkTaskParameterMixin
+from quartet_integrations.generic.timing import PARSE, TimingMixin
 from quartet_integrations.rocit.views import DefaultXMLContent
 
-
-class OPSMNumberRangeView(AllocateView):
+NAMESPACES = {
+    'soapenv': SOAP_NS,
+    'typ': 'http://xmlns.oracle.com/apps/pas/transactions/transactionsService/applicationModule/common/types/',
+    'com': 'http://xmlns.oracle.com/apps/pas/transactions/transactionsService/view/common/',
+    'wsse': 'http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-secext-1.0.xsd'
+}
+
+_TOKEN = '//soapenv:Header/wsse:Security/wsse:UsernameToken/'
+_REQUEST = '//soapenv:Body/typ:createProcessSerialGenerationRequest/' \
+           'typ:serialGenerationRequest/'
+
+# the fields of a serial generation request, compiled once
+REQUEST_FIELDS = SoapFields({
+    'username': _TOKEN + 'wsse:Username',
+    'password': _TOKEN + 'wsse:Password',
+    'location': _REQUEST + 'com:Location',
+    'count': _REQUEST + 'com:SerialQuantity',
+    'gtin': _REQUEST + 'com:Gtin',
+}, NAMESPACES)
+
+
+class OPSMNumberRangeView(TimingMixin, StreamingResponseMixin,
+                          PreFetchMixin, BulkTaskParameterMixin,
+                          AllocateView):
     """
     Accepts an inbound request from an external system that thinks it's talking
     to an Oracle OPSM EPCIS 1.0 system.  This is basically part of an OPSM
-    emulation layer.
+    emulation layer.  Response rules that render with the
+    StreamingTemplateStep are streamed.
     """
     content_negotiation_class = DefaultXMLContent
 
@@ -60,47 +90,20 @@ class OPSMNumberRangeView(AllocateView):
             raise AuthenticationFailed('Username/password invalid.')
 
     def post(self, request):
-        count = None
-        gtin = None
-        xpath_prefix = '//soapenv:Body/typ:createProcessSerialGenerationRequest/typ:serialGenerationRequest/'
-        namespaces = {
-            'soapenv': 'http://schemas.xmlsoap.org/soap/envelope/',
-            'typ': 'http://xmlns.oracle.com/apps/pas/transactions/transactionsService/applicationModule/common/types/',
-            'com': 'http://xmlns.oracle.com/apps/pas/transactions/transactionsService/view/common/',
-            'wsse': 'http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-secext-1.0.xsd'
-        }
-
         try:
-            root = etree.fromstring(request.body)
-            username = root.xpath(
-                '//soapenv:Header/wsse:Security/wsse:UsernameToken/wsse:Username',
-                namespaces=namespaces
-            )[0].text
-            password = root.xpath(
-                '//soapenv:Header/wsse:Security/wsse:UsernameToken/wsse:Password',
-                namespaces=namespaces
-            )[0].text
-            self.auth_user(username, password)
-            pool_result = root.xpath('%scom:Location' % xpath_prefix,
-                                     namespaces=namespaces)
-            if len(pool_result) > 0:
-                self.location_name = pool_result[0].text
-                pool = pool_result[0].text
-
-            # TODO: Handle exception
-            count_result = root.xpath('%scom:SerialQuantity' % xpath_prefix,
-                                      namespaces=namespaces)
-            if len(count_result) > 0:
-                count = count_result[0].text
-            gtin_result = root.xpath('%scom:Gtin' % xpath_prefix,
-                                     namespaces=namespaces)
-            if len(gtin_result) > 0:
-                gtin = gtin_result[0].text
-
-            if gtin:
-                pool = gtin
-
-            ret = super().get(request, pool, count)
+            with self.timed(PARSE):
+                values = self.parse_request(request.body)
+                self.location_name = values['location']
+                count = values['count']
+                pool = values['gtin'] or values['location']
+            self.auth_user(values['username'], values['password'])
+            if pool:
+                ret = super().get(request, pool, count)
+            else:
+                ret = Response('One of the values (SerialQuantity, '
+                               'Location, or Gtin) were missing from the '
+                               'message and/or improper namespaces were '
+                               'supplied.')
         except ObjectDoesNotExist as e:
             ret = Response(
                 'An item that was expected to be '
@@ -119,23 +122,26 @@ class OPSMNumberRangeView(AllocateView):
             ret = Response('The submitted data was either not XML '
                            'or it was malformed and unable to process: %s' %
                            str(e))
-        except UnboundLocalError as e:
-            ret = Response('One of the values (SerialQuantity, Location, or '
-                           'Gtin) were missing from the message and/or '
-                           'improper namespaces were supplied.')
         return ret
 
-    def _set_task_parameters(self, pool, region, response_rule, size, request):
-        db_task = super()._set_task_parameters(pool, region, response_rule,
-                                               size,
-                                               request)
-        tp = TaskParameter.objects.create(
-            task=db_task,
+    def parse_request(self, body: bytes) -> dict:
+        """
+        Reads the credentials, location, quantity and GTIN of a serial
+        generation request.
+        :param body: The raw request body.
+        :return: The username, password, location, count and gtin, each
+            None if it was not in the request.
+        """
+        return REQUEST_FIELDS.extract(parse_request(body))
+
+    def get_task_parameters(self, pool, region, size, request):
+        ret = super().get_task_parameters(pool, region, size, request)
+        ret.append(TaskParameter(
             name='location_name',
             value=self.location_name,
             description='The name of the location passed in the request.'
-        )
-        return db_task
+        ))
+        return ret
 
 
 class CaptureInterface(capture_views.CaptureInterface):
@@ -15,7 +15,8 @@
 from datetime import datetime
 
 from jinja2.environment import Environment
-from jinja2.loaders import ChoiceLoader, PackageLoader
+
+from quartet_integrations.environment import get_environment
 
 from EPCPyYes.core.v1_2 import template_events
 from EPCPyYes.core.v1_2.events import ErrorDeclaration, Action
@@ -29,17 +30,11 @@ def get_default_environment():
 
     :return: The defualt Jinja2 environment for this package.
     '''
-    loader = ChoiceLoader(
-        [
-            PackageLoader('EPCPyYes', 'templates'),
-            PackageLoader('quartet_integrations', 'templates'),
-            PackageLoader('quartet_tracelink', 'templates')
-        ]
+    return get_environment(
+        'EPCPyYes',
+        'quartet_integrations',
+        'quartet_tracelink'
     )
-    env = Environment(loader=loader,
-                      extensions=['jinja2.ext.with_'], trim_blocks=True,
-                      lstrip_blocks=True)
-    return env
 
 
 class ObjectEvent(template_events.ObjectEvent):
@@ -29,6 +29,7 @@ from logging import getLogger
 from quartet_capture.rules import RuleContext
 from quartet_epcis.models import choices
 from quartet_epcis.parsing.context_parser import BusinessEPCISParser
+from quartet_integrations.generic.parse_result import ParseResult
 from quartet_integrations.gs1ushc import mixins
 from quartet_integrations.optel.epcpyyes import get_default_environment
 from quartet_output.parsing import BusinessOutputParser
@@ -241,3 +242,14 @@ class OptelCompactV2Parser(BusinessEPCISParser):
             if not self.lot_number:
                 for ilmd in epcis_event.ilmd:
                     if 'lotNumber' in ilmd.name: self.lot_number = ilmd.value
+
+    def get_parse_result(self) -> ParseResult:
+        '''
+        Returns the SSCCs, lot number and GTIN of the eaches found in the
+        commissioning events.  Only call after parse() is called.
+        '''
+        return ParseResult(
+            sscc_list=self.ssccs,
+            lot_number=self.lot_number or '',
+            gtin=self.gtin or ''
+        )
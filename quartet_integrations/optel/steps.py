@@ -18,6 +18,7 @@ from enum import Enum
 from gs123.conversion import URNConverter
 from quartet_capture import models
 from quartet_capture.rules import RuleContext, Step
+from quartet_integrations.generic.parse_result import PARSE_RESULT_KEY
 from quartet_integrations.optel.epcpyyes import get_default_environment
 from quartet_integrations.optel.parsing import OptelEPCISLegacyParser, \
     ConsolidationParser, OptelAutoShipParser, OptelCompactV2Parser
@@ -267,6 +268,7 @@ class OptelCompactV2ParsingStep(SAPParsingStep):
             'EPCIS Output Criteria', raise_exception=True)
         self.skip_parsing = self.get_boolean_parameter('Skip Parsing', False)
         self.trade_items = None
+        self.parse_result = None
 
     def _parse(self, data):
         parser = OptelCompactV2Parser(
@@ -280,6 +282,7 @@ class OptelCompactV2ParsingStep(SAPParsingStep):
         self.ssccs = parser.ssccs
         self.gtin = parser.gtin
         self.trade_items = parser.trade_item_list
+        self.parse_result = parser.get_parse_result()
         return ret
     
     def append_to_rule_context(self, rule_context):
@@ -301,6 +304,7 @@ class OptelCompactV2ParsingStep(SAPParsingStep):
         rule_context.context[
             ContextKeys.TRADE_ITEMS_MASTERDATA.value
         ] = self.trade_items
+        rule_context.context[PARSE_RESULT_KEY] = self.parse_result
 
     def execute(self, data, rule_context: RuleContext):
         super().execute(data, rule_context)
@@ -12,23 +12,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 # Copyright 2019 SerialLab Corp.  All rights reserved.
-import io, os
+import io
 import copy
 import datetime
 import random
 import time
 import sqlite3
-import requests
 from django.utils.translation import gettext as _
 from xml.etree import ElementTree
 from requests.auth import HTTPBasicAuth, HTTPProxyAuth
-from list_based_flavorpack.processing_classes.third_party_processing.rules import \
-    get_region_table
 from EPCPyYes.core.v1_2 import template_events
 from quartet_capture import models, rules, errors as capture_errors
 from quartet_capture.rules import RuleContext
 from quartet_output.transport.http import HttpTransportMixin
 from quartet_integrations.frequentz.environment import get_default_environment
+from quartet_integrations.generic.region_store import RegionNumberStore
+from quartet_integrations.generic.sessions import get_session
 from quartet_masterdata.models import TradeItem, Location, Company
 from list_based_flavorpack.models import ListBasedRegion
 from serialbox import models as sb_models
@@ -260,7 +259,8 @@ class PharmaSecureNumberRequestTransportStep(rules.Step, HttpTransportMixin):
         :return: The response.
         '''
 
-        response = requests.post(
+        response = get_session(region.end_point,
+                               region.authentication_info).post(
             region.end_point.urn,
             data,
             auth=self.get_auth(region),
@@ -448,32 +448,14 @@ class PharmaSecureNumberRequestProcessStep(rules.Step):
 
     def write_list(self, serial_numbers, region: ListBasedRegion):
         start = time.time()
-        if not os.path.exists(region.db_file_path):
-            connection = sqlite3.connect(region.db_file_path)
-            connection.execute(
-                "create table if not exists %s "
-                "(serial_number text not null unique, used integer not null)"
-                % get_region_table(region)
-            )
-        else:
-            connection = sqlite3.connect(region.db_file_path)
-
-        cursor = connection.cursor()
-        cursor.execute('begin transaction')
         self.info('storing the numbers. {0}'.format(region.db_file_path))
-        for serial_number in serial_numbers:
+        with RegionNumberStore(region) as store:
             try:
-                cursor.execute('insert into %s (serial_number, used) values '
-                               '(?, ?)' % get_region_table(region),
-                               (serial_number, 0))
+                store.write(serial_numbers)
             except sqlite3.IntegrityError:
-                self.error('Duplicate serial number found: %s', serial_number)
-                connection.rollback()
-                raise
-            except:
-                connection.rollback()
+                self.error('Duplicate serial number found: %s',
+                           store.current)
                 raise
-        connection.commit()
         s = ","
         self.info('Saved Serial Numbers. {0}'.format(s.join(serial_numbers)))
         self.info("Execution time: %.3f seconds." % (time.time() - start))
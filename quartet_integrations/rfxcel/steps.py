@@ -13,20 +13,27 @@
 #
 # Copyright 2018 SerialLab Corp.  All rights reserved.
 import abc
-import os
 import sqlite3
 import time
 from lxml import etree
 from list_based_flavorpack.models import ListBasedRegion
 from quartet_capture.rules import RuleContext, Step
+from quartet_integrations.generic.number_response import \
+    SerialNumberExtractor
+from quartet_integrations.generic.region_store import RegionNumberStore
 from quartet_integrations.rfxcel.environment import get_default_environment
+from quartet_integrations.serialbox.metadata import SEQUENTIAL, \
+    get_pool_metadata
+from quartet_integrations.serialbox.ranges import NumberRange
 from quartet_output.steps import ContextKeys, EPCPyYesOutputStep
 from EPCPyYes.core.v1_2 import template_events
 from quartet_capture import models
-from list_based_flavorpack.processing_classes.third_party_processing.rules import \
-    get_region_table
 from quartet_capture.models import Task, TaskParameter
-from serialbox.models import Pool, SequentialRegion
+from serialbox.models import SequentialRegion
+
+# the idList element of an rfXcel number response and its children
+ID_LIST = '{http://xmlns.rfxcel.com/traceability/identifier/3}idList'
+ID_LIST_PATH = './/%s/*' % ID_LIST
 
 
 class RFExcelOutputStep(EPCPyYesOutputStep):
@@ -202,44 +209,34 @@ class RFXCELNumberResponseParserStep(Step):
 
         region = ListBasedRegion.objects.get(machine_name=param.value)
         try:
-            root = etree.fromstring(rule_context.context["NUMBER_RESPONSE"])
-            id_list = root.find(
-                './/{http://xmlns.rfxcel.com/traceability/identifier/3}idList')
-
-            numbers = []
-
-            for urn in id_list:
-                # store the serial numbers in the array
-                if "sgtin" in urn.text:
-                    numbers.append(urn.text.split('.')[2])
-                if "sscc" in urn.text:
-                    sn = urn.text.split(":")[4].split('.')[1][1:]
-                    numbers.append(sn)
-
-            if not os.path.exists(region.db_file_path):
-                connection = sqlite3.connect(region.db_file_path)
-                connection.execute(
-                    "create table if not exists %s "
-                    "(serial_number text not null unique, used integer not null)"
-                    % get_region_table(region)
-                )
-            else:
-                connection = sqlite3.connect(region.db_file_path)
+            # a fault or a response without an idList raises once it has
+            # been read
+            numbers = self.get_serial_numbers(SerialNumberExtractor(
+                rule_context.context["NUMBER_RESPONSE"], ID_LIST_PATH,
+                required=[ID_LIST]))
 
             start = time.time()
-            cursor = connection.cursor()
-            cursor.execute('begin transaction')
             self.info('storing the numbers. {0}'.format(region.db_file_path))
-            for id in numbers:
-                cursor.execute('insert into %s (serial_number, used) values '
-                               '(?, ?)' % get_region_table(region), (id, 0))
-            connection.commit()
+            with RegionNumberStore(region) as store:
+                store.write(numbers)
             self.info("Execution time: %.3f seconds." % (time.time() - start))
         except:
             self.info("Error while processing response: %s",
                       rule_context.context["NUMBER_RESPONSE"])
             raise
 
+    def get_serial_numbers(self, urns):
+        '''
+        Converts the URNs in the idList of the response to serial numbers.
+        :param urns: An iterable of the sgtin and sscc URN strings.
+        :return: A generator of serial numbers.
+        '''
+        for urn in urns:
+            if "sgtin" in urn:
+                yield urn.split('.')[2]
+            if "sscc" in urn:
+                yield urn.split(":")[4].split('.')[1][1:]
+
     def on_failure(self):
         super().on_failure()
 
@@ -266,13 +263,19 @@ class SerialboxSSCCConversionStep(Step):
             'If set to true URNs will be created, if false '
             'the "packaging line" format will be used'
         ).lower() == 'true'
+        lazy_lists = self.get_or_create_parameter(
+            'Lazy Lists', 'False',
+            'If set to true sequential ranges are returned as a NumberRange '
+            'that formats each number when it is read instead of a list.  '
+            'Use this when a template step renders the response.'
+        ).lower() == 'true'
         db_task = Task.objects.get(name=rule_context.task_name)
         self.info('Executing against pool ')
         machine_name = db_task.taskparameter_set.get(name='pool').value
         self.info('Executing against pool %s.', machine_name)
         # the first digit of the machine name is the extension digit
-        is_sequential = Pool.objects.get(
-            machine_name=machine_name).sequentialregion_set.count() != 0
+        is_sequential = get_pool_metadata(
+            machine_name).region_type == SEQUENTIAL
 
         self.info('Is sequential? %s', is_sequential)
         # the length of the company prefix is available
@@ -281,30 +284,32 @@ class SerialboxSSCCConversionStep(Step):
         num_len = 16 - cp_len
         self.info('Number length = %s', num_len)
         # if sequential you need to create a list
-        if is_sequential:
-            if len(data) > 1:
-                data = [str(num).zfill(num_len) for num in range(data[0], data[1])]
-            else:
-                data = [str(num).zfill(num_len) for num in data]
+        if is_sequential and len(data) > 1:
+            data = NumberRange(data[0], data[1] - 1).format(
+                ('%%0%dd' % num_len).__mod__)
         else:
             data = [str(num).zfill(num_len) for num in data]
         if create_urns:
             data = self.convert_numbers_to_urn(data, machine_name)
+        if isinstance(data, NumberRange) and not lazy_lists:
+            data = list(data)
         return data
 
     def convert_numbers_to_urn(self, data: list, machine_name: str):
         """
         Converts the serial-numbers to URNs if the Create URN step
         parameter is set.
-        :param data: The serial numbers
+        :param data: The serial numbers, a list or NumberRange.
         :param machine_name: The machine name of the pool
-        :return: A list of urns.
+        :return: A list of urns, or a NumberRange formatting them.
         """
         # get the company prefix and extension digit from the machine name
         company_prefix = machine_name[1:]
         extension_digit = machine_name[:1]
-        return ['urn:epc:id:sscc:%s.%s%s' %
-                (company_prefix, extension_digit, d) for d in data]
+        prefix = 'urn:epc:id:sscc:%s.%s' % (company_prefix, extension_digit)
+        if isinstance(data, NumberRange):
+            return data.format(prefix.__add__)
+        return [prefix + d for d in data]
 
     def on_failure(self):
         super().on_failure()
@@ -312,4 +317,7 @@ class SerialboxSSCCConversionStep(Step):
     @property
     def declared_parameters(self):
         return {'Create URNs': 'If set to true URNs will be created, if false '
-                               'the "packaging line" format will be used'}
+                               'the "packaging line" format will be used',
+                'Lazy Lists': 'If set to true sequential ranges are returned '
+                              'as a NumberRange that formats each number '
+                              'when it is read.'}
@@ -16,14 +16,19 @@ import traceback
 import logging
 import uuid
 import random
+from collections import defaultdict
 from logging import getLogger
+from django.conf import settings
+from django.db import connection
 from rest_framework import status
 from rest_framework.response import Response
 from EPCPyYes.core.v1_2 import helpers
 from quartet_epcis.db_api.queries import EPCISDBProxy
 from quartet_epcis.models import events, entries, headers
 from quartet_masterdata.models import TradeItem, TradeItemField
+from quartet_integrations.generic.hierarchy_cache import get_hierarchy_cache
 from gs123 import check_digit
+from gs123.conversion import URNConverter
 from enum import Enum
 
 status_dict = {
@@ -36,6 +41,67 @@ status_dict = {
 
 logger = getLogger(__name__)
 
+# the number of levels below the requested tag a packaging hierarchy may have
+ROCIT_MAX_HIERARCHY_DEPTH = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_ROCIT_MAX_HIERARCHY_DEPTH',
+    10
+)
+
+# the number of entries below the requested tag a packaging hierarchy may have
+ROCIT_MAX_HIERARCHY_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_ROCIT_MAX_HIERARCHY_SIZE',
+    100000
+)
+
+# whether hierarchies are read with a single recursive query on the databases
+# that support them (PostgreSQL and SQLite) instead of a query per level.
+ROCIT_RECURSIVE_QUERIES = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_ROCIT_RECURSIVE_QUERIES',
+    True
+)
+
+# the number of parents a level of a hierarchy is queried for at a time when
+# it is not read with a recursive query
+ROCIT_HIERARCHY_BATCH_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_ROCIT_HIERARCHY_BATCH_SIZE',
+    1000
+)
+
+# the number of saleable units whose events are searched for the lot,
+# expiry, unit of measure and product of a packaging hierarchy
+ROCIT_ILMD_SAMPLE_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_ROCIT_ILMD_SAMPLE_SIZE',
+    100
+)
+
+# the ILMD names read for each field of the product information
+_ILMD_FIELDS = {
+    'lotNumber': 'lot',
+    'itemExpirationDate': 'expiry',
+    'measurementUnitCode': 'uom',
+    'additionalTradeItemIdentification': 'product',
+}
+
+_HIERARCHY_QUERY = '''
+WITH RECURSIVE hierarchy (root, id, parent, identifier, created, depth)
+AS (
+    SELECT {identifier}, {id}, {parent}, {identifier}, {created}, 0
+    FROM {table} WHERE {identifier} IN ({roots})
+    UNION ALL
+    SELECT h.root, e.{id}, e.{parent}, e.{identifier}, e.{created},
+        h.depth + 1
+    FROM {table} e JOIN hierarchy h ON e.{parent} = h.id
+    WHERE e.{decommissioned} = %s AND h.depth <= %s
+)
+SELECT root, id, parent, identifier, created, depth FROM hierarchy LIMIT %s
+'''
+
+
 class RocItQuery():
 
     @staticmethod
@@ -52,7 +118,6 @@ class RocItQuery():
         document_type = "RECADV"
         child_tag_count = 0
         child_tags = []
-        saleable_units = []
         send_children = (
                 send_children is not None and send_children.lower() == 'true')
 
@@ -66,61 +131,25 @@ class RocItQuery():
             entry = entries.Entry.objects.get(identifier=tag_id)
 
         parent_tag = entry.parent_id if entry.parent_id else None
-        try:
-            status = entry.last_disposition.split(':')[4].upper()
-        except:
-            logger.info('An unexpected status or state was set.')
-            # disposition may not have been sent in the EPCIS Doc, ignore
-            status = 'ACTIVE'
+        status = RocItQuery.get_status(entry.last_disposition)
         state = status_dict[status]
 
         if send_children:
-            # The request is to return the children.
-            # get the direct children of the tag_id
-            children = query.get_epcs_by_parent_identifier(identifier=tag_id,
-                                                           select_for_update=False)
-            child_tag_count = len(children)
-            # go through the direct children identifers and collect the lowest saleable units
-            for child in children:
-                # retrieve the lowest saleable unit from the child
-                saleable_units += RocItQuery.get_lowest_saleable_units(query,
-                                                                       child)
-                # add child to child_tags
-                child_tags.append(child)
-
-            if len(saleable_units) == 0:
-                # if no saleable_units where located then the searched value, tag_id
-                # is a saleable_unit, add it to the salable_units list so the ILMD data
-                # can be located.
-                saleable_units.append(tag_id)
-
-            # The quantity is the saleable_units count
-            quantity = len(saleable_units)
-
-            # go through saleable_units to get the ILMD information
-            for id in saleable_units:
-                events = query.get_events_by_entry_identifer(
-                    entry_identifier=id)
-                for event in events:
-                    # look for ILMD info
-                    ilmds = query.get_ilmd(db_event=event.event)
-                    for ilmd in ilmds:
-                        if ilmd.name == 'itemExpirationDate':
-                            expiry = ilmd.value
-                        elif ilmd.name == 'lotNumber':
-                            lot = ilmd.value
-                        elif ilmd.name == 'additionalTradeItemIdentification':
-                            product = ilmd.value
-                        elif ilmd.name == 'measurementUnitCode':
-                            uom = ilmd.value
-                    # if uom, lot, expiry, and product have values, stop going through events
-                    if len(lot) > 0 and len(expiry) > 0 and len(
-                        uom) > 0 and len(product) > 0:
-                        break
-                # if uom, lot, expiry, and product have values, stop going through saleable_units
-                if len(lot) > 0 and len(expiry) > 0 and len(uom) > 0 and len(
-                    product) > 0:
-                    break
+            # The request is to return the children, the quantity and the
+            # product information, which are cached until the hierarchy
+            # below the tag_id changes
+            snapshot = get_hierarchy_cache().get(
+                tag_id, lambda: RocItQuery.get_packaging_snapshot(tag_id),
+                namespace='rocit', weigher=lambda snapshot: len(
+                    snapshot['child_tags']))
+            child_tags = list(snapshot['child_tags'])
+            child_tag_count = len(child_tags)
+            quantity = snapshot['quantity']
+            product_info = snapshot['product_info']
+            lot = product_info['lot']
+            expiry = product_info['expiry']
+            uom = product_info['uom']
+            product = product_info['product']
 
         # set up the template parameters
         ret_val = {
@@ -142,18 +171,415 @@ class RocItQuery():
 
         return ret_val
 
+    @staticmethod
+    def RetrievePackagingHierarchies(rows: list) -> list:
+        """
+        The batch form of RetrievePackagingHierarchy.  The entries of all the
+        tag ids are read with one query and the hierarchies and product
+        information that are not cached with one set of queries for all of
+        them.
+        :param rows: (tag id, send children, send product information)
+            tuples.
+        :return: A list with the template parameters of each row, in order.
+            The parameters of a tag id with no entry only have the tag_id
+            and found set to False.
+        """
+        tag_ids = [row[0] for row in rows]
+        found = {
+            identifier: (parent_tag, disposition) for
+            identifier, parent_tag, disposition in
+            entries.Entry.objects.filter(identifier__in=tag_ids).values_list(
+                'identifier', 'parent_id__identifier', 'last_disposition')
+        }
+        hierarchy_ids = [tag_id for tag_id, send_children, send_product_info
+                         in rows if tag_id in found and send_children and
+                         send_children.lower() == 'true']
+        snapshots = get_hierarchy_cache().get_many(
+            hierarchy_ids, RocItQuery.get_packaging_snapshots,
+            namespace='rocit', weigher=lambda snapshot: len(
+                snapshot['child_tags']))
+        ret_val = []
+        for tag_id, send_children, send_product_info in rows:
+            if tag_id not in found:
+                ret_val.append({'tag_id': tag_id, 'found': False})
+                continue
+            parent_tag, disposition = found[tag_id]
+            status = RocItQuery.get_status(disposition)
+            snapshot = snapshots.get(tag_id)
+            product_info = snapshot['product_info'] if snapshot else {}
+            ret_val.append({
+                "found": True,
+                "tag_id": tag_id,
+                "parent_tag": parent_tag,
+                "status": status,
+                "state": status_dict.get(status, ''),
+                "child_tag_count": len(snapshot['child_tags'])
+                if snapshot else 0,
+                "quantity": snapshot['quantity'] if snapshot else 0,
+                "child_tags": snapshot['child_tags'] if snapshot else [],
+                "expiry": product_info.get('expiry', ''),
+                "lot": product_info.get('lot', ''),
+                "uom": product_info.get('uom', ''),
+                "product": product_info.get('product', ''),
+            })
+        return ret_val
+
+    @staticmethod
+    def get_status(disposition: str) -> str:
+        """
+        :param disposition: The last disposition of an entry.
+        :return: The upper case name of the disposition or ACTIVE if there
+            is none.
+        """
+        try:
+            return disposition.split(':')[4].upper()
+        except:
+            logger.info('An unexpected status or state was set.')
+            # disposition may not have been sent in the EPCIS Doc, ignore
+            return 'ACTIVE'
+
+    @staticmethod
+    def get_packaging_snapshot(tag_id: str) -> dict:
+        """
+        Reads the part of a ROC IT response that depends on the packaging
+        hierarchy below the tag_id.
+        :param tag_id: The identifier of the EPC at the top.
+        :return: A dictionary with the direct child_tags, the quantity of
+            saleable units and the product_info of the saleable units.
+        """
+        hierarchy = RocItQuery.get_hierarchy([tag_id])
+        child_tags, saleable_units = RocItQuery._get_saleable_units(
+            hierarchy, tag_id)
+        return {
+            'child_tags': child_tags,
+            'quantity': len(saleable_units),
+            'product_info': RocItQuery.get_product_info(saleable_units),
+        }
+
+    @staticmethod
+    def get_packaging_snapshots(tag_ids: list) -> dict:
+        """
+        Reads the snapshots of get_packaging_snapshot for many tag ids with
+        one hierarchy query and one set of product information queries.
+        The tag ids may be below one another.
+        :param tag_ids: The identifiers of the EPCs at the top.
+        :return: A dictionary of the snapshots by tag id.
+        """
+        hierarchy = RocItQuery.get_hierarchy(tag_ids)
+        saleable_units = {}
+        ret_val = {}
+        for tag_id in tag_ids:
+            child_tags, saleable_units[tag_id] = \
+                RocItQuery._get_saleable_units(hierarchy, tag_id)
+            ret_val[tag_id] = {
+                'child_tags': child_tags,
+                'quantity': len(saleable_units[tag_id]),
+            }
+        for tag_id, product_info in RocItQuery.get_products_info(
+            saleable_units).items():
+            ret_val[tag_id]['product_info'] = product_info
+        return ret_val
+
+    @staticmethod
+    def _get_saleable_units(hierarchy: dict, tag_id: str):
+        """
+        :return: The direct children of the tag_id and the lowest saleable
+            units below them, or the tag_id if there are none.
+        """
+        child_tags = hierarchy.get(tag_id, [])
+        # go through the direct children identifers and collect the lowest
+        # saleable units
+        saleable_units = []
+        for child in child_tags:
+            saleable_units += RocItQuery.get_leaves(hierarchy, child)
+        if len(saleable_units) == 0:
+            # if no saleable_units where located then the searched value,
+            # tag_id is a saleable_unit, add it to the salable_units list so
+            # the ILMD data can be located.
+            saleable_units.append(tag_id)
+        return child_tags, saleable_units
+
+    @staticmethod
+    def get_product_info(saleable_units: list) -> dict:
+        """
+        Reads the lot, expiry, unit of measure and product of the saleable
+        units from the ILMD of the events of the first
+        QUARTET_INTEGRATIONS_ROCIT_ILMD_SAMPLE_SIZE units with a single
+        query.  Each value is taken from the earliest event that has it,
+        which is the commissioning event.  A missing product or unit of
+        measure is taken from the trade item of the first SGTIN.
+        :param saleable_units: The identifiers of the saleable units.
+        :return: A dictionary with the lot, expiry, uom and product, each
+            an empty string if it was not found.
+        """
+        ret_val = {field: '' for field in _ILMD_FIELDS.values()}
+        sample = list(saleable_units[:ROCIT_ILMD_SAMPLE_SIZE])
+        if not sample:
+            return ret_val
+        ilmds = events.InstanceLotMasterData.objects.filter(
+            name__in=_ILMD_FIELDS,
+            event__entryevent__identifier__in=sample
+        ).order_by('event__event_time', 'event_id').values_list(
+            'event__event_time', 'event_id', 'name', 'value').distinct()
+        for event_time, event_id, name, value in ilmds:
+            field = _ILMD_FIELDS[name]
+            if value and not ret_val[field]:
+                ret_val[field] = value
+        if not (ret_val['product'] and ret_val['uom']):
+            RocItQuery._set_trade_item_info({'': sample}, {'': ret_val})
+        return ret_val
+
+    @staticmethod
+    def get_products_info(saleable_units: dict) -> dict:
+        """
+        The batch form of get_product_info.  The events of the sampled units
+        of every key are read with one query (per
+        QUARTET_INTEGRATIONS_ROCIT_HIERARCHY_BATCH_SIZE units) and their ILMD
+        with another.
+        :param saleable_units: The identifiers of the saleable units by key,
+            e.g. the tag id they are below.
+        :return: A dictionary of the product information by key.
+        """
+        samples = {key: list(units[:ROCIT_ILMD_SAMPLE_SIZE])
+                   for key, units in saleable_units.items()}
+        ret_val = {key: {field: '' for field in _ILMD_FIELDS.values()}
+                   for key in samples}
+        identifiers = list(set().union(*samples.values()))
+        unit_events = defaultdict(set)
+        for i in range(0, len(identifiers), ROCIT_HIERARCHY_BATCH_SIZE):
+            for identifier, event_id in entries.EntryEvent.objects.filter(
+                identifier__in=identifiers[i:i + ROCIT_HIERARCHY_BATCH_SIZE],
+                event__instancelotmasterdata__name__in=_ILMD_FIELDS
+            ).values_list('identifier', 'event_id').distinct():
+                unit_events[identifier].add(event_id)
+        event_ids = set().union(*unit_events.values())
+        ilmds = list(events.InstanceLotMasterData.objects.filter(
+            name__in=_ILMD_FIELDS, event_id__in=event_ids
+        ).order_by('event__event_time', 'event_id').values_list(
+            'event_id', 'name', 'value')) if event_ids else []
+        for key, sample in samples.items():
+            product_info = ret_val[key]
+            sample_events = set().union(
+                *(unit_events.get(unit, ()) for unit in sample))
+            for event_id, name, value in ilmds:
+                field = _ILMD_FIELDS[name]
+                if event_id in sample_events and value and \
+                    not product_info[field]:
+                    product_info[field] = value
+        RocItQuery._set_trade_item_info(
+            {key: sample for key, sample in samples.items()
+             if not (ret_val[key]['product'] and ret_val[key]['uom'])},
+            ret_val)
+        return ret_val
+
+    @staticmethod
+    def _set_trade_item_info(samples: dict, products_info: dict):
+        """
+        Sets the missing product and unit of measure from the master data of
+        the trade item of the first SGTIN in each sample.  The product is the
+        additional id and the unit of measure the uom field or, if there is
+        none, the package uom.
+        :param samples: The sampled saleable units by key.
+        :param products_info: The product information to update by key.
+        """
+        gtins = {}
+        for key, sample in samples.items():
+            sgtin = next((identifier for identifier in sample
+                          if identifier.startswith('urn:epc:id:sgtin:')),
+                         None)
+            if sgtin is None:
+                continue
+            try:
+                gtins[key] = URNConverter(sgtin).gtin14
+            except Exception:
+                logger.info('Could not read the GTIN of %s.', sgtin)
+        if not gtins:
+            return
+        trade_items = {trade_item.GTIN14: trade_item for trade_item in
+                       TradeItem.objects.filter(GTIN14__in=set(
+                           gtins.values()))}
+        missing_uom = [trade_items[gtin].pk for key, gtin in gtins.items()
+                       if gtin in trade_items and
+                       not products_info[key]['uom']]
+        uoms = dict(TradeItemField.objects.filter(
+            trade_item__in=missing_uom, name='uom').values_list(
+            'trade_item_id', 'value')) if missing_uom else {}
+        for key, gtin in gtins.items():
+            trade_item = trade_items.get(gtin)
+            if trade_item is None:
+                continue
+            product_info = products_info[key]
+            if not product_info['product']:
+                product_info['product'] = trade_item.additional_id or ''
+            if not product_info['uom']:
+                product_info['uom'] = uoms.get(trade_item.pk) or \
+                    trade_item.package_uom or ''
+
     @staticmethod
     def get_lowest_saleable_units(query, tag_id):
+        """
+        Returns the identifiers of the entries at the bottom of the packaging
+        hierarchy below the tag_id, or the tag_id itself if it has no
+        children.
+        The identifiers are cached until the hierarchy below the tag_id
+        changes.
+        :param query: Not used, kept for the existing callers.
+        :param tag_id: The identifier to look under.
+        :return: A list of identifiers.
+        """
+        return list(get_hierarchy_cache().get(
+            tag_id, lambda: RocItQuery.get_leaves(
+                RocItQuery.get_hierarchy([tag_id]), tag_id),
+            namespace='leaves'))
+
+    @staticmethod
+    def get_leaves(hierarchy: dict, tag_id: str) -> list:
+        """
+        :param hierarchy: A hierarchy returned by get_hierarchy.
+        :param tag_id: An identifier in the hierarchy.
+        :return: The identifiers with no children below the tag_id, depth
+            first in the order the entries were created, or the tag_id if
+            it has no children.
+        """
         ret_val = []
-        children = query.get_epcs_by_parent_identifier(identifier=tag_id,
-                                                       select_for_update=False)
-        if len(children) == 0:
-            ret_val.append(tag_id)
-        else:
-            for child in children:
-                identifiers = RocItQuery.get_lowest_saleable_units(query,
-                                                                   child)
-                if len(identifiers) == 0:
-                    ret_val.append(child)
-                ret_val += identifiers
+        stack = [tag_id]
+        while stack:
+            identifier = stack.pop()
+            children = hierarchy.get(identifier)
+            if children:
+                stack.extend(reversed(children))
+            else:
+                ret_val.append(identifier)
         return ret_val
+
+    @staticmethod
+    def get_hierarchy(tag_ids: list, max_depth: int = None,
+                      max_size: int = None) -> dict:
+        """
+        Reads the packaging hierarchies below the tag_ids without the
+        decommissioned entries (or anything below them).  Uses a recursive
+        query where the database supports one, otherwise each level of the
+        hierarchy is read with a single parent_id__in query.  The tag_ids
+        may be below one another.
+        :param tag_ids: The identifiers of the top entries.
+        :param max_depth: The number of levels allowed below each of the
+            tag_ids.  Defaults to
+            QUARTET_INTEGRATIONS_ROCIT_MAX_HIERARCHY_DEPTH.
+        :param max_size: The number of entries allowed below each of the
+            tag_ids.  Defaults to QUARTET_INTEGRATIONS_ROCIT_MAX_HIERARCHY_SIZE.
+        :return: A dictionary of the child identifiers, in the order they
+            were created, of each identifier that has children.
+        :raises HierarchyLimitExceeded: If there are more levels or entries
+            than allowed below one of the tag_ids.
+        """
+        max_depth = ROCIT_MAX_HIERARCHY_DEPTH if max_depth is None \
+            else max_depth
+        max_size = ROCIT_MAX_HIERARCHY_SIZE if max_size is None else max_size
+        tag_ids = list(dict.fromkeys(tag_ids))
+        if not tag_ids:
+            return {}
+        if ROCIT_RECURSIVE_QUERIES and \
+            connection.vendor in ('postgresql', 'sqlite'):
+            rows = RocItQuery._get_hierarchy_rows_recursive(
+                tag_ids, max_depth, max_size)
+        else:
+            rows = RocItQuery._get_hierarchy_rows_by_level(
+                tag_ids, max_depth, max_size)
+        identifiers = {}
+        children = defaultdict(list)
+        sizes = defaultdict(int)
+        added = set()
+        for root, pk, parent, identifier, created, depth in rows:
+            identifiers[pk] = identifier
+            if depth == 0:
+                continue
+            sizes[root] += 1
+            if depth > max_depth:
+                raise RocItQuery.HierarchyLimitExceeded(
+                    'The packaging hierarchy of %s is more than %d levels '
+                    'deep.' % (root, max_depth))
+            # an entry below two of the tag_ids is read once for each
+            if pk not in added:
+                added.add(pk)
+                children[parent].append((created, identifier))
+        for root, size in sizes.items():
+            if size > max_size:
+                raise RocItQuery.HierarchyLimitExceeded(
+                    'The packaging hierarchy of %s has more than %d '
+                    'entries.' % (root, max_size))
+        return {
+            identifiers[parent]: [child for created, child in sorted(
+                created_children, key=lambda child: child[0])]
+            for parent, created_children in children.items()
+        }
+
+    @staticmethod
+    def _get_hierarchy_rows_recursive(tag_ids, max_depth, max_size):
+        """
+        Reads the tag_ids and everything below each of them with a single
+        recursive query.  No more rows are read than the tag_ids' limits
+        allow plus one each, so reaching the query's limit means one of the
+        tag_ids is past its limits.
+        :return: (root identifier, id, parent id, identifier, created,
+            depth) tuples.
+        """
+        quote = connection.ops.quote_name
+        model = entries.Entry
+        sql = _HIERARCHY_QUERY.format(
+            table=quote(model._meta.db_table),
+            id=quote(model._meta.pk.column),
+            parent=quote(model._meta.get_field('parent_id').column),
+            identifier=quote(model._meta.get_field('identifier').column),
+            created=quote(model._meta.get_field('created').column),
+            decommissioned=quote(
+                model._meta.get_field('decommissioned').column),
+            roots=', '.join(['%s'] * len(tag_ids))
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, tag_ids + [False, max_depth,
+                                           len(tag_ids) * (max_size + 2)])
+            return cursor.fetchall()
+
+    @staticmethod
+    def _get_hierarchy_rows_by_level(tag_ids, max_depth, max_size):
+        """
+        Reads the tag_ids and then each level below them breadth first,
+        up to one level and one entry past the limits of a tag_id.
+        :return: (root identifier, id, parent id, identifier, created,
+            depth) tuples.
+        """
+        rows = [(row[2],) + row + (0,) for row in
+                entries.Entry.objects.filter(identifier__in=tag_ids
+                                             ).values_list(
+                    'id', 'parent_id', 'identifier', 'created')]
+        # (root identifier, id) pairs, an entry below two of the tag_ids
+        # is read under each of them
+        level = [(row[0], row[1]) for row in rows]
+        seen = set(level)
+        sizes = defaultdict(int)
+        depth = 0
+        while level and depth <= max_depth and \
+            max(sizes.values(), default=0) <= max_size:
+            depth += 1
+            roots = defaultdict(list)
+            for root, pk in level:
+                roots[pk].append(root)
+            parents = list(roots)
+            next_level = []
+            for i in range(0, len(parents), ROCIT_HIERARCHY_BATCH_SIZE):
+                for row in entries.Entry.objects.filter(
+                    parent_id__in=parents[i:i + ROCIT_HIERARCHY_BATCH_SIZE],
+                    decommissioned=False
+                ).values_list('id', 'parent_id', 'identifier', 'created'):
+                    for root in roots[row[1]]:
+                        if (root, row[0]) in seen:
+                            continue
+                        seen.add((root, row[0]))
+                        rows.append((root,) + row + (depth,))
+                        next_level.append((root, row[0]))
+                        sizes[root] += 1
+            level = next_level
+        return rows
+
+    class HierarchyLimitExceeded(Exception):
+        pass
@@ -15,9 +15,15 @@
 # -*- coding: utf-8 -*-
 from django.urls import re_path
 
-from quartet_integrations.rocit.views import RetrievePackagingHierarchyView
+from quartet_integrations.rocit.views import RetrievePackagingHierarchyView, \
+    RetrievePackagingHierarchiesView
 
 urlpatterns = [
+    re_path(
+        r"opsmservices-serials/PackagingHierarchyServiceAMService/batch/?$",
+        RetrievePackagingHierarchiesView.as_view(),
+        name="retrievePackagingHierarchiesResponse",
+    ),
     re_path(
         r"opsmservices-serials/PackagingHierarchyServiceAMService",
         RetrievePackagingHierarchyView.as_view(),
@@ -14,19 +14,52 @@
 # Copyright 2019 SerialLab Corp.  All rights reserved.
 import traceback
 import logging
+import uuid
 
 from lxml import etree
+from django.http import StreamingHttpResponse
 from django.template import loader
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework import views
 from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework import status
+from quartet_integrations.environment import get_environment
+from quartet_integrations.generic.soap import SOAP_NS, SoapFields, \
+    parse_request
+from quartet_integrations.generic.streaming import StreamingTemplate
 from quartet_integrations.rocit.query import RocItQuery
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+TYPES_NS = 'http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/' \
+           'applicationModule/common/types/'
+VIEW_NS = 'http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/' \
+          'view/common/'
+
+NAMESPACES = {'soapenv': SOAP_NS, 'typ': TYPES_NS, 'com': VIEW_NS}
+
+# the voRow elements of a retrievePackagingHierarchy request and their
+# fields, compiled once
+VO_ROWS = etree.XPath(
+    '/soapenv:Envelope/soapenv:Body/typ:retrievePackagingHierarchy/typ:voRow',
+    namespaces=NAMESPACES)
+ROW_FIELDS = SoapFields({
+    'tag_id': 'com:TagId',
+    'send_children': 'com:SendChildren',
+    'send_product_info': 'com:SendProductInformation',
+}, NAMESPACES)
+
+# the number of voRow elements a batch request may have.  A truck can send
+# hundreds of lookups in one request; raise this if a client sends more.
+ROCIT_MAX_BATCH_ROWS = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_ROCIT_MAX_BATCH_ROWS',
+    1000
+)
+
+
 class DefaultXMLContent(DefaultContentNegotiation):
 
     def select_renderer(self, request, renderers, format_suffix):
@@ -61,6 +94,21 @@ class RocItBaseView(views.APIView):
             # All elements are optional just return none
             return None
 
+    def get_rows(self, root) -> list:
+        """
+        :param root: The root of the SOAP request.
+        :return: (tag id, send children, send product information) tuples
+            of the voRow elements that have a tag id.
+        """
+        ret_val = []
+        for row in VO_ROWS(root):
+            values = ROW_FIELDS.extract(row)
+            if values['tag_id']:
+                ret_val.append((values['tag_id'].strip(),
+                                values['send_children'],
+                                values['send_product_info']))
+        return ret_val
+
 
 class RetrievePackagingHierarchyView(RocItBaseView):
     """
@@ -78,17 +126,9 @@ class RetrievePackagingHierarchyView(RocItBaseView):
 
             if len(request.body) == 0:
                 return Response("Request was empty", status.HTTP_400_BAD_REQUEST, content_type="application/xml")
-            root = etree.fromstring(request.body)
-            body = root.find('{http://schemas.xmlsoap.org/soap/envelope/}Body')
-            query = body.find('{http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/applicationModule/common/types/}retrievePackagingHierarchy')
-            row = query.find('{http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/applicationModule/common/types/}voRow')
-            tag_id = self.get_tag_text(row,
-                                       '{http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/view/common/}TagId')
-            send_children = self.get_tag_text(row,
-                                       '{http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/view/common/}SendChildren')
-            send_product_info = self.get_tag_text(row,
-                                       '{http://xmlns.oracle.com/oracle/apps/pas/serials/serialsService/view/common/}SendProductInformation')
-
+            rows = self.get_rows(parse_request(request.body))
+            tag_id, send_children, send_product_info = \
+                rows[0] if rows else (None, None, None)
 
             if tag_id is None:
                # Have to have the Tag Id
@@ -105,6 +145,10 @@ class RetrievePackagingHierarchyView(RocItBaseView):
             ret_val = Response({"error": "The epc requested could not be found."},
                                status.HTTP_500_INTERNAL_SERVER_ERROR,
                                content_type="*/*")
+        except RocItQuery.HierarchyLimitExceeded as e:
+            ret_val = Response({"error": str(e)},
+                               status.HTTP_400_BAD_REQUEST,
+                               content_type="*/*")
         except Exception:
             # Unexpected error, return HTTP 500 Server Error and log the exception
             data = traceback.format_exc()
@@ -137,3 +181,55 @@ class RetrievePackagingHierarchyView(RocItBaseView):
 
         ret_val = Response(xml, status.HTTP_200_OK, content_type="application/xml")
         return ret_val
+
+
+class RetrievePackagingHierarchiesView(RocItBaseView):
+    """
+    The batch form of the RetrievePackagingHierarchyView.  Takes a
+    retrievePackagingHierarchy request with any number of voRow elements
+    and streams back a response with a result for each of them, in order.
+    The hierarchies of all the rows are read with shared queries.  A tag id
+    that does not exist gets a result without a status.  Requests with more
+    than QUARTET_INTEGRATIONS_ROCIT_MAX_BATCH_ROWS rows are rejected.
+    """
+
+    def post(self, request):
+        try:
+            if len(request.body) == 0:
+                return Response("Request was empty",
+                                status.HTTP_400_BAD_REQUEST,
+                                content_type="application/xml")
+            rows = self.get_rows(parse_request(request.body))
+            if not rows:
+                return Response("Missing Tag ID", status.HTTP_400_BAD_REQUEST,
+                                content_type="application/xml")
+            if len(rows) > ROCIT_MAX_BATCH_ROWS:
+                return Response("More than %d Tag IDs were requested." %
+                                ROCIT_MAX_BATCH_ROWS,
+                                status.HTTP_400_BAD_REQUEST,
+                                content_type="application/xml")
+            data = RocItQuery.RetrievePackagingHierarchies(rows)
+            content = StreamingTemplate(
+                get_environment('quartet_integrations').get_template(
+                    'rocit/rocit-search-batch-response.xml'),
+                {'message_id': str(uuid.uuid4()), 'rows': data}
+            )
+            content.prime()
+            ret_val = StreamingHttpResponse(content, content_type="text/xml")
+        except etree.XMLSyntaxError as e:
+            ret_val = Response({"error": str(e)}, status.HTTP_400_BAD_REQUEST,
+                               content_type="*/*")
+        except RocItQuery.HierarchyLimitExceeded as e:
+            ret_val = Response({"error": str(e)},
+                               status.HTTP_400_BAD_REQUEST,
+                               content_type="*/*")
+        except Exception:
+            # Unexpected error, return HTTP 500 Server Error and log the exception
+            data = traceback.format_exc()
+            logger.error('Exception in qu4rtet_integrations.rocit.'
+                         'RetrievePackagingHierarchiesView.post().\r\n%s' %
+                         data)
+            ret_val = Response({"error": data},
+                               status.HTTP_500_INTERNAL_SERVER_ERROR,
+                               content_type="*/*")
+        return ret_val
@@ -16,10 +16,12 @@ import io
 from quartet_epcis.parsing.steps import ContextKeys
 from django.core.files.base import File
 from quartet_capture.rules import Step, RuleContext
+from quartet_integrations.generic.hierarchy_cache import \
+    HierarchyCacheInvalidationMixin
 from quartet_integrations.sap.parsing import SAPParser
 
 
-class SAPParsingStep(Step):
+class SAPParsingStep(HierarchyCacheInvalidationMixin, Step):
     """
     A QU4RTET parsing step that can parse SAP XML data that contains
     custom event data.
@@ -0,0 +1,204 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import threading
+import time
+from logging import getLogger
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from quartet_masterdata.db import DBProxy
+from quartet_masterdata.models import Company, TradeItem
+from serialbox.models import Pool, Region
+
+logger = getLogger(__name__)
+
+# the seconds the metadata of a pool is cached for
+POOL_METADATA_TTL = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_POOL_METADATA_TTL',
+    300
+)
+
+SEQUENTIAL = 'sequential'
+RANDOM = 'random'
+LIST_BASED = 'list'
+
+
+class PoolMetadata:
+    """
+    What the serialbox response steps look up about a pool on every
+    allocation.
+    """
+    __slots__ = ('pool', 'region_type', 'region_active',
+                 'company_prefix_length', 'company_prefix_error',
+                 'trade_item')
+
+    def __init__(self, pool: Pool, region_type: str = None,
+                 region_active: bool = False,
+                 company_prefix_length: int = None,
+                 trade_item: TradeItem = None,
+                 company_prefix_error: str = None):
+        '''
+        :param pool: The Pool.
+        :param region_type: SEQUENTIAL, RANDOM or LIST_BASED for the first
+            kind of region the pool has, in that order, or None.
+        :param region_active: Whether any region of that kind is active.
+        :param company_prefix_length: The company prefix length the master
+            data has for the pool's machine name, if there is one.
+        :param trade_item: The TradeItem with the pool's machine name as
+            its GTIN 14, if there is one.
+        :param company_prefix_error: Why the master data has no company
+            prefix length for the pool's machine name, None if it has one.
+        '''
+        self.pool = pool
+        self.region_type = region_type
+        self.region_active = region_active
+        self.company_prefix_length = company_prefix_length
+        self.trade_item = trade_item
+        self.company_prefix_error = company_prefix_error
+
+    @classmethod
+    def load(cls, machine_name: str):
+        '''
+        Reads the metadata of a pool from the database.
+        :param machine_name: The machine name of the pool.
+        :return: A PoolMetadata instance.
+        '''
+        pool = Pool.objects.get(machine_name=machine_name)
+        ret = cls(pool)
+        for region_type, related_name in (
+            (SEQUENTIAL, 'sequentialregion_set'),
+            (RANDOM, 'randomizedregion_set'),
+            (LIST_BASED, 'listbasedregion_set')
+        ):
+            regions = getattr(pool, related_name, None)
+            if regions is None:
+                continue
+            actives = list(regions.values_list('active', flat=True))
+            if actives:
+                ret.region_type = region_type
+                ret.region_active = any(actives)
+                break
+        try:
+            ret.company_prefix_length = \
+                DBProxy().get_company_prefix_length(machine_name)
+        except (DBProxy.InvalidBarcode,
+                DBProxy.CompanyConfigurationError) as e:
+            # not a GTIN or SSCC the master data knows, which is cached
+            # like any other result
+            ret.company_prefix_error = str(e)
+        ret.trade_item = TradeItem.objects.select_related('company').filter(
+            GTIN14=machine_name).first()
+        return ret
+
+
+class PoolMetadataCache:
+    """
+    A per process cache of PoolMetadata.  Entries expire after `ttl`
+    seconds.  The whole cache is cleared whenever a Pool, TradeItem or
+    Company is saved or deleted in this process, and a pool's entry is
+    dropped when one of its regions is created, deleted or changes its
+    active flag.  The ttl bounds how long other processes serve metadata
+    changed elsewhere.
+    """
+
+    def __init__(self, ttl: float = POOL_METADATA_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, machine_name: str) -> PoolMetadata:
+        '''
+        :param machine_name: The machine name of the pool.
+        :return: The pool's PoolMetadata.
+        :raises Pool.DoesNotExist: If there is no such pool.
+        '''
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(machine_name)
+        if entry and entry[0] > now:
+            return entry[1]
+        metadata = PoolMetadata.load(machine_name)
+        with self._lock:
+            self._entries[machine_name] = (now + self.ttl, metadata)
+        return metadata
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def region_changed(self, region: Region, created: bool = True):
+        '''
+        Drops the entry of the region's pool unless the change can not
+        affect it.  Serialbox saves the state of a region on every
+        allocation, which must not empty the cache.
+        :param region: The region saved or deleted.
+        :param created: False if an existing region was saved.
+        '''
+        with self._lock:
+            for machine_name, (expires, metadata) in list(
+                self._entries.items()):
+                if metadata.pool.pk != region.pool_id:
+                    continue
+                if not created and region.active and metadata.region_active:
+                    continue
+                del self._entries[machine_name]
+
+
+_cache = PoolMetadataCache()
+
+
+def get_pool_metadata(machine_name: str) -> PoolMetadata:
+    '''
+    :param machine_name: The machine name of the pool.
+    :return: The pool's PoolMetadata from the cache of this process.
+    :raises Pool.DoesNotExist: If there is no such pool.
+    '''
+    return _cache.get(machine_name)
+
+
+def clear_pool_metadata(sender=None, **kwargs):
+    '''
+    Clears the cache of this process.  Connected to the save and delete
+    signals of the models the metadata is read from.
+    '''
+    logger.debug('%s changed, clearing the pool metadata cache.', sender)
+    _cache.clear()
+
+
+def region_changed(sender, instance: Region, created: bool = True, **kwargs):
+    '''
+    Hands a saved or deleted region to the cache of this process.
+    '''
+    _cache.region_changed(instance, created)
+
+
+def connect_signals():
+    '''
+    Connects the post_save and post_delete signals of Pool, TradeItem,
+    Company and every serialbox Region subclass to the cache.
+    '''
+    for model in apps.get_models():
+        if issubclass(model, Region):
+            receiver = region_changed
+        elif issubclass(model, (Pool, TradeItem, Company)):
+            receiver = clear_pool_metadata
+        else:
+            continue
+        uid = 'quartet_integrations.pool_metadata.%s' % model._meta.label
+        post_save.connect(receiver, sender=model, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, dispatch_uid=uid)
@@ -0,0 +1,119 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from collections.abc import Sequence
+from itertools import chain
+from typing import Callable
+
+from django.conf import settings
+
+# the number of numbers a NumberRange formats at a time while iterated
+NUMBER_RANGE_CHUNK_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_NUMBER_RANGE_CHUNK_SIZE',
+    10000
+)
+
+
+class NumberRange(Sequence):
+    """
+    The numbers of a sequential serialbox allocation, from `start` to `end`
+    inclusive, and the callbacks that format them.
+
+    Nothing is expanded until the range is read, so a response rule can
+    pass a range of a million numbers from step to step, each step adding
+    a formatting callback with `format`, and a template renders the values
+    while it iterates them.  Iteration formats NUMBER_RANGE_CHUNK_SIZE
+    numbers at a time, which lets batch callbacks such as
+    calculate_check_digits work on a list.
+
+        >>> numbers = NumberRange(1, 1000000).format('%09d'.__mod__)
+        >>> len(numbers), numbers[-1]
+        (1000000, '001000000')
+    """
+    __slots__ = ('range', 'formatters')
+
+    def __init__(self, start: int, end: int, formatters: tuple = ()):
+        '''
+        :param start: The first number of the range.
+        :param end: The last number of the range.
+        :param formatters: (callback, batch) pairs applied in order, see
+            `format`.
+        '''
+        self.range = range(start, end + 1)
+        self.formatters = formatters
+
+    @classmethod
+    def from_range(cls, numbers: range, formatters: tuple = ()):
+        ret = cls.__new__(cls)
+        ret.range = numbers
+        ret.formatters = formatters
+        return ret
+
+    @property
+    def start(self):
+        return self.range.start
+
+    @property
+    def end(self):
+        return self.range.stop - 1
+
+    def format(self, callback: Callable, batch: bool = False):
+        '''
+        :param callback: Called with each number, or with the output of the
+            previous callback, and returns the formatted value.
+        :param batch: If True the callback is called with a list of values
+            and returns a list of formatted values instead.
+        :return: A new NumberRange that also applies the callback.
+        '''
+        return NumberRange.from_range(self.range,
+                                      self.formatters + ((callback, batch),))
+
+    def format_values(self, numbers) -> list:
+        '''
+        :param numbers: Numbers from this range.
+        :return: The numbers run through the formatting callbacks.
+        '''
+        values = numbers
+        for callback, batch in self.formatters:
+            values = callback(values) if batch else list(map(callback, values))
+        return values
+
+    def __len__(self):
+        return len(self.range)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return NumberRange.from_range(self.range[index], self.formatters)
+        number = self.range[index]
+        if not self.formatters:
+            return number
+        return self.format_values([number])[0]
+
+    def __iter__(self):
+        if not self.formatters:
+            return iter(self.range)
+        if not any(batch for callback, batch in self.formatters):
+            values = iter(self.range)
+            for callback, batch in self.formatters:
+                values = map(callback, values)
+            return values
+        return chain.from_iterable(
+            self.format_values(self.range[i:i + NUMBER_RANGE_CHUNK_SIZE])
+            for i in range(0, len(self.range), NUMBER_RANGE_CHUNK_SIZE)
+        )
+
+    def __repr__(self):
+        return 'NumberRange(%d, %d, %r)' % (self.start, self.end,
+                                            self.formatters)
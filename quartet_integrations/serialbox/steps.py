@@ -23,9 +23,14 @@ from quartet_capture.rules import Step, RuleContext
 from quartet_masterdata.db import DBProxy
 from quartet_masterdata.models import TradeItem
 from gs123.conversion import BarcodeConverter, URNConverter
-from gs123 import check_digit
 from io import StringIO
+from quartet_integrations.generic.check_digits import calculate_check_digit, \
+    calculate_check_digits
 from quartet_integrations.serialbox.parsing import UpdateResponseRuleParser
+from quartet_integrations.serialbox.metadata import LIST_BASED, RANDOM, \
+    SEQUENTIAL, get_pool_metadata
+from quartet_integrations.serialbox.ranges import NumberRange
+from quartet_integrations.serialbox.urns import UrnList, UrnSequence
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +78,12 @@ class ListToUrnConversionStep(Step):
                                      ' how to pad the serial number field of '
                                      ' urns accordingly.'
                                      )
+        self.lazy_urns = self.get_or_create_parameter(
+            'Lazy URNs', 'False',
+            'Whether or not to return the URNs as a UrnList that renders '
+            'each URN when it is read instead of a list.  Use this when a '
+            'template step renders the response.'
+        ).lower() == 'true'
 
     def execute(self, data, rule_context: RuleContext):
         """
@@ -82,7 +93,8 @@ class ListToUrnConversionStep(Step):
         """
         task_params = self.get_task_parameters(rule_context)
         pool = task_params['pool']
-        self.pool_ref = Pool.objects.get(machine_name=pool)
+        metadata = get_pool_metadata(pool)
+        self.pool_ref = metadata.pool
 
         self.info('Working against Pool with machine name %s', pool)
 
@@ -90,16 +102,15 @@ class ListToUrnConversionStep(Step):
                   'machine name / API Key value %s and matching against '
                   'a Trade Item and/or Company in the master data '
                   'configuration', pool)
-        try:
-            cp_length = DBProxy().get_company_prefix_length(pool)
-        except DBProxy.InvalidBarcode:
+        cp_length = metadata.company_prefix_length
+        if metadata.company_prefix_error:
             logger.debug('Invalid barcode, this may be an indicator /'
                          ' company prefix format...trying')
             cp_length = len(pool) - 1
         rule_context.context['company_prefix_length'] = cp_length
         # if we are dealing with gtins we need to make urn values sans the
         # epc declaration
-        return_vals = []
+        return_vals = UrnList() if self.lazy_urns else []
         rule_context.context['pool'] = pool
         if len(pool) == 14:
             converter = self.handle_gtins(cp_length, data, return_vals, pool,
@@ -136,49 +147,48 @@ class ListToUrnConversionStep(Step):
         :param rule_context: The rule context to place the Trade Item django
             model instance onto.
         """
-        rule_context.context['trade_item'] = TradeItem.objects.get(
-            GTIN14=pool
-        )
+        trade_item = get_pool_metadata(pool).trade_item
+        if trade_item is None:
+            raise TradeItem.DoesNotExist(
+                'There is no Trade Item with the GTIN 14 %s.' % pool)
+        rule_context.context['trade_item'] = trade_item
         numbers = self.get_number_list(numbers)
         self.info('Formatting for GTIN response.')
         # provide a dummy serial number so we can just quickly parse the company prefix
         converter = BarcodeConverter(
             '01%s21%s' % (pool, '000000000001'), cp_length)
-        for number in numbers:
-            return_vals.append(
-                self.format_gtin_urn(
-                    converter.company_prefix,
-                    converter.indicator_digit,
-                    converter.item_reference,
-                    number
-                )
+        return_vals.extend(
+            self.format_gtin_urns(
+                converter.company_prefix,
+                converter.indicator_digit,
+                converter.item_reference,
+                numbers
             )
+        )
         return converter
 
     def get_number_list(self, numbers):
         """
-        Converts a sequential start/end to a list of numbers for processing.
+        Converts a sequential start/end to a NumberRange for processing.
         Leaves random lists alone
-        :param numbers: The numbers to inspect and possibly convert to a list.
-        :return: A list of numbers
+        :param numbers: The numbers to inspect and possibly convert.
+        :return: A NumberRange or list of numbers
         """
         # if the below evaluates to true then we know we are dealing with
         # a sequential reply.  In that case, we transform the start and
         # end numbers into a list using the range function, otherwise
         # we leave the list alone
-        if self.pool_ref.sequentialregion_set.count() > 0:
-            for region in self.pool_ref.sequentialregion_set.all():
-                if region.active:
-                    self.info('Sequential pool detected, converting to list.')
-                    return range(numbers[0], numbers[1] + 1)
-        elif self.pool_ref.randomizedregion_set.count() > 0:
-            for region in self.pool_ref.randomizedregion_set.all():
-                if region.active:
-                    self.info('Random pool detected.')
-        elif self.pool_ref.listbasedregion_set.count() > 0:
-            for region in self.pool_ref.listbasedregion_set.all():
-                if region.active:
-                    self.info('List-based detected.')
+        metadata = get_pool_metadata(self.pool_ref.machine_name)
+        if metadata.region_type == SEQUENTIAL:
+            if metadata.region_active:
+                self.info('Sequential pool detected, converting to list.')
+                return NumberRange(numbers[0], numbers[1])
+        elif metadata.region_type == RANDOM:
+            if metadata.region_active:
+                self.info('Random pool detected.')
+        elif metadata.region_type == LIST_BASED:
+            if metadata.region_active:
+                self.info('List-based detected.')
         else:
             self.error('No active region was detected.')
         return numbers
@@ -198,15 +208,14 @@ class ListToUrnConversionStep(Step):
             serial_length = 16 - len(company_prefix)
 
         numbers = self.get_number_list(numbers)
-        for number in numbers:
-            return_vals.append(
-                self.format_sscc_urn(
-                    company_prefix,
-                    extension_digit,
-                    number,
-                    serial_length
-                )
+        return_vals.extend(
+            self.format_sscc_urns(
+                company_prefix,
+                extension_digit,
+                numbers,
+                serial_length
             )
+        )
         if not converter:
             class Converter:
                 pass
@@ -216,6 +225,27 @@ class ListToUrnConversionStep(Step):
             converter.extension_digit = extension_digit
         return converter
 
+    def format_sscc_urns(self, company_prefix, extension_digit, numbers,
+                         serial_length):
+        """
+        Creates the SSCC EPC Urns for a range or list of serial numbers.
+        Unless format_sscc_urn is overridden, the URNs are returned as a
+        UrnSequence that renders them all with one format string.
+        :param company_prefix: The company prefix
+        :param extension_digit: The SSCC extension digit
+        :param numbers: The serial numbers for the SSCCs.
+        :return: A sequence of EPC SSCC URN values.
+        """
+        if type(self).format_sscc_urn is not \
+            ListToUrnConversionStep.format_sscc_urn:
+            return [self.format_sscc_urn(company_prefix, extension_digit,
+                                         number, serial_length)
+                    for number in numbers]
+        return UrnSequence(
+            'urn:epc:id:sscc:%s.%s' % (company_prefix, extension_digit),
+            numbers, serial_length
+        )
+
     def format_sscc_urn(self, company_prefix, extension_digit, number,
                         serial_length):
         """
@@ -230,6 +260,29 @@ class ListToUrnConversionStep(Step):
             str(number).zfill(serial_length)
         )
 
+    def format_gtin_urns(self, company_prefix: str, indicator: str,
+                         item_reference: str, numbers):
+        """
+        Creates the SGTIN URNs for a range or list of serial numbers.
+        Unless format_gtin_urn is overridden, the URNs are returned as a
+        UrnSequence that renders them all with one format string.
+        :param company_prefix: The company prefix
+        :param indicator: The indicator digit
+        :param item_reference: The item reference number
+        :param numbers: The serial numbers
+        :return: A sequence of SGTIN URNs.
+        """
+        if type(self).format_gtin_urn is not \
+            ListToUrnConversionStep.format_gtin_urn:
+            return [self.format_gtin_urn(company_prefix, indicator,
+                                         item_reference, number)
+                    for number in numbers]
+        return UrnSequence(
+            'urn:epc:id:sgtin:%s.%s%s.' % (company_prefix, indicator,
+                                           item_reference),
+            numbers
+        )
+
     def format_gtin_urn(self, company_prefix: str, indicator: str,
                         item_reference: str, serial_number: str):
         """
@@ -338,6 +391,13 @@ class ListToBarcodeConversionStep(Step):
             'from sequential ranges.'
         ).lower() == 'true'
 
+        self.lazy_lists = self.get_or_create_parameter(
+            'Lazy Lists', 'False',
+            'If set to true the SSCCs of a sequential range are returned in '
+            'a UrnList that formats each one when it is read instead of a '
+            'list.  Use this when a template step renders the response.'
+        ).lower() == 'true'
+
         self.extension_digit = int(self.get_or_create_parameter(
             'Extension Digit', '0',
             'A single numeric value from 0-9 for any SSCC responses. If a '
@@ -378,7 +438,7 @@ class ListToBarcodeConversionStep(Step):
                   'machine name / API Key value %s and matching against '
                   'a Trade Item and/or Company in the master data '
                   'configuration', pool)
-        return_vals = []
+        return_vals = UrnList() if self.lazy_lists else []
         if len(pool) == 14:
             self.handle_gtins(data, return_vals, pool, rule_context)
         else:
@@ -442,17 +502,18 @@ class ListToBarcodeConversionStep(Step):
         populates the return_vals parameter with formatted numbers.
 
         :param data: The list of serial numbers returned from serial box.
-        :param return_vals: The list to return to the rule.
+        :param return_vals: The list to return to the rule.  A UrnList keeps
+            the NumberRange of a sequential range unformatted.
         :param pool: The machine name of the pool that executed the
         serialbox request.
         :param rule_context: The RuleContext instance for the currently
             executing rule.
         :return: None
         """
-        sequential = Pool.objects.prefetch_related(
-            'sequentialregion_set').filter(
-            machine_name=pool
-        ).count() == 1
+        try:
+            sequential = get_pool_metadata(pool).region_type == SEQUENTIAL
+        except Pool.DoesNotExist:
+            sequential = False
         if self.company_prefix == '':
             raise self.InvalidCompanyPrefix(
                 'The company prefix must be configured in the Response Rule '
@@ -461,11 +522,37 @@ class ListToBarcodeConversionStep(Step):
             )
         padding = 17 - (len(self.company_prefix) + 1)
         if sequential and len(data) == 2 and self.create_list == True:
-            data = range(data[0], data[1] + 1)
-        for number in data:
-            return_vals.append(
-                self.format_sscc_barcode(number, padding)
-            )
+            data = NumberRange(data[0], data[1])
+        return_vals.extend(self.format_sscc_barcodes(data, padding))
+
+    def format_sscc_barcodes(self, numbers, padding: int) -> list:
+        """
+        Formats all of the SSCCs of a response.  Unless format_sscc_barcode
+        is overridden, the check digits are calculated for the whole list
+        in one pass.
+        :param numbers: The serial numbers returned from serial box.
+        :param padding: The length to zero pad the serial numbers to.
+        :return: A list of formatted SSCC values, a NumberRange that formats
+            them when read if the numbers are a NumberRange.
+        """
+        if type(self).format_sscc_barcode is not \
+            ListToBarcodeConversionStep.format_sscc_barcode:
+            return [self.format_sscc_barcode(number, padding)
+                    for number in numbers]
+        prefix = '%s%s' % (self.extension_digit, self.company_prefix)
+        if isinstance(numbers, NumberRange):
+            ssccs = numbers.format(
+                ('%s%%0%dd' % (prefix, padding)).__mod__
+            ).format(calculate_check_digits, batch=True)
+            if self.use_parenthesis:
+                ssccs = ssccs.format('(00)'.__add__)
+            return ssccs
+        ssccs = calculate_check_digits(
+            [prefix + str(number).zfill(padding) for number in numbers]
+        )
+        if self.use_parenthesis:
+            return ['(00)' + sscc for sscc in ssccs]
+        return ssccs
 
     def format_sscc_barcode(self, number: int, padding: int) -> str:
         """
@@ -478,14 +565,12 @@ class ListToBarcodeConversionStep(Step):
         :return: A formatted SSCC value
         """
         number = str(number).zfill(padding)
+        sscc_val = calculate_check_digit(
+            '%s%s%s' % (self.extension_digit, self.company_prefix, number)
+        )
         if self.use_parenthesis:
-            sscc_val = '(00)%s%s%s' % (
-                self.extension_digit, self.company_prefix, number
-            )
-        else:
-            sscc_val = '%s%s%s' % (self.extension_digit, self.company_prefix,
-                                   number)
-        return check_digit.calculate_check_digit(sscc_val)
+            sscc_val = '(00)%s' % sscc_val
+        return sscc_val
 
     def on_failure(self):
         pass
@@ -512,7 +597,9 @@ class ListToBarcodeConversionStep(Step):
             'Company Prefix': 'The company prefix must be supplied for handling'
                               ' SSCC values.',
             'Create List': 'Wheteher or not to create a list-based return '
-                           'from sequential ranges.'
+                           'from sequential ranges.',
+            'Lazy Lists': 'If set to true the SSCCs of sequential ranges are '
+                          'formatted when they are read.'
         }
 
     class InvalidCompanyPrefix(Exception):
@@ -0,0 +1,127 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from collections.abc import Sequence
+from itertools import chain
+
+from quartet_integrations.serialbox.ranges import NumberRange
+
+
+class UrnSequence(Sequence):
+    """
+    The URNs of a range or list of serial numbers that share a prefix,
+    such as 'urn:epc:id:sgtin:0377713.012345.'.
+
+    URNs are rendered when they are read, so a sequence built from a
+    serialbox range costs the same whether it holds one thousand or one
+    million numbers, and iterating renders the whole range with a single
+    format string instead of one method call per number.
+
+        >>> urns = UrnSequence('urn:epc:id:sscc:0377713.0', range(1, 3), 9)
+        >>> urns[-1]
+        'urn:epc:id:sscc:0377713.0000000002'
+    """
+    __slots__ = ('prefix', 'numbers', 'width')
+
+    def __init__(self, prefix: str, numbers, width: int = 0):
+        '''
+        :param prefix: The part of the URN in front of the serial number.
+        :param numbers: A range, NumberRange or list of serial numbers.
+        :param width: The serial numbers are zero padded to this length.
+        '''
+        self.prefix = prefix
+        self.numbers = numbers
+        self.width = width
+
+    def format(self, number) -> str:
+        '''
+        :param number: A serial number.
+        :return: The URN of the serial number.
+        '''
+        return self.prefix + str(number).zfill(self.width)
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return UrnSequence(self.prefix, self.numbers[index], self.width)
+        return self.format(self.numbers[index])
+
+    def __iter__(self):
+        prefix = self.prefix.replace('%', '%%')
+        numbers = self.numbers
+        if isinstance(numbers, NumberRange) and not numbers.formatters:
+            numbers = numbers.range
+        if isinstance(numbers, range):
+            if self.width:
+                template = '%s%%0%dd' % (prefix, self.width)
+            else:
+                template = prefix + '%d'
+            return map(template.__mod__, numbers)
+        if self.width:
+            return map(self.format, numbers)
+        return map((prefix + '%s').__mod__, numbers)
+
+    def __repr__(self):
+        return 'UrnSequence(%r, %r, %d)' % (self.prefix, self.numbers,
+                                            self.width)
+
+
+class UrnList(Sequence):
+    """
+    A list of URNs that keeps the UrnSequences and NumberRanges added to it
+    unrendered.
+    Django templates iterate it like a list, rendering each URN as the
+    template reaches it.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+
+    def append(self, urn: str):
+        if not self._parts or not isinstance(self._parts[-1], list):
+            self._parts.append([])
+        self._parts[-1].append(urn)
+        self._length += 1
+
+    def extend(self, urns):
+        if isinstance(urns, (UrnSequence, NumberRange)):
+            self._parts.append(urns)
+            self._length += len(urns)
+        else:
+            for urn in urns:
+                self.append(urn)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return chain.from_iterable(self._parts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('UrnList index out of range')
+        for part in self._parts:
+            if index < len(part):
+                return part[index]
+            index -= len(part)
+
+    def __repr__(self):
+        return 'UrnList(%r)' % self._parts
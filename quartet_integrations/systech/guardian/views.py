@@ -14,7 +14,6 @@
 # Copyright 2020 SerialLab Corp.  All rights reserved.
 from logging import getLogger, getLevelName, DEBUG
 
-from io import BytesIO
 from lxml import etree
 from rest_framework.request import Request
 
@@ -27,6 +26,14 @@ from quartet_capture.views import CaptureInterface
 from rest_framework_xml import parsers
 from serialbox.api.views import AllocateView
 
+from quartet_integrations.generic.prefetch import PreFetchMixin
+from quartet_integrations.generic.soap import iterparse_fields
+from quartet_integrations.generic.streaming import StreamingResponseMixin, \
+    StreamingTemplate
+from quartet_integrations.generic.task_parameters import \
+    BulkTaskParameterMixin
+from quartet_integrations.generic.timing import PARSE, TimingMixin
+
 logger = getLogger(__name__)
 from rest_framework_xml.renderers import XMLRenderer
 
@@ -35,11 +42,15 @@ class GuardianNumberRangeRenderer(XMLRenderer):
     '''
     Overrrides the basic XMLRenderer and uses the
     `EPCPyYes.core.v1_2.template_events` Event class's .render() output
-    directly since that output is already encoded into XML.
+    directly since that output is already encoded into XML.  Streamed
+    template output is normally sent by the view as a streaming response
+    and is only rendered to a single string here.
     '''
     media_type = "text/xml"
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, StreamingTemplate):
+            data = str(data)
         if isinstance(data, str):
             ret = data.encode(self.charset)
         else:
@@ -50,13 +61,28 @@ class GuardianNumberRangeRenderer(XMLRenderer):
 parser_classes = [parsers.XMLParser]
 
 
-class GuardianNumberRangeView(AllocateView):
+class GuardianNumberRangeView(TimingMixin, StreamingResponseMixin,
+                              PreFetchMixin, BulkTaskParameterMixin,
+                              AllocateView):
     """
     Will process inbound Guardian Number Range requests and return accordingly.
-    This is a SOAP interface and supports only the POST operation.
+    This is a SOAP interface and supports only the POST operation.  Response
+    rules that render with the StreamingTemplateStep are streamed.
     """
     renderer_classes = [GuardianNumberRangeRenderer]
 
+    # the local names of the request elements that are read by parse_xml
+    # and the field each one populates.  The names are matched regardless
+    # of case.  The object_key and size fields are handled by parse_xml,
+    # the others are set as instance attributes.
+    request_fields = {
+        'ObjectKey': 'object_key',
+        'Size': 'size',
+        'EncodingType': 'encoding_type',
+        'IDType': 'id_type',
+        'SendingSystem': 'sending_system',
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.type = None
@@ -66,16 +92,23 @@ class GuardianNumberRangeView(AllocateView):
         self.encoding_type = None
 
     def post(self, request):
-        request_data = \
-            etree.iterparse(BytesIO(request.body),
-                            events=('end',),
-                            remove_comments=True)
-        count = None
-        count = self.parse_xml(request_data)
+        with self.timed(PARSE):
+            request_data = self.iterparse_request(request.body)
+            count = self.parse_xml(request_data)
         ret = super().get(request, self.machine_name, count)
         self.log_request(request)
         return ret
 
+    def iterparse_request(self, body: bytes):
+        """
+        Returns an iterparse over the elements of the request body.  Every
+        element is reported since lxml can only filter tags by their exact
+        case; parse_xml picks out the ones named in `request_fields`.
+        :param body: The raw request body.
+        :return: An lxml iterparse.
+        """
+        return iterparse_fields(body)
+
     def log_request(self, request: Request):
         if settings.LOGGING_LEVEL == 'DEBUG':
             headers = request._request.headers
@@ -85,30 +118,44 @@ class GuardianNumberRangeView(AllocateView):
 
     def parse_xml(self, request_data) -> int:
         """
-        Override to handle different parsing scenarios.  Populates the
-        instance fields and returns teh
-        :param count:
-        :param request_data:
-        :return:
+        Populates the instance fields from the request elements named in
+        `request_fields`, in any namespace and regardless of case, and
+        returns the requested size.  Parsing stops as soon as every field
+        has been read.  Override `request_fields` and `handle_object_key` to
+        handle different request formats.
+        :param request_data: An iterparse of the request.
+        :return: The size element's text or 0 if there was none.
         """
         count = 0
+        fields = {name.lower(): field
+                  for name, field in self.request_fields.items()}
+        remaining = set(fields.values())
         for event, element in request_data:
-            print(element.tag)
-            if 'ObjectKey' in element.tag:
+            field = fields.get(element.tag.rpartition('}')[2].lower())
+            if field is None:
+                continue
+            if field == 'object_key':
                 logger.debug('object key found')
-                self.type, self.machine_name = self.check_object_key(element)
-            elif 'Size' in element.tag:
+                self.handle_object_key(element)
+            elif field == 'size':
                 count = element.text
                 logger.debug('size = %s', count)
-            elif 'EncodingType' in element.tag:
-                self.encoding_type = element.text
-            elif 'IDType' in element.tag:
-                self.id_type = element.text
-            elif 'SendingSystem' in element.tag:
-                self.sending_system = element.text
-            print(element.tag)
+            else:
+                setattr(self, field, element.text)
+            element.clear()
+            remaining.discard(field)
+            if not remaining:
+                break
         return count
 
+    def handle_object_key(self, object_key: etree.Element):
+        """
+        Sets the type and machine name from the ObjectKey element.
+        :param object_key: The ObjectKey element.
+        :return: None
+        """
+        self.type, self.machine_name = self.check_object_key(object_key)
+
     def check_object_key(self, object_key: etree.Element) -> tuple:
         """
         Iterates through the children of an ObjectKey element to ascertain
@@ -132,40 +179,19 @@ class GuardianNumberRangeView(AllocateView):
                 value = child.text
         return name, value
 
-    def _set_task_parameters(self, pool, region, response_rule, size, request):
+    def get_task_parameters(self, pool, region, size, request):
         """
-        Override the _set_task_parameters so that we can pass in the
-        additional systech parameters for the rule.
+        Adds the additional systech parameters for the rule.
         """
-        db_task = super()._set_task_parameters(pool, region, response_rule,
-                                               size,
-                                               request)
-        TaskParameter.objects.create(
-            task=db_task,
-            name='id_type',
-            value=self.id_type
-        )
-        TaskParameter.objects.create(
-            task=db_task,
-            name='sending_system',
-            value=self.sending_system
-        )
-        TaskParameter.objects.create(
-            task=db_task,
-            name='encoding_type',
-            value=self.encoding_type
-        )
-        TaskParameter.objects.create(
-            task=db_task,
-            name='type',
-            value=self.type
-        )
-        TaskParameter.objects.create(
-            task=db_task,
-            name='machine_name',
-            value=self.machine_name
-        )
-        return db_task
+        ret = super().get_task_parameters(pool, region, size, request)
+        ret += [
+            TaskParameter(name='id_type', value=self.id_type),
+            TaskParameter(name='sending_system', value=self.sending_system),
+            TaskParameter(name='encoding_type', value=self.encoding_type),
+            TaskParameter(name='type', value=self.type),
+            TaskParameter(name='machine_name', value=self.machine_name),
+        ]
+        return ret
 
 
 class AcceptHeaderNegotiation(DefaultContentNegotiation):
@@ -7,6 +7,7 @@ from gs123.conversion import URNConverter
 from quartet_masterdata.models import TradeItem
 from EPCPyYes.core.v1_2 import template_events
 from EPCPyYes.core.v1_2 import events
+from quartet_integrations.environment import get_template_from_string
 from quartet_integrations.systech.unitrace.evnironment import get_default_environment
 from quartet_templates.models import Template
 
@@ -45,10 +46,12 @@ class EPCPyYesOutputStep(EYOS):
                 name=self.filtered_event_template
             )
 
+        if template:
+            template = get_template_from_string(get_default_environment(),
+                                                template.content)
         for event in fevents:
             if template:
-                env = get_default_environment()
-                event.template = env.from_string(template.content)
+                event.template = template
         return fevents
         
     def process_object_events(self, oevents):
@@ -58,10 +61,12 @@ class EPCPyYesOutputStep(EYOS):
                 name=self.obj_event_template
             )
 
+        if template:
+            template = get_template_from_string(get_default_environment(),
+                                                template.content)
         for event in oevents:
             if template:
-                env = get_default_environment()
-                event.template = env.from_string(template.content)
+                event.template = template
             epc = event.epc_list[0]
             if ':sscc:' in epc:
                 continue
@@ -85,10 +90,12 @@ class EPCPyYesOutputStep(EYOS):
                 name=self.agg_event_template
             )
 
+        if template:
+            template = get_template_from_string(get_default_environment(),
+                                                template.content)
         for event in aevents:
             if template:
-                env = get_default_environment()
-                event.template = env.from_string(template.content)
+                event.template = template
         return aevents
     
     def execute(self, data, rule_context: RuleContext):
@@ -12,18 +12,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 # Copyright 2019 SerialLab Corp.  All rights reserved.
-import os
 
 import abc
-import sqlite3
 import time
 from lxml import etree, objectify
 
 from list_based_flavorpack.models import ListBasedRegion
-from list_based_flavorpack.processing_classes.third_party_processing.rules import \
-    get_region_table
 from quartet_capture import models
 from quartet_capture.rules import RuleContext, Step
+from quartet_integrations.generic.number_response import \
+    SerialNumberExtractor
+from quartet_integrations.generic.region_store import RegionNumberStore
 from quartet_integrations.oracle.steps import TradeItemNumberRangeImportStep
 from quartet_integrations.tracelink.parsing import TraceLinkPartnerParser, \
     TracelinkMMParser
@@ -51,13 +50,16 @@ class NumberResponseStep(Step):
         Attempts to parse XML response and writes items to a file.
         """
         try:
-            root = etree.fromstring(self.get_data(data, rule_context))
+            extractor = SerialNumberExtractor(self.get_data(data, rule_context),
+                                              self.serial_number_path,
+                                              self.strip)
+            # the serial numbers are left out of the tree used to look up
+            # the region and are streamed to write_list afterwards
+            root = extractor.skeleton()
             self.strip_namespaces(root)
             machine_name = self.get_machine_name(root, rule_context)
             region = self.get_list_based_region(machine_name)
-            self.check_db_state(region)
-            number_elements = root.findall(self.serial_number_path)
-            self.write_list(number_elements, region)
+            self.write_list(extractor, region)
         except:
             self.info("Error while processing response: %s",
                       self.get_data(data, rule_context))
@@ -72,15 +74,6 @@ class NumberResponseStep(Step):
                     elem.tag = elem.tag[i + 1:]
             objectify.deannotate(root, cleanup_namespaces=True)
 
-    def check_db_state(self, region):
-        if not os.path.exists(region.db_file_path):
-            connection = sqlite3.connect(region.db_file_path)
-            connection.execute(
-                "create table if not exists %s "
-                "(serial_number text not null unique, used integer not null)"
-                % get_region_table(region)
-            )
-
     def get_list_based_region(self, machine_name):
         """
         Gets the list based region based on the machine name of the region
@@ -126,7 +119,12 @@ class NumberResponseStep(Step):
         return rule_context.context.get('NUMBER_RESPONSE', None) or data
 
     @abc.abstractmethod
-    def write_list(self, number_elements, region):
+    def write_list(self, serial_numbers, region):
+        '''
+        :param serial_numbers: An iterable of the serial number strings in
+            the response.
+        :param region: The ListBasedRegion being replenished.
+        '''
         pass
 
     def on_failure(self):
@@ -143,10 +141,10 @@ class FlatFileResponseStep(NumberResponseStep):
     for later use.
     """
 
-    def write_list(self, number_elements, region):
+    def write_list(self, serial_numbers, region):
         with open(region.directory_path, "a") as f:
-            for id in number_elements:
-                f.write("%s\n" % id.text)
+            for serial_number in serial_numbers:
+                f.write("%s\n" % serial_number)
 
 
 class DBResponseStep(NumberResponseStep):
@@ -159,16 +157,11 @@ class DBResponseStep(NumberResponseStep):
         raise NotImplementedError('This number response step does not handle '
                                   'range based information.')
 
-    def write_list(self, number_elements, region: ListBasedRegion):
+    def write_list(self, serial_numbers, region: ListBasedRegion):
         start = time.time()
-        connection = sqlite3.connect(region.db_file_path)
-        cursor = connection.cursor()
-        cursor.execute('begin transaction')
         self.info('storing the numbers.')
-        for id in number_elements:
-            cursor.execute('insert into %s (serial_number, used) values '
-                           '(?, ?)' % get_region_table(region), (id.text, 0))
-        connection.commit()
+        with RegionNumberStore(region) as store:
+            store.write(serial_numbers)
         self.info("Execution time: %.3f seconds." % (time.time() - start))
 
 
@@ -38,6 +38,12 @@ class TraceLinkNumberRangeView(GuardianNumberRangeView):
     """
     renderer_classes = [GuardianNumberRangeRenderer, BrowsableAPIRenderer]
 
+    # TraceLink sends the ReceivingSystem as well
+    request_fields = dict(
+        GuardianNumberRangeView.request_fields,
+        ReceivingSystem='receiving_system'
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.receiving_system = None
@@ -78,70 +84,41 @@ class TraceLinkNumberRangeView(GuardianNumberRangeView):
         else:
             return Response(status=status.HTTP_200_OK)
 
-    def parse_xml(self, request_data) -> int:
+    def handle_object_key(self, object_key: etree.Element):
         """
-        Override to handle different parsing scenarios.  Populates the
-        instance fields and returns the count.
-        :param count:
-        :param request_data:
-        :return:
+        Sets the type and machine name from the ObjectKey element.  SSCC
+        company prefix values are sent as "company prefix|extension digit"
+        and are turned into the extension digit followed by the company
+        prefix since this is how the serialbox steps expect the machine
+        name of the pool.
+        :param object_key: The ObjectKey element.
+        :return: None
         """
-        count = 0
-        for event, element in request_data:
-            if 'ObjectKey' in element.tag:
-                logger.debug('object key found')
-                self.type, self.machine_name = self.check_object_key(
-                    element)
-                if "|" in self.machine_name:
-                    # here we are taking the pipe out of the "company prefix"
-                    # value and then putting the last digit in the front
-                    # this is how serialbox steps expect it: indicator digit
-                    # then the company prefix as the machine name of the pool.
-                    logger.debug('Found an SSCC')
-                    vals = self.machine_name.split("|")
-                    self.machine_name = vals[1] + vals[0]
-                    self.extension_digit = vals[1]
-                    self.company_prefix = vals[0]
-                    logger.debug('Set machine name to %s', self.machine_name)
-            elif 'Size' in element.tag:
-                count = element.text
-                logger.debug('size = %s', count)
-            elif 'EncodingType' in element.tag:
-                self.encoding_type = element.text
-            elif 'idtype' in element.tag.lower():
-                self.id_type = element.text
-            elif 'SendingSystem' in element.tag:
-                self.sending_system = element.text
-            elif 'ReceivingSystem' in element.tag:
-                self.receiving_system = element.text
-        return count
+        super().handle_object_key(object_key)
+        if self.machine_name and "|" in self.machine_name:
+            logger.debug('Found an SSCC')
+            vals = self.machine_name.split("|")
+            self.machine_name = vals[1] + vals[0]
+            self.extension_digit = vals[1]
+            self.company_prefix = vals[0]
+            logger.debug('Set machine name to %s', self.machine_name)
 
-    def _set_task_parameters(self, pool, region, response_rule, size, request):
+    def get_task_parameters(self, pool, region, size, request):
         """
         Add the ReceivingSystem task parameter to the existing ones created
-        by the base class and return the Task.
+        by the base class.
         """
-        db_task = super()._set_task_parameters(pool, region, response_rule,
-                                               size,
-                                               request)
-
-        TaskParameter.objects.create(
-            task=db_task,
-            name='receiving_system',
-            value=self.receiving_system
-        )
+        ret = super().get_task_parameters(pool, region, size, request)
+        ret.append(TaskParameter(name='receiving_system',
+                                 value=self.receiving_system))
         if self.extension_digit:
-            TaskParameter.objects.create(
-                task=db_task,
-                name='extension_digit',
-                value=self.extension_digit
-            )
-            TaskParameter.objects.create(
-                task=db_task,
-                name='company_prefix',
-                value=self.company_prefix
-            )
-        return db_task
+            ret += [
+                TaskParameter(name='extension_digit',
+                              value=self.extension_digit),
+                TaskParameter(name='company_prefix',
+                              value=self.company_prefix),
+            ]
+        return ret
 
     def check_object_key(self, object_key: etree.Element) -> tuple:
         """
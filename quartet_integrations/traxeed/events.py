@@ -0,0 +1,78 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from EPCPyYes.core.v1_2 import template_events
+from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
+from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
+from EPCPyYes.core.v1_2.events import BusinessTransaction, Source, Destination
+
+from quartet_integrations.traxeed.timeshift import utc_now
+
+
+def build_source_list(owning_party: str, location: str):
+    '''
+    :return: The owning party and location sources of a shipping event.
+    '''
+    return [
+        Source(source=owning_party,
+               source_type='urn:epcglobal:cbv:sdt:owning_party'),
+        Source(source=location,
+               source_type='urn:epcglobal:cbv:sdt:location')
+    ]
+
+
+def build_destination_list(owning_party: str, location: str):
+    '''
+    :return: The owning party and location destinations of a shipping event.
+    '''
+    return [
+        Destination(destination_type='urn:epcglobal:cbv:sdt:owning_party',
+                    destination=owning_party),
+        Destination(destination_type='urn:epcglobal:cbv:sdt:location',
+                    destination=location)
+    ]
+
+
+def build_shipping_event(parser, template, source_list=None,
+                         destination_list=None):
+    '''
+    Builds the shipping event for the SSCCs a Traxeed parser collected.
+    The time zone and locations are taken from the first aggregation event
+    and the PO from the parsed object events.
+    :param parser: A TraxeedBaseParser that has parsed its document.
+    :param template: The compiled template of the shipping event.
+    :param source_list: The EPCPyYes sources of the shipment.
+    :param destination_list: The EPCPyYes destinations of the shipment.
+    :return: A template_events.ObjectEvent.
+    '''
+    agg_event = parser.first_aggregation_event
+    biz_trans = BusinessTransaction(biz_transaction=parser.PO,
+                                    type="urn:epcglobal:cbv:btt:po")
+    now = utc_now()
+    return template_events.ObjectEvent(
+        epc_list=parser.sscc_list,
+        record_time=now,
+        event_time=now,
+        event_timezone_offset=agg_event.event_timezone_offset,
+        action="OBSERVE",
+        biz_step=BusinessSteps.shipping.value,
+        disposition=Disposition.in_transit.value,
+        read_point=agg_event.read_point,
+        biz_location=agg_event.biz_location,
+        business_transaction_list=[biz_trans],
+        source_list=source_list or [],
+        destination_list=destination_list or [],
+        env=template.environment,
+        template=template
+    )
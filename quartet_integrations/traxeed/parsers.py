@@ -13,25 +13,50 @@
 #
 # Copyright 2019 SerialLab Corp.  All rights reserved.
 import re
-import datetime
-from datetime import timedelta
 from gs123.check_digit import calculate_check_digit
 from EPCPyYes.core.v1_2 import template_events
 from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
 from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
 from eparsecis.eparsecis import FlexibleNSParser
 from quartet_integrations.extended.environment import get_default_environment
+from quartet_integrations.generic.ordered_set import OrderedSet
+from quartet_integrations.generic.parse_result import ParseResult
+from quartet_integrations.traxeed.timeshift import shift_time
 
 """
-    The TraxeedParser parses data EPCIS sent from Traxeed.    
+    The Traxeed parsers parse EPCIS sent from Traxeed.
 """
-class TraxeedParser(FlexibleNSParser):
+class TraxeedBaseParser(FlexibleNSParser):
     """
-        ctor
+    Collects the SSCCs, commissioned EPCs and ILMD from a Traxeed EPCIS
+    document and re-groups the commissioned EPCs into one commissioning
+    event per packaging level (eaches, cartons, partial cartons and
+    pallets).  SSCCs that turn out to be children of another SSCC are
+    moved out of the shipping SSCC list and the pallet event.
+
+    The SSCC list and the pallet commissioning event's EPC list are
+    `OrderedSet` instances so that the aggregation handling is O(1) per
+    child EPC.
+
+    When an `event_sink` callable is supplied each aggregation event is
+    handed to it as soon as it has been handled instead of being kept in
+    `_aggregation_events`, so the aggregation events of a large document can
+    be written out while it is being parsed.
+
+    Subclasses supply the templates and the packaging indicator digits
+    of the downstream system.
     """
-    def __init__(self, data, reg_ex, pack_levels=None):
+    # the sgtin indicator digits for eaches and cartons
+    each_indicator = '0'
+    carton_indicator = '5'
+    # the templates used to render the commissioning events
+    object_template_name = 'traxeed/tx_rf_object_events.xml'
+    pallet_template_name = None
+    partial_template_name = None
 
-        self._ssccs = []  # internal list to hold collected SSCCs
+    def __init__(self, data, reg_ex, pack_levels=None, event_sink=None):
+
+        self._ssccs = OrderedSet()  # internal set to hold collected SSCCs
         self._quantity = 0
         self._po = ""
         self._regEx = re.compile(reg_ex)
@@ -46,41 +71,44 @@ class TraxeedParser(FlexibleNSParser):
         self._record_time = None
         self._object_events = []
         self._aggregation_events = []
+        self._first_aggregation_event = None
+        self._event_sink = event_sink
         self.comm_eaches_event = None
         self.comm_cartons_event = None
         self.comm_partial_event = None
         self.comm_pallets_event = None
         self._pack_levels = pack_levels.split(',') if pack_levels and len(pack_levels) > 0 else []
         env = get_default_environment()
-        temp = env.get_template('traxeed/tx_hk_object_events.xml')
-        self._obj_template = temp
-        temp = env.get_template('traxeed/tx_hk_object_pallet.xml')
-        self._pallet_template = temp
-        temp = env.get_template('traxeed/tx_hk_object_partial.xml')
-        self._partial_template = temp
+        self._env = env
+        self._obj_template = env.get_template(self.object_template_name)
+        self._pallet_template = env.get_template(
+            self.pallet_template_name or self.object_template_name)
+        self._partial_template = env.get_template(
+            self.partial_template_name or self.object_template_name)
         # call the base constructor with the stream
-        super(TraxeedParser, self).__init__(stream=data)
+        super().__init__(stream=data)
+
+    def get_epcpyyes_object_event(self):
+        # use the shared environment so the default event template is not
+        # loaded and compiled again for every inbound event
+        return template_events.ObjectEvent(epc_list=[], quantity_list=[],
+                                           env=self._env)
+
+    def get_epcpyyes_aggregation_event(self):
+        return template_events.AggregationEvent(env=self._env)
 
-    """
-    """
     def handle_object_event(self, epcis_event: template_events.ObjectEvent):
 
         if epcis_event.ilmd is not None:
             for item in epcis_event.ilmd:
-                if item.name == 'lotNumber':
-                    self._lot_number = item.value
-                elif item.name == "itemExpirationDate":
-                    self._exp_date = item.value
-                elif item.name == "NDC":
-                    self._gtin = self._convert_ndc_gtin(item.value)
-                    self._ndc = item.value
+                self.handle_ilmd(item)
 
         self._biz_location = epcis_event.biz_location
         self._read_point = epcis_event.read_point
 
         if len(epcis_event.business_transaction_list) > 0:
-            po = epcis_event.business_transaction_list[0].biz_transaction
-            self._po = po.split(':')[5]
+            self._po = self.get_po(
+                epcis_event.business_transaction_list[0].biz_transaction)
 
         if epcis_event.action == "ADD":
             for epc in epcis_event.epc_list:
@@ -91,40 +119,85 @@ class TraxeedParser(FlexibleNSParser):
                 else:
                     m = self._regEx.match(epc)
                     if m:
-
                         parts = epc.split('.')
-                        if parts[1].startswith('0'):
+                        if parts[1].startswith(self.each_indicator):
                             # Add to Eaches commissioning Event
                             # adjust the quantity
                             self._quantity = self._quantity + 1
                             self._add_each(epcis_event, epc)
-                        elif parts[1].startswith('5'):
+                        elif parts[1].startswith(self.carton_indicator):
                             # Add to Cartons commissioning Event
                             self._add_carton(epcis_event, epc)
 
-
-
     def handle_aggregation_event(
         self,
         epcis_event: template_events.AggregationEvent
     ):
         if epcis_event.parent_id.startswith('urn:epc:id:sscc:'):
-           for epc in epcis_event.child_epcs:
-               if epc in self._ssccs:
-                  self._ssccs.remove(epc)
-                  if epc in self.comm_pallets_event.epc_list:
-                      self.comm_partial_event =  self._add_partial(epcis_event, epc)
-                      self.comm_pallets_event.epc_list.remove(epc)
-
+            for epc in epcis_event.child_epcs:
+                if epc in self._ssccs:
+                    self._ssccs.remove(epc)
+                    if epc in self.comm_pallets_event.epc_list:
+                        self._add_partial(epcis_event, epc)
+                        self.comm_pallets_event.epc_list.remove(epc)
 
         self._time_zone_offset = epcis_event.event_timezone_offset
-        t = datetime.datetime.strptime(epcis_event.record_time,'%Y-%m-%dT%H:%M:%SZ')
-        dt = t + timedelta(seconds=10)
-        epcis_event.record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        epcis_event.event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._aggregation_events.append(epcis_event)
+        # move the aggregation after the commissioning events
+        event_time = shift_time(epcis_event.record_time, 10)
+        epcis_event.record_time = event_time
+        epcis_event.event_time = event_time
+        self._record_time = event_time
+        self._event_time = event_time
+        if self._first_aggregation_event is None:
+            self._first_aggregation_event = epcis_event
+        if self._event_sink is not None:
+            self._event_sink(epcis_event)
+        else:
+            self._aggregation_events.append(epcis_event)
+
+    def handle_ilmd(self, item):
+        """
+        Called for each ILMD element of the inbound object events.
+        """
+        if item.name == 'lotNumber':
+            self._lot_number = item.value
+        elif item.name == "itemExpirationDate":
+            self._exp_date = item.value
+
+    def get_po(self, biz_transaction: str):
+        """
+        Returns the PO value to store from the first business transaction
+        of an object event.
+        """
+        return biz_transaction
+
+    def get_each_context(self, epcis_event):
+        """
+        Returns the template context values for the eaches commissioning
+        event.
+        """
+        return {'lot': self.lot_number, 'exp_date': self.exp_date}
+
+    def get_carton_context(self, epcis_event):
+        """
+        Returns the template context values for the cartons commissioning
+        event.
+        """
+        return {'lot': self.lot_number, 'exp_date': self.exp_date}
+
+    def get_pallet_context(self, epcis_event, epc):
+        """
+        Returns the template context values for the pallets commissioning
+        event.
+        """
+        return {'lot': self.lot_number, 'exp_date': self.exp_date}
+
+    def get_partial_context(self, epcis_event, epc):
+        """
+        Returns the template context values for the partial cartons
+        commissioning event.
+        """
+        return {'lot': self.lot_number, 'exp_date': self.exp_date}
 
     def _convert_ndc_gtin(self, ndc):
 
@@ -133,31 +206,9 @@ class TraxeedParser(FlexibleNSParser):
         ret_val = calculate_check_digit(gtin)
         return ret_val
 
-    def _add_each(self, epcis_event, epc):
-
-        if self.comm_eaches_event is None:
-           # A commissioning event for the Eaches does not exist
-           # Create one
-            self.comm_eaches_event = self._create_comm_eaches(epcis_event, epc)
-
-            self.comm_eaches_event._context['gtin'] = self.gtin
-            self.comm_eaches_event._context['ndc'] = self.ndc
-            self.comm_eaches_event._context['lot'] = self.lot_number
-            self.comm_eaches_event._context['exp_date'] = self.exp_date
-            self.comm_eaches_event._context['pack_level'] = "EA"
-            self.comm_eaches_event._context['po'] = self.PO
-            self.comm_eaches_event._context['location_id'] = epcis_event.biz_location.replace('urn:epc:id:sgln:', '')
-
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_eaches_event)
-        else:
-            # A commissioning event for the Eaches does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_eaches_event.epc_list.append(epc)
-
-    def _create_comm_eaches(self, epcis_event, epc):
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
+    def _create_commissioning_event(self, epcis_event, epc_list, template):
+        return template_events.ObjectEvent(
+            epc_list=epc_list,
             record_time=epcis_event.record_time,
             event_time=epcis_event.event_time,
             event_timezone_offset=epcis_event.event_timezone_offset,
@@ -166,29 +217,35 @@ class TraxeedParser(FlexibleNSParser):
             disposition=Disposition.active.value,
             read_point=epcis_event.read_point,
             biz_location=epcis_event.biz_location,
-            template=self._obj_template
+            env=self._env,
+            template=template
         )
 
-        return ret_val
+    def _add_each(self, epcis_event, epc):
+
+        if self.comm_eaches_event is None:
+            # A commissioning event for the Eaches does not exist
+            # Create one
+            self.comm_eaches_event = self._create_commissioning_event(
+                epcis_event, [epc], self._obj_template)
+            self.comm_eaches_event._context.update(
+                self.get_each_context(epcis_event))
+            # Add to the Object Events List of the Parser
+            self._object_events.append(self.comm_eaches_event)
+        else:
+            # A commissioning event for the Eaches does exist
+            # Add the epc to the epc_list of the event.
+            self.comm_eaches_event.epc_list.append(epc)
 
     def _add_carton(self, epcis_event, epc):
 
         if self.comm_cartons_event is None:
-           # A commissioning event for the Cartons does not exist
-           # Create one
-            self.comm_cartons_event = self._create_comm_cartons_event(epcis_event, epc)
-            gtin = self.gtin[1:13]
-            # change indicator
-            gtin = "5{0}".format(gtin)
-            gtin = calculate_check_digit(gtin)
-            self.comm_cartons_event._context['gtin'] = gtin
-            self.comm_cartons_event._context['ndc'] = self.ndc
-            self.comm_cartons_event._context['lot'] = self.lot_number
-            self.comm_cartons_event._context['exp_date'] = self.exp_date
-            self.comm_cartons_event._context['pack_level'] = "CA"
-            self.comm_cartons_event._context['po'] = self.PO
-            self.comm_cartons_event._context['location_id'] = epcis_event.biz_location.replace('urn:epc:id:sgln:', '')
-
+            # A commissioning event for the Cartons does not exist
+            # Create one
+            self.comm_cartons_event = self._create_commissioning_event(
+                epcis_event, [epc], self._obj_template)
+            self.comm_cartons_event._context.update(
+                self.get_carton_context(epcis_event))
             # Add to the Object Events List of the Parser
             self._object_events.append(self.comm_cartons_event)
         else:
@@ -196,43 +253,14 @@ class TraxeedParser(FlexibleNSParser):
             # Add the epc to the epc_list of the event.
             self.comm_cartons_event.epc_list.append(epc)
 
-    def _create_comm_cartons_event(self, epcis_event, epc):
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
     def _add_partial(self, epcis_event, epc):
 
         if self.comm_partial_event is None:
             # A commissioning event for the Partial Cartons does not exist
             # Create one
             self.comm_partial_event = self._create_comm_partial_event(epcis_event, epc)
-
-            val = epc.split(':')
-            val = val[4].split('.')
-            company_prefix = val[0]
-            filter = val[1][0]
-
-            self.comm_partial_event._context['company_prefix'] = company_prefix
-            self.comm_partial_event._context['filter'] = filter
-            self.comm_partial_event._context['pack_level'] = "CA"
-            self.comm_partial_event._context['po'] = self.PO
-            self.comm_partial_event._context['location_id'] = epcis_event.biz_location.replace('urn:epc:id:sgln:', '')
-
-
-
+            self.comm_partial_event._context.update(
+                self.get_partial_context(epcis_event, epc))
             # Add to the Object Events List of the Parser
             self._object_events.append(self.comm_partial_event)
         else:
@@ -240,7 +268,6 @@ class TraxeedParser(FlexibleNSParser):
             # Add the epc to the epc_list of the event.
             self.comm_partial_event.epc_list.append(epc)
 
-
     def _create_comm_partial_event(self, epcis_event, epc):
 
         # the event comming in is an AggregationEvent because the partial can only be discovered
@@ -251,13 +278,11 @@ class TraxeedParser(FlexibleNSParser):
             evt = self._object_events[0]
             record_time = evt.record_time
             event_time = evt.event_time
-        except:
+        except IndexError:
             # if there are no events in _object_events
             # fall back to the epcis_event and adjust the times down
             evt = epcis_event
-            t = datetime.datetime.strptime(epcis_event.record_time, '%Y-%m-%dT%H:%M:%SZ')
-            dt = t - timedelta(seconds=10)
-            record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+            record_time = shift_time(epcis_event.record_time, -10)
             event_time = record_time
 
         ret_val = template_events.ObjectEvent(
@@ -270,6 +295,7 @@ class TraxeedParser(FlexibleNSParser):
             disposition=Disposition.active.value,
             read_point=evt.read_point,
             biz_location=evt.biz_location,
+            env=self._env,
             template=self._partial_template
         )
 
@@ -278,38 +304,36 @@ class TraxeedParser(FlexibleNSParser):
     def _add_pallet(self, epcis_event, epc):
 
         if self.comm_pallets_event is None:
-           # A commissioning event for the Pallets does not exist
-           # Create one
-            self.comm_pallets_event = template_events.ObjectEvent(
-                             epc_list=[epc],
-                             record_time=epcis_event.record_time,
-                             event_time=epcis_event.event_time,
-                             event_timezone_offset=epcis_event.event_timezone_offset,
-                             action = epcis_event.action,
-                             biz_step = BusinessSteps.commissioning.value,
-                             disposition = Disposition.active.value,
-                             read_point = epcis_event.read_point,
-                             biz_location = epcis_event.biz_location,
-                             template=self._pallet_template
-                        )
-            val = epc.split(':')
-            val = val[4].split('.')
-            company_prefix = val[0]
-            filter = val[1][0]
-
-            self.comm_pallets_event._context['company_prefix'] = company_prefix
-            self.comm_pallets_event._context['filter'] = filter
-            self.comm_pallets_event._context['pack_level'] = "PL"
-            self.comm_pallets_event._context['po'] = self.PO
-            self.comm_pallets_event._context['location_id'] = epcis_event.biz_location.replace('urn:epc:id:sgln:','')
-
+            # A commissioning event for the Pallets does not exist
+            # Create one
+            self.comm_pallets_event = self._create_commissioning_event(
+                epcis_event, OrderedSet([epc]), self._pallet_template)
+            self.comm_pallets_event._context.update(
+                self.get_pallet_context(epcis_event, epc))
             # Add to the Object Events List of the Parser
             self._object_events.append(self.comm_pallets_event)
         else:
-            # A commissioning event for the Cartons does exist
+            # A commissioning event for the Pallets does exist
             # Add the epc to the epc_list of the event.
             self.comm_pallets_event.epc_list.append(epc)
 
+    def get_parse_result(self) -> ParseResult:
+        """
+        Returns the SSCCs, quantity and ILMD collected by the parse.
+        Only call after parse() is called.
+        """
+        return ParseResult(
+            sscc_list=self._ssccs,
+            quantity=self._quantity,
+            lot_number=self._lot_number,
+            exp_date=self._exp_date,
+            ndc=self._ndc,
+            gtin=self._gtin,
+            PO=self._po,
+            biz_location=self._biz_location,
+            read_point=self._read_point
+        )
+
     @property
     def quantity(self):
         return self._quantity
@@ -318,7 +342,7 @@ class TraxeedParser(FlexibleNSParser):
     def sscc_list(self):
         # Returns the SSCCs collected in self.handle_object_event
         # Only call after parse() is called.
-        return self._ssccs
+        return list(self._ssccs)
 
     @property
     def lot_number(self):
@@ -336,14 +360,16 @@ class TraxeedParser(FlexibleNSParser):
     def ndc(self):
         return self._ndc
 
-    @property
-    def cartons(self):
-        return self._cartons
-
     @property
     def object_events(self):
         return self._object_events
 
+    @property
+    def first_aggregation_event(self):
+        # the first aggregation event is kept even when the aggregation
+        # events are sent to an event sink
+        return self._first_aggregation_event
+
     @property
     def read_point(self):
         return self._read_point
@@ -369,864 +395,94 @@ class TraxeedParser(FlexibleNSParser):
         return self._record_time
 
 
-class TraxeedRfxcelParser(FlexibleNSParser):
-
-    def __init__(self, data, reg_ex):
-
-        self._ssccs = []  # internal list to hold collected SSCCs
-        self._quantity = 0
-        self._po = ""
-        self._regEx = re.compile(reg_ex)
-        self._lot_number = ""
-        self._gtin = ""
-        self._ndc = ""
-        self._exp_date = ""
-        self._biz_location = ""
-        self._read_point = ""
-        self._event_time = None
-        self._time_zone_offset = None
-        self._record_time = None
-        self._object_events = []
-        self._aggregation_events = []
-        self.comm_eaches_event = None
-        self.comm_cartons_event = None
-        self.comm_partial_event = None
-        self.comm_pallets_event = None
-        env = get_default_environment()
-        temp = env.get_template('traxeed/tx_rf_object_events.xml')
-        self._obj_template = temp
-        # call the base constructor with the stream
-        super(TraxeedRfxcelParser, self).__init__(stream=data)
-
-
-    def handle_object_event(self, epcis_event: template_events.ObjectEvent):
-
-        if epcis_event.ilmd is not None:
-            for item in epcis_event.ilmd:
-                if item.name == 'lotNumber':
-                    self._lot_number = item.value
-                elif item.name == "itemExpirationDate":
-                    self._exp_date = item.value
-
-        self._biz_location = epcis_event.biz_location
-        self._read_point = epcis_event.read_point
-
-        if len(epcis_event.business_transaction_list) > 0:
-            self._po = epcis_event.business_transaction_list[0].biz_transaction
-
-        if epcis_event.action == "ADD":
-            for epc in epcis_event.epc_list:
-                if epc.startswith('urn:epc:id:sscc:'):
-                    self._ssccs.append(epc)
-                    # Add to Pallets commissioning Event
-                    self._add_pallet(epcis_event, epc)
-                else:
-                    m = self._regEx.match(epc)
-                    if m:
-                        parts = epc.split('.')
-                        if parts[1].startswith('0'):
-                            # Add to Eaches commissioning Event
-                            # adjust the quantity
-                            self._quantity = self._quantity + 1
-                            self._add_each(epcis_event, epc)
-                        elif parts[1].startswith('2'):
-                            # Add to Cartons commissioning Event
-                            self._add_carton(epcis_event, epc)
-
-    def handle_aggregation_event(
-        self,
-        epcis_event: template_events.AggregationEvent
-    ):
-        if epcis_event.parent_id.startswith('urn:epc:id:sscc:'):
-           for epc in epcis_event.child_epcs:
-               if epc in self._ssccs:
-                  self._ssccs.remove(epc)
-                  if epc in self.comm_pallets_event.epc_list:
-                      self.comm_partial_event =  self._add_partial(epcis_event, epc)
-                      self.comm_pallets_event.epc_list.remove(epc)
-
-
-        self._time_zone_offset = epcis_event.event_timezone_offset
-        t = datetime.datetime.strptime(epcis_event.record_time,'%Y-%m-%dT%H:%M:%SZ')
-        dt = t + timedelta(seconds=10)
-        epcis_event.record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        epcis_event.event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._aggregation_events.append(epcis_event)
-
-
-    def _add_carton(self, epcis_event, epc):
-
-        if self.comm_cartons_event is None:
-           # A commissioning event for the Cartons does not exist
-           # Create one
-            self.comm_cartons_event = self._create_comm_cartons_event(epcis_event, epc)
-
-            self.comm_cartons_event._context['lot'] = self.lot_number
-            self.comm_cartons_event._context['exp_date'] = self.exp_date
-
-
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_cartons_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_cartons_event.epc_list.append(epc)
-
-    def _create_comm_cartons_event(self, epcis_event, epc):
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    def _add_partial(self, epcis_event, epc):
-
-        if self.comm_partial_event is None:
-            # A commissioning event for the Partial Cartons does not exist
-            # Create one
-            self.comm_partial_event = self._create_comm_partial_event(epcis_event, epc)
-            self.comm_partial_event._context['lot'] = self.lot_number
-            self.comm_partial_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_partial_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_partial_event.epc_list.append(epc)
-
-
-    def _create_comm_partial_event(self, epcis_event, epc):
-
-        # the event comming in is an AggregationEvent because the partial can only be discovered
-        # by watching the aggregation events in the handle_aggregation method. So to make sure
-        # the record and event times are in sync with the commissioning events, get a ref to
-        # the first object event and use that record and event time.
-        try:
-            evt = self._object_events[0]
-            record_time = evt.record_time
-            event_time = evt.event_time
-        except:
-            # if there are no events in _object_events
-            # fall back to the epcis_event and adjust the times down
-            evt = epcis_event
-            t = datetime.datetime.strptime(epcis_event.record_time, '%Y-%m-%dT%H:%M:%SZ')
-            dt = t - timedelta(seconds=10)
-            record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            event_time = record_time
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=record_time,
-            event_time=event_time,
-            event_timezone_offset=evt.event_timezone_offset,
-            action=evt.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=evt.read_point,
-            biz_location=evt.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    def _add_pallet(self, epcis_event, epc):
-
-        if self.comm_pallets_event is None:
-           # A commissioning event for the Pallets does not exist
-           # Create one
-            self.comm_pallets_event = template_events.ObjectEvent(
-                             epc_list=[epc],
-                             record_time=epcis_event.record_time,
-                             event_time=epcis_event.event_time,
-                             event_timezone_offset=epcis_event.event_timezone_offset,
-                             action = epcis_event.action,
-                             biz_step = BusinessSteps.commissioning.value,
-                             disposition = Disposition.active.value,
-                             read_point = epcis_event.read_point,
-                             biz_location = epcis_event.biz_location,
-                             template=self._obj_template
-                        )
-
-            self.comm_pallets_event._context['lot'] = self.lot_number
-            self.comm_pallets_event._context['exp_date'] = self.exp_date
-
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_pallets_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_pallets_event.epc_list.append(epc)
-
-    def _add_each(self, epcis_event, epc):
-
-        if self.comm_eaches_event is None:
-           # A commissioning event for the Eaches does not exist
-           # Create one
-            self.comm_eaches_event = self._create_comm_eaches(epcis_event, epc)
-            self.comm_eaches_event._context['lot'] = self.lot_number
-            self.comm_eaches_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_eaches_event)
+class TraxeedParser(TraxeedBaseParser):
+    """
+    Parses Traxeed EPCIS into the TraceLink (HK) commissioning events.
+    """
+    each_indicator = '0'
+    carton_indicator = '5'
+    object_template_name = 'traxeed/tx_hk_object_events.xml'
+    pallet_template_name = 'traxeed/tx_hk_object_pallet.xml'
+    partial_template_name = 'traxeed/tx_hk_object_partial.xml'
+
+    def handle_ilmd(self, item):
+        if item.name == "NDC":
+            self._gtin = self._convert_ndc_gtin(item.value)
+            self._ndc = item.value
         else:
-            # A commissioning event for the Eaches does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_eaches_event.epc_list.append(epc)
-
-    def _create_comm_eaches(self, epcis_event, epc):
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    @property
-    def quantity(self):
-        return self._quantity
-
-    @property
-    def sscc_list(self):
-        # Returns the SSCCs collected in self.handle_object_event
-        # Only call after parse() is called.
-        return self._ssccs
+            super().handle_ilmd(item)
+
+    def get_po(self, biz_transaction: str):
+        return biz_transaction.split(':')[5]
+
+    def get_each_context(self, epcis_event):
+        return {
+            'gtin': self.gtin,
+            'ndc': self.ndc,
+            'lot': self.lot_number,
+            'exp_date': self.exp_date,
+            'pack_level': "EA",
+            'po': self.PO,
+            'location_id': self._get_location_id(epcis_event)
+        }
+
+    def get_carton_context(self, epcis_event):
+        gtin = self.gtin[1:13]
+        # change indicator
+        gtin = "5{0}".format(gtin)
+        gtin = calculate_check_digit(gtin)
+        return {
+            'gtin': gtin,
+            'ndc': self.ndc,
+            'lot': self.lot_number,
+            'exp_date': self.exp_date,
+            'pack_level': "CA",
+            'po': self.PO,
+            'location_id': self._get_location_id(epcis_event)
+        }
+
+    def get_pallet_context(self, epcis_event, epc):
+        return self._get_sscc_context(epcis_event, epc, "PL")
+
+    def get_partial_context(self, epcis_event, epc):
+        return self._get_sscc_context(epcis_event, epc, "CA")
+
+    def _get_sscc_context(self, epcis_event, epc, pack_level):
+        val = epc.split(':')
+        val = val[4].split('.')
+        company_prefix = val[0]
+        filter = val[1][0]
+        return {
+            'company_prefix': company_prefix,
+            'filter': filter,
+            'pack_level': pack_level,
+            'po': self.PO,
+            'location_id': self._get_location_id(epcis_event)
+        }
+
+    def _get_location_id(self, epcis_event):
+        return epcis_event.biz_location.replace('urn:epc:id:sgln:', '')
+
+
+class TraxeedRfxcelParser(TraxeedBaseParser):
+    """
+    Parses Traxeed EPCIS into rfxcel commissioning events.
+    """
+    each_indicator = '0'
+    carton_indicator = '2'
 
-    @property
-    def lot_number(self):
-        return self._lot_number
 
-    @property
-    def exp_date(self):
-        return self._exp_date
+class TraxeedIRISParser(TraxeedBaseParser):
+    """
+    Parses Traxeed EPCIS into IRIS commissioning events.
+    """
+    each_indicator = '1'
+    carton_indicator = '2'
 
-    @property
-    def gtin(self):
-        return self._gtin
 
-    @property
-    def ndc(self):
-        return self._ndc
-
-    @property
-    def cartons(self):
-        return self._cartons
-
-    @property
-    def object_events(self):
-        return self._object_events
-
-    @property
-    def read_point(self):
-        return self._read_point
-
-    @property
-    def biz_location(self):
-        return self._biz_location
-
-    @property
-    def PO(self):
-        return self._po
-
-    @property
-    def event_time(self):
-        return self._event_time
-
-    @property
-    def time_zone_offset(self):
-        return self._time_zone_offset
-
-    @property
-    def record_time(self):
-        return self._record_time
-
-
-class TraxeedIRISParser(FlexibleNSParser):
-
-    def __init__(self, data, reg_ex):
-
-        self._ssccs = []  # internal list to hold collected SSCCs
-        self._quantity = 0
-        self._po = ""
-        self._regEx = re.compile(reg_ex)
-        self._lot_number = ""
-        self._gtin = ""
-        self._ndc = ""
-        self._exp_date = ""
-        self._biz_location = ""
-        self._read_point = ""
-        self._event_time = None
-        self._time_zone_offset = None
-        self._record_time = None
-        self._object_events = []
-        self._aggregation_events = []
-        self.comm_eaches_event = None
-        self.comm_cartons_event = None
-        self.comm_partial_event = None
-        self.comm_pallets_event = None
-        env = get_default_environment()
-        temp = env.get_template('traxeed/tx_rf_object_events.xml')
-        self._obj_template = temp
-        # call the base constructor with the stream
-        super(TraxeedIRISParser, self).__init__(stream=data)
-
-
-    def handle_object_event(self, epcis_event: template_events.ObjectEvent):
-
-        if epcis_event.ilmd is not None:
-            for item in epcis_event.ilmd:
-                if item.name == 'lotNumber':
-                    self._lot_number = item.value
-                elif item.name == "itemExpirationDate":
-                    self._exp_date = item.value
-
-        self._biz_location = epcis_event.biz_location
-        self._read_point = epcis_event.read_point
-
-        if len(epcis_event.business_transaction_list) > 0:
-            self._po = epcis_event.business_transaction_list[0].biz_transaction
-
-        if epcis_event.action == "ADD":
-            for epc in epcis_event.epc_list:
-                if epc.startswith('urn:epc:id:sscc:'):
-                    self._ssccs.append(epc)
-                    # Add to Pallets commissioning Event
-                    self._add_pallet(epcis_event, epc)
-                else:
-                    m = self._regEx.match(epc)
-                    if m:
-                        parts = epc.split('.')
-                        if parts[1].startswith('1'):
-                            # Add to Eaches commissioning Event
-                            # adjust the quantity
-                            self._quantity = self._quantity + 1
-                            self._add_each(epcis_event, epc)
-                        elif parts[1].startswith('2'):
-                            # Add to Cartons commissioning Event
-                            self._add_carton(epcis_event, epc)
-
-    def handle_aggregation_event(
-        self,
-        epcis_event: template_events.AggregationEvent
-    ):
-        if epcis_event.parent_id.startswith('urn:epc:id:sscc:'):
-           for epc in epcis_event.child_epcs:
-               if epc in self._ssccs:
-                  self._ssccs.remove(epc)
-                  if epc in self.comm_pallets_event.epc_list:
-                      self.comm_partial_event =  self._add_partial(epcis_event, epc)
-                      self.comm_pallets_event.epc_list.remove(epc)
-
-
-        self._time_zone_offset = epcis_event.event_timezone_offset
-        try:
-            t = datetime.datetime.strptime(epcis_event.record_time,'%Y-%m-%dT%H:%M:%SZ')
-        except:
-            t = datetime.datetime.strptime(epcis_event.record_time, '%Y-%m-%dT%H:%M:%S.%f')
-        dt = t + timedelta(seconds=10)
-        epcis_event.record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        epcis_event.event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._aggregation_events.append(epcis_event)
-
-
-    def _add_carton(self, epcis_event, epc):
-
-        if self.comm_cartons_event is None:
-           # A commissioning event for the Cartons does not exist
-           # Create one
-            self.comm_cartons_event = self._create_comm_cartons_event(epcis_event, epc)
-            self.comm_cartons_event._context['lot'] = self.lot_number
-            self.comm_cartons_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_cartons_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_cartons_event.epc_list.append(epc)
-
-    def _create_comm_cartons_event(self, epcis_event, epc):
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    def _add_partial(self, epcis_event, epc):
-
-        if self.comm_partial_event is None:
-            # A commissioning event for the Partial Cartons does not exist
-            # Create one
-            self.comm_partial_event = self._create_comm_partial_event(epcis_event, epc)
-            self.comm_partial_event._context['lot'] = self.lot_number
-            self.comm_partial_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_partial_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_partial_event.epc_list.append(epc)
-
-
-    def _create_comm_partial_event(self, epcis_event, epc):
-
-        # the event comming in is an AggregationEvent because the partial can only be discovered
-        # by watching the aggregation events in the handle_aggregation method. So to make sure
-        # the record and event times are in sync with the commissioning events, get a ref to
-        # the first object event and use that record and event time.
-        try:
-            evt = self._object_events[0]
-            record_time = evt.record_time
-            event_time = evt.event_time
-        except:
-            # if there are no events in _object_events
-            # fall back to the epcis_event and adjust the times down
-            evt = epcis_event
-            t = datetime.datetime.strptime(epcis_event.record_time, '%Y-%m-%dT%H:%M:%SZ')
-            dt = t - timedelta(seconds=10)
-            record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            event_time = record_time
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=record_time,
-            event_time=event_time,
-            event_timezone_offset=evt.event_timezone_offset,
-            action=evt.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=evt.read_point,
-            biz_location=evt.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    def _add_pallet(self, epcis_event, epc):
-
-        if self.comm_pallets_event is None:
-           # A commissioning event for the Pallets does not exist
-           # Create one
-            self.comm_pallets_event = template_events.ObjectEvent(
-                             epc_list=[epc],
-                             record_time=epcis_event.record_time,
-                             event_time=epcis_event.event_time,
-                             event_timezone_offset=epcis_event.event_timezone_offset,
-                             action = epcis_event.action,
-                             biz_step = BusinessSteps.commissioning.value,
-                             disposition = Disposition.active.value,
-                             read_point = epcis_event.read_point,
-                             biz_location = epcis_event.biz_location,
-                             template=self._obj_template
-                        )
-            self.comm_pallets_event._context['lot'] = self.lot_number
-            self.comm_pallets_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_pallets_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_pallets_event.epc_list.append(epc)
-
-    def _add_each(self, epcis_event, epc):
-
-        if self.comm_eaches_event is None:
-           # A commissioning event for the Eaches does not exist
-           # Create one
-            self.comm_eaches_event = self._create_comm_eaches(epcis_event, epc)
-            self.comm_eaches_event._context['lot'] = self.lot_number
-            self.comm_eaches_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_eaches_event)
-        else:
-            # A commissioning event for the Eaches does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_eaches_event.epc_list.append(epc)
-
-    def _create_comm_eaches(self, epcis_event, epc):
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    @property
-    def quantity(self):
-        return self._quantity
-
-    @property
-    def sscc_list(self):
-        # Returns the SSCCs collected in self.handle_object_event
-        # Only call after parse() is called.
-        return self._ssccs
-
-    @property
-    def lot_number(self):
-        return self._lot_number
-
-    @property
-    def exp_date(self):
-        return self._exp_date
-
-    @property
-    def gtin(self):
-        return self._gtin
-
-    @property
-    def ndc(self):
-        return self._ndc
-
-    @property
-    def object_events(self):
-        return self._object_events
-
-    @property
-    def read_point(self):
-        return self._read_point
-
-    @property
-    def biz_location(self):
-        return self._biz_location
-
-    @property
-    def PO(self):
-        return self._po
-
-    @property
-    def event_time(self):
-        return self._event_time
-
-    @property
-    def time_zone_offset(self):
-        return self._time_zone_offset
-
-    @property
-    def record_time(self):
-        return self._record_time
-
-class TraxeedCIVICAParser(FlexibleNSParser):
-
-    def __init__(self, data, reg_ex):
-
-        self._ssccs = []  # internal list to hold collected SSCCs
-        self._quantity = 0
-        self._po = ""
-        self._regEx = re.compile(reg_ex)
-        self._lot_number = ""
-        self._gtin = ""
-        self._ndc = ""
-        self._exp_date = ""
-        self._biz_location = ""
-        self._read_point = ""
-        self._event_time = None
-        self._time_zone_offset = None
-        self._record_time = None
-        self._object_events = []
-        self._aggregation_events = []
-        self.comm_eaches_event = None
-        self.comm_cartons_event = None
-        self.comm_partial_event = None
-        self.comm_pallets_event = None
-        env = get_default_environment()
-        temp = env.get_template('traxeed/tx_rf_object_events.xml')
-        self._obj_template = temp
-        # call the base constructor with the stream
-        super(TraxeedCIVICAParser, self).__init__(stream=data)
-
-
-    def handle_object_event(self, epcis_event: template_events.ObjectEvent):
-
-        if epcis_event.ilmd is not None:
-            for item in epcis_event.ilmd:
-                if item.name == 'lotNumber':
-                    self._lot_number = item.value
-                elif item.name == "itemExpirationDate":
-                    self._exp_date = item.value
-
-        self._biz_location = epcis_event.biz_location
-        self._read_point = epcis_event.read_point
-
-        if len(epcis_event.business_transaction_list) > 0:
-            self._po = epcis_event.business_transaction_list[0].biz_transaction
-
-        if epcis_event.action == "ADD":
-            for epc in epcis_event.epc_list:
-                if epc.startswith('urn:epc:id:sscc:'):
-                    self._ssccs.append(epc)
-                    # Add to Pallets commissioning Event
-                    self._add_pallet(epcis_event, epc)
-                else:
-                    m = self._regEx.match(epc)
-                    if m:
-                        parts = epc.split('.')
-                        if parts[1].startswith('3'):
-                            # Add to Eaches commissioning Event
-                            # adjust the quantity
-                            self._quantity = self._quantity + 1
-                            self._add_each(epcis_event, epc)
-                        elif parts[1].startswith('5'):
-                            # Add to Cartons commissioning Event
-                            self._add_carton(epcis_event, epc)
-
-    def handle_aggregation_event(
-        self,
-        epcis_event: template_events.AggregationEvent
-    ):
-        if epcis_event.parent_id.startswith('urn:epc:id:sscc:'):
-           for epc in epcis_event.child_epcs:
-               if epc in self._ssccs:
-                  self._ssccs.remove(epc)
-                  if epc in self.comm_pallets_event.epc_list:
-                      self.comm_partial_event =  self._add_partial(epcis_event, epc)
-                      self.comm_pallets_event.epc_list.remove(epc)
-
-
-        self._time_zone_offset = epcis_event.event_timezone_offset
-        t = datetime.datetime.strptime(epcis_event.record_time,'%Y-%m-%dT%H:%M:%SZ')
-        dt = t + timedelta(seconds=10)
-        epcis_event.record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        epcis_event.event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._event_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        self._aggregation_events.append(epcis_event)
-
-
-    def _add_carton(self, epcis_event, epc):
-
-        if self.comm_cartons_event is None:
-           # A commissioning event for the Cartons does not exist
-           # Create one
-            self.comm_cartons_event = self._create_comm_cartons_event(epcis_event, epc)
-
-            self.comm_cartons_event._context['lot'] = self.lot_number
-            self.comm_cartons_event._context['exp_date'] = self.exp_date
-
-
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_cartons_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_cartons_event.epc_list.append(epc)
-
-    def _create_comm_cartons_event(self, epcis_event, epc):
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    def _add_partial(self, epcis_event, epc):
-
-        if self.comm_partial_event is None:
-            # A commissioning event for the Partial Cartons does not exist
-            # Create one
-            self.comm_partial_event = self._create_comm_partial_event(epcis_event, epc)
-            self.comm_partial_event._context['lot'] = self.lot_number
-            self.comm_partial_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_partial_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_partial_event.epc_list.append(epc)
-
-
-    def _create_comm_partial_event(self, epcis_event, epc):
-
-        # the event comming in is an AggregationEvent because the partial can only be discovered
-        # by watching the aggregation events in the handle_aggregation method. So to make sure
-        # the record and event times are in sync with the commissioning events, get a ref to
-        # the first object event and use that record and event time.
-        try:
-            evt = self._object_events[0]
-            record_time = evt.record_time
-            event_time = evt.event_time
-        except:
-            # if there are no events in _object_events
-            # fall back to the epcis_event and adjust the times down
-            evt = epcis_event
-            t = datetime.datetime.strptime(epcis_event.record_time, '%Y-%m-%dT%H:%M:%SZ')
-            dt = t - timedelta(seconds=10)
-            record_time = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            event_time = record_time
-
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=record_time,
-            event_time=event_time,
-            event_timezone_offset=evt.event_timezone_offset,
-            action=evt.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=evt.read_point,
-            biz_location=evt.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    def _add_pallet(self, epcis_event, epc):
-
-        if self.comm_pallets_event is None:
-           # A commissioning event for the Pallets does not exist
-           # Create one
-            self.comm_pallets_event = template_events.ObjectEvent(
-                             epc_list=[epc],
-                             record_time=epcis_event.record_time,
-                             event_time=epcis_event.event_time,
-                             event_timezone_offset=epcis_event.event_timezone_offset,
-                             action = epcis_event.action,
-                             biz_step = BusinessSteps.commissioning.value,
-                             disposition = Disposition.active.value,
-                             read_point = epcis_event.read_point,
-                             biz_location = epcis_event.biz_location,
-                             template=self._obj_template
-                        )
-
-            self.comm_pallets_event._context['lot'] = self.lot_number
-            self.comm_pallets_event._context['exp_date'] = self.exp_date
-
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_pallets_event)
-        else:
-            # A commissioning event for the Cartons does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_pallets_event.epc_list.append(epc)
-
-    def _add_each(self, epcis_event, epc):
-
-        if self.comm_eaches_event is None:
-           # A commissioning event for the Eaches does not exist
-           # Create one
-            self.comm_eaches_event = self._create_comm_eaches(epcis_event, epc)
-            self.comm_eaches_event._context['lot'] = self.lot_number
-            self.comm_eaches_event._context['exp_date'] = self.exp_date
-            # Add to the Object Events List of the Parser
-            self._object_events.append(self.comm_eaches_event)
-        else:
-            # A commissioning event for the Eaches does exist
-            # Add the epc to the epc_list of the event.
-            self.comm_eaches_event.epc_list.append(epc)
-
-    def _create_comm_eaches(self, epcis_event, epc):
-        ret_val = template_events.ObjectEvent(
-            epc_list=[epc],
-            record_time=epcis_event.record_time,
-            event_time=epcis_event.event_time,
-            event_timezone_offset=epcis_event.event_timezone_offset,
-            action=epcis_event.action,
-            biz_step=BusinessSteps.commissioning.value,
-            disposition=Disposition.active.value,
-            read_point=epcis_event.read_point,
-            biz_location=epcis_event.biz_location,
-            template=self._obj_template
-        )
-
-        return ret_val
-
-    @property
-    def quantity(self):
-        return self._quantity
-
-    @property
-    def sscc_list(self):
-        # Returns the SSCCs collected in self.handle_object_event
-        # Only call after parse() is called.
-        return self._ssccs
-
-    @property
-    def lot_number(self):
-        return self._lot_number
-
-    @property
-    def exp_date(self):
-        return self._exp_date
-
-    @property
-    def gtin(self):
-        return self._gtin
-
-    @property
-    def ndc(self):
-        return self._ndc
-
-    @property
-    def cartons(self):
-        return self._cartons
-
-    @property
-    def object_events(self):
-        return self._object_events
-
-    @property
-    def read_point(self):
-        return self._read_point
-
-    @property
-    def biz_location(self):
-        return self._biz_location
-
-    @property
-    def PO(self):
-        return self._po
-
-    @property
-    def event_time(self):
-        return self._event_time
-
-    @property
-    def time_zone_offset(self):
-        return self._time_zone_offset
-
-    @property
-    def record_time(self):
-        return self._record_time
+class TraxeedCIVICAParser(TraxeedBaseParser):
+    """
+    Parses Traxeed EPCIS into CIVICA commissioning events.
+    """
+    each_indicator = '3'
+    carton_indicator = '5'
@@ -0,0 +1,146 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+"""
+The downstream systems Traxeed EPCIS is converted for.
+
+A profile names the parser that re-groups the inbound events and the
+templates the outbound document is rendered with.  Additional partners can
+be configured without code changes through the
+`QUARTET_INTEGRATIONS_TRAXEED_PROFILES` setting, for example::
+
+    QUARTET_INTEGRATIONS_TRAXEED_PROFILES = {
+        'acme': {
+            'parser_class':
+                'quartet_integrations.traxeed.parsers.TraxeedRfxcelParser',
+            'document_template': 'acme/acme_epcis_document.xml',
+        }
+    }
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from quartet_integrations.extended.environment import get_default_environment
+from quartet_integrations.traxeed.parsers import (
+    TraxeedParser,
+    TraxeedRfxcelParser,
+    TraxeedIRISParser,
+    TraxeedCIVICAParser
+)
+
+
+class TraxeedProfile:
+    """
+    The parser and templates for one Traxeed downstream partner.  The
+    templates are resolved on first use and kept on the profile, which
+    lives for the life of the process.
+    """
+
+    def __init__(self, name, parser_class, document_template,
+                 shipping_template='traxeed/tx_rf_object_events.xml',
+                 ship=True):
+        '''
+        :param name: The name of the profile.
+        :param parser_class: The TraxeedBaseParser subclass or the dotted
+        path to one.
+        :param document_template: The outbound EPCIS document template.
+        :param shipping_template: The template of the shipping event.
+        :param ship: Whether or not a shipping event is appended to the
+        outbound document.
+        '''
+        if isinstance(parser_class, str):
+            parser_class = import_string(parser_class)
+        self.name = name
+        self.parser_class = parser_class
+        self.document_template_name = document_template
+        self.shipping_template_name = shipping_template
+        self.ship = ship
+        self._document_template = None
+        self._shipping_template = None
+
+    @property
+    def document_template(self):
+        if self._document_template is None:
+            self._document_template = get_default_environment().get_template(
+                self.document_template_name)
+        return self._document_template
+
+    @property
+    def shipping_template(self):
+        if self._shipping_template is None:
+            self._shipping_template = get_default_environment().get_template(
+                self.shipping_template_name)
+        return self._shipping_template
+
+    def get_parser(self, stream, reg_ex, event_sink=None):
+        '''
+        :param stream: The inbound EPCIS stream.
+        :param reg_ex: The regular expression matching the counted SGTINs.
+        :param event_sink: An optional callable the aggregation events
+        are passed to.
+        :return: A new parser for the stream.
+        '''
+        return self.parser_class(stream, reg_ex=reg_ex,
+                                 event_sink=event_sink)
+
+    def __repr__(self):
+        return 'TraxeedProfile(%r)' % self.name
+
+
+class ProfileNotFound(Exception):
+    pass
+
+
+_profiles = {}
+
+
+def register_profile(profile: TraxeedProfile):
+    '''
+    Adds a profile, replacing any profile with the same name.
+    :param profile: The profile to add.
+    :return: The profile.
+    '''
+    _profiles[profile.name.lower()] = profile
+    return profile
+
+
+def get_profile(name: str) -> TraxeedProfile:
+    '''
+    Returns a profile by name, the name is not case sensitive.
+    :param name: The profile name.
+    :return: The TraxeedProfile.
+    '''
+    try:
+        return _profiles[name.lower()]
+    except KeyError:
+        raise ProfileNotFound(
+            'There is no Traxeed profile named %s.  The available profiles '
+            'are %s.' % (name, ', '.join(sorted(_profiles)))
+        )
+
+
+register_profile(TraxeedProfile(
+    'rfxcel', TraxeedRfxcelParser, 'traxeed/tx_rfxcel_epcis_document.xml'))
+register_profile(TraxeedProfile(
+    'IRIS', TraxeedIRISParser, 'traxeed/tx_seton_epcis_document.xml'))
+register_profile(TraxeedProfile(
+    'CIVICA', TraxeedCIVICAParser, 'traxeed/tx_civica_epcis_document.xml'))
+# the HK shipping event is rendered separately by the ShipTraxeedStep
+register_profile(TraxeedProfile(
+    'HK', TraxeedParser, 'traxeed/tx_hk_epcis_document.xml', ship=False))
+
+for _name, _kwargs in getattr(
+    settings, 'QUARTET_INTEGRATIONS_TRAXEED_PROFILES', {}
+).items():
+    register_profile(TraxeedProfile(_name, **_kwargs))
@@ -0,0 +1,72 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+"""
+Time shifting for the Traxeed event times.
+
+Traxeed documents contain thousands of events that share a handful of
+record times, so the shifted values are memoized: each distinct timestamp
+is parsed and formatted once and the result is reused.
+"""
+import datetime
+from functools import lru_cache
+
+from django.conf import settings
+
+# the format the outbound event times are rendered in
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# the formats accepted for the inbound event times, in order
+INPUT_FORMATS = (TIME_FORMAT, '%Y-%m-%dT%H:%M:%S.%f')
+
+# the number of distinct (timestamp, offset) pairs kept in memory.
+TIME_SHIFT_CACHE_SIZE = getattr(
+    settings,
+    'QUARTET_INTEGRATIONS_TIME_SHIFT_CACHE_SIZE',
+    1024
+)
+
+
+def parse_time(value: str) -> datetime.datetime:
+    '''
+    Parses an inbound event time using the first of the `INPUT_FORMATS`
+    that matches.
+    :param value: The event time string.
+    :return: A naive datetime.
+    '''
+    for time_format in INPUT_FORMATS[:-1]:
+        try:
+            return datetime.datetime.strptime(value, time_format)
+        except ValueError:
+            pass
+    return datetime.datetime.strptime(value, INPUT_FORMATS[-1])
+
+
+@lru_cache(maxsize=TIME_SHIFT_CACHE_SIZE)
+def shift_time(value: str, seconds: int) -> str:
+    '''
+    Returns the event time moved by a number of seconds and formatted
+    with `TIME_FORMAT`.
+    :param value: The event time string.
+    :param seconds: The number of seconds to add, may be negative.
+    :return: The shifted event time string.
+    '''
+    shifted = parse_time(value) + datetime.timedelta(seconds=seconds)
+    return shifted.strftime(TIME_FORMAT)
+
+
+def utc_now() -> str:
+    '''
+    :return: The current UTC time formatted with `TIME_FORMAT`.
+    '''
+    return datetime.datetime.utcnow().strftime(TIME_FORMAT)
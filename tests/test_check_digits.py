@@ -0,0 +1,111 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import random
+from unittest import mock, skipIf
+
+from django.test import TestCase
+from gs123.check_digit import calculate_check_digit as gs123_check_digit
+from quartet_capture.models import Rule, Step, StepParameter, Task
+from quartet_capture.rules import Rule as RuleEngine
+
+from quartet_integrations.frequentz.steps import \
+    IRISNumberRequestProcessStep
+from quartet_integrations.generic import check_digits
+from quartet_integrations.serialbox.ranges import NumberRange
+
+
+def sscc_payloads(count, start=1):
+    return ['0035199%010d' % i for i in range(start, start + count)]
+
+
+class TestCheckDigits(TestCase):
+
+    def test_matches_gs123(self):
+        payloads = sscc_payloads(500) + [
+            ''.join(random.choice('0123456789') for i in range(length))
+            for length in range(1, 20) for j in range(20)
+        ]
+        expected = list(map(gs123_check_digit, payloads))
+        self.assertEqual(list(map(check_digits.calculate_check_digit,
+                                  payloads)), expected)
+        self.assertEqual(check_digits.calculate_check_digits(payloads),
+                         expected)
+        self.assertEqual(check_digits.calculate_check_digit(
+            '03519910000000001'), '035199100000000019')
+
+    def test_invalid(self):
+        for payload in ('0035199000000001A', '003519900000000-1',
+                        '00351990000000²'):
+            with self.assertRaises(ValueError):
+                check_digits.calculate_check_digit(payload)
+            with self.assertRaises(ValueError):
+                check_digits.calculate_check_digits(sscc_payloads(3) +
+                                                    [payload])
+
+    def test_pure_python_fallback(self):
+        payloads = sscc_payloads(100)
+        with mock.patch.object(check_digits, 'numpy', None):
+            self.assertEqual(check_digits.calculate_check_digits(payloads),
+                             list(map(gs123_check_digit, payloads)))
+
+    def test_iter_check_digits(self):
+        payloads = sscc_payloads(25)
+        ssccs = check_digits.iter_check_digits(iter(payloads), batch_size=10)
+        self.assertEqual(list(ssccs), list(map(gs123_check_digit, payloads)))
+
+    def test_iris_sscc_tags(self):
+        tags = ['urn:epc:tag:sscc-96:0.0351991.%010d' % i for i in range(5)]
+        step = object.__new__(IRISNumberRequestProcessStep)
+        self.assertEqual(
+            list(step.get_serial_numbers(tags, 'SSCC-96')),
+            [gs123_check_digit('00351991%09d' % i) for i in range(5)]
+        )
+
+    def test_sscc_barcodes(self):
+        rule = Rule.objects.create(name='SSCCs')
+        step = Step.objects.create(
+            rule=rule, order=1, name='Barcodes',
+            step_class='quartet_integrations.serialbox.steps.'
+                       'ListToBarcodeConversionStep')
+        StepParameter.objects.create(step=step, name='Company Prefix',
+                                     value='0351991')
+        task = Task.objects.create(name='SSCC Task', rule=rule)
+        step = RuleEngine(rule, task).steps[1]
+        numbers = range(1, 101)
+        self.assertEqual(step.format_sscc_barcodes(numbers, 9),
+                         [step.format_sscc_barcode(number, 9)
+                          for number in numbers])
+        self.assertEqual(step.format_sscc_barcodes([5], 9),
+                         [gs123_check_digit('00351991000000005')])
+        self.assertEqual(list(step.format_sscc_barcodes(
+            NumberRange(1, 100), 9)), step.format_sscc_barcodes(numbers, 9))
+        step.use_parenthesis = True
+        self.assertEqual(step.format_sscc_barcodes([5], 9),
+                         ['(00)%s' % gs123_check_digit('00351991000000005')])
+        self.assertEqual(step.format_sscc_barcode(5, 9),
+                         '(00)%s' % gs123_check_digit('00351991000000005'))
+
+    @skipIf(check_digits.numpy is None, 'NumPy is not installed.')
+    def test_batched(self):
+        payloads = sscc_payloads(1000)
+        with mock.patch.object(
+            check_digits, 'calculate_check_digit',
+            wraps=check_digits.calculate_check_digit) as one_by_one:
+            ssccs = check_digits.calculate_check_digits(payloads)
+            # payloads of equal length are computed as one array
+            self.assertEqual(one_by_one.call_count, 0)
+            check_digits.calculate_check_digits(payloads + ['1'])
+            self.assertEqual(one_by_one.call_count, 1001)
+        self.assertEqual(ssccs, list(map(gs123_check_digit, payloads)))
@@ -0,0 +1,111 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from EPCPyYes.core.v1_2 import template_events
+from EPCPyYes.core.v1_2.CBV.business_steps import BusinessSteps
+from EPCPyYes.core.v1_2.CBV.dispositions import Disposition
+
+from quartet_integrations import environment
+from quartet_integrations.extended.environment import \
+    get_default_environment as extended_environment
+from quartet_integrations.frequentz.environment import \
+    get_default_environment as frequentz_environment
+from quartet_integrations.optel.epcpyyes import \
+    get_default_environment as optel_environment
+from quartet_integrations.rfxcel.environment import \
+    get_default_environment as rfxcel_environment
+from quartet_integrations.systech.unitrace.evnironment import \
+    get_default_environment as unitrace_environment
+
+# the object event template each integration renders its events with
+INTEGRATION_TEMPLATES = (
+    ('extended', extended_environment, 'extended/ext_object_events.xml'),
+    ('traxeed', extended_environment, 'traxeed/tx_hk_object_events.xml'),
+    ('optel', optel_environment, 'optel/object_event.xml'),
+    ('frequentz', frequentz_environment,
+     'frequentz/frequentz_object_event.xml'),
+    ('pharmasecure', frequentz_environment,
+     'pharmasecure/pharmasecure_object_event.xml'),
+    ('rfxcel', rfxcel_environment, 'rfxcel/rfxcel_commissioning_event.xml'),
+    ('unitrace', unitrace_environment, 'epcis/object_event.xml'),
+)
+
+
+class TestEnvironmentRegistry(SimpleTestCase):
+
+    def setUp(self):
+        environment.clear_environments()
+
+    def tearDown(self):
+        environment.clear_environments()
+
+    def test_environment_is_shared(self):
+        self.assertIs(extended_environment(), extended_environment())
+        self.assertIs(extended_environment(), optel_environment())
+        self.assertIs(frequentz_environment(), rfxcel_environment())
+        self.assertIsNot(extended_environment(), frequentz_environment())
+        self.assertIsNot(unitrace_environment(), frequentz_environment())
+
+    def test_compiled_templates_are_reused(self):
+        env = extended_environment()
+        template = env.get_template('extended/ext_object_events.xml')
+        self.assertIs(
+            template,
+            extended_environment().get_template(
+                'extended/ext_object_events.xml')
+        )
+
+    def test_string_templates_are_reused(self):
+        env = frequentz_environment()
+        source = '<epc>{{ epc }}</epc>'
+        template = environment.get_template_from_string(env, source)
+        self.assertIs(template,
+                      environment.get_template_from_string(env, source))
+        self.assertEqual(template.render(epc='urn:epc:id:sscc:1.2'),
+                         '<epc>urn:epc:id:sscc:1.2</epc>')
+
+    def test_bytecode_cache_is_written(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with mock.patch.object(environment, 'JINJA_BYTECODE_CACHE_DIR',
+                                   cache_dir):
+                environment.clear_environments()
+                frequentz_environment().get_template(
+                    'frequentz/frequentz_object_event.xml')
+                self.assertTrue(len(os.listdir(cache_dir)) > 0)
+
+    def test_integration_templates(self):
+        for name, get_env, template_name in INTEGRATION_TEMPLATES:
+            env = get_env()
+            event = template_events.ObjectEvent(
+                epc_list=['urn:epc:id:sgtin:305555.0555555.1'],
+                record_time='2019-01-01T00:00:00Z',
+                event_time='2019-01-01T00:00:00Z',
+                action='ADD',
+                biz_step=BusinessSteps.commissioning.value,
+                disposition=Disposition.active.value,
+                read_point='urn:epc:id:sgln:305555.123456.0',
+                biz_location='urn:epc:id:sgln:305555.123456.0',
+                env=env,
+                template=env.get_template(template_name)
+            )
+            event._context['lot'] = 'LOT123'
+            self.assertIn('urn:epc:id:sgtin:305555.0555555.1',
+                          event.render(), name)
+            self.assertIs(env.get_template(template_name),
+                          get_env().get_template(template_name), name)
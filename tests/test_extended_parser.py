@@ -0,0 +1,98 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.extended.parsers import ExtendedParser
+from quartet_integrations.generic.ordered_set import OrderedSet
+
+REG_EX = '^urn:epc:id:sgtin:[0-9]{6,12}\.[0-9]{1,7}'
+CARTON = 'urn:epc:id:sgtin:0339822.205004.2190340000053'
+
+DOCUMENT = '''<?xml version="1.0"?>
+<epcis:EPCISDocument schemaVersion="1.2" xmlns:epcis="urn:epcglobal:epcis:xsd:1" xmlns:cbvmda="urn:epcglobal:cbv:mda">
+  <EPCISBody>
+    <EventList>
+      <ObjectEvent>
+        <eventTime>2019-12-19T11:00:53Z</eventTime>
+        <recordTime>2019-12-19T11:00:53Z</recordTime>
+        <eventTimeZoneOffset>-05:00</eventTimeZoneOffset>
+        <epcList>
+          <epc>{carton}</epc>
+          {epcs}
+        </epcList>
+        <action>ADD</action>
+        <bizStep>urn:epcglobal:cbv:bizstep:commissioning</bizStep>
+        <disposition>urn:epcglobal:cbv:disp:active</disposition>
+        <readPoint><id>urn:epc:id:sgln:0351754.00000.0</id></readPoint>
+        <bizLocation><id>urn:epc:id:sgln:0351754.00000.0</id></bizLocation>
+      </ObjectEvent>
+      <AggregationEvent>
+        <eventTime>2019-12-19T11:00:53Z</eventTime>
+        <recordTime>2019-12-19T11:00:53Z</recordTime>
+        <eventTimeZoneOffset>-05:00</eventTimeZoneOffset>
+        <parentID>urn:epc:id:sscc:0339822.9999999999</parentID>
+        <childEPCs>
+          {children}
+        </childEPCs>
+        <action>ADD</action>
+        <bizStep>urn:epcglobal:cbv:bizstep:packing</bizStep>
+        <disposition>urn:epcglobal:cbv:disp:in_progress</disposition>
+      </AggregationEvent>
+    </EventList>
+  </EPCISBody>
+</epcis:EPCISDocument>
+'''
+
+
+def build_document(sscc_count):
+    """
+    Builds a document commissioning `sscc_count` SSCCs of which the first
+    half are aggregated as children of a single SSCC parent.
+    """
+    ssccs = ['urn:epc:id:sscc:0339822.3%09d' % i for i in range(sscc_count)]
+    epcs = ''.join('<epc>%s</epc>' % sscc for sscc in ssccs)
+    children = ''.join(
+        '<epc>%s</epc>' % sscc for sscc in ssccs[:sscc_count // 2])
+    return DOCUMENT.format(carton=CARTON, epcs=epcs,
+                           children=children).encode()
+
+
+class TestExtendedParser(SimpleTestCase):
+
+    def test_aggregated_ssccs_move_to_cartons(self):
+        parser = ExtendedParser(io.BytesIO(build_document(6)), reg_ex=REG_EX)
+        parser.parse()
+        ssccs = ['urn:epc:id:sscc:0339822.3%09d' % i for i in range(6)]
+        self.assertEqual(parser.sscc_list, ssccs[3:])
+        self.assertEqual(list(parser.comm_pallets_event.epc_list), ssccs[3:])
+        self.assertEqual(list(parser.comm_cartons_event.epc_list),
+                         [CARTON] + ssccs[:3])
+        # the commissioning events still render in the original order
+        rendered = parser.comm_cartons_event.render()
+        positions = [rendered.index(epc) for epc in [CARTON] + ssccs[:3]]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_aggregation_uses_sets(self):
+        # the aggregated SSCCs are moved between sets, not scanned lists
+        parser = ExtendedParser(io.BytesIO(build_document(1000)),
+                                reg_ex=REG_EX)
+        parser.parse()
+        self.assertIsInstance(parser._ssccs, OrderedSet)
+        self.assertIsInstance(parser.comm_pallets_event.epc_list, OrderedSet)
+        self.assertIsInstance(parser.comm_cartons_event.epc_list, OrderedSet)
+        self.assertEqual(len(parser.sscc_list), 500)
+        self.assertEqual(len(parser.comm_cartons_event.epc_list), 501)
@@ -0,0 +1,182 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import os
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from quartet_capture.models import Rule, Step, StepParameter, Task
+from quartet_capture.tasks import execute_rule
+from quartet_output.models import EndPoint, EPCISOutputCriteria
+
+from quartet_integrations.generic import hierarchy_cache
+from quartet_integrations.generic.hierarchy_cache import HierarchyCache
+from quartet_integrations.rocit.query import RocItQuery
+
+CASE = 'urn:epc:id:sgtin:0397799.207062.2190390007049'
+PALLET = 'urn:epc:id:sscc:0397799.3000145080'
+OTHER = 'urn:epc:id:sscc:0397799.9999999999'
+
+
+class Loader:
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TestHierarchyCache(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.cache = HierarchyCache(size=10, cache_alias='default')
+
+    def test_get(self):
+        loader = Loader(['a1', 'a2'])
+        self.assertEqual(self.cache.get('a', loader), ['a1', 'a2'])
+        self.assertEqual(self.cache.get('a', loader), ['a1', 'a2'])
+        self.assertEqual(loader.calls, 1)
+        self.cache.get('a', loader, namespace='other')
+        self.assertEqual(loader.calls, 2)
+        self.cache.invalidate(['a'])
+        self.cache.get('a', loader)
+        self.cache.get('a', loader, namespace='other')
+        self.assertEqual(loader.calls, 4)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 4))
+
+    def test_lru(self):
+        loaders = {key: Loader([key] * 3) for key in 'abcd'}
+        self.cache.get('a', loaders['a'])
+        self.cache.get('b', loaders['b'])
+        self.cache.get('a', loaders['a'])
+        # c does not fit with a and b, b was used least recently
+        self.cache.get('c', loaders['c'])
+        self.assertEqual(self.cache.weight, 8)
+        self.cache.get('a', loaders['a'])
+        self.cache.get('b', loaders['b'])
+        self.assertEqual([loaders[key].calls for key in 'abc'], [1, 2, 1])
+        # a snapshot larger than the cache is not kept
+        big = Loader(list(range(10)))
+        self.cache.get('d', big)
+        self.cache.get('d', big)
+        self.assertEqual(big.calls, 2)
+
+    def test_evicted_version(self):
+        loader = Loader(['a1'])
+        self.cache.get('a', loader)
+        caches['default'].clear()
+        self.cache.get('a', loader)
+        self.assertEqual(loader.calls, 2)
+
+    def test_timeout(self):
+        loader = Loader(['a1'])
+        with mock.patch.object(hierarchy_cache.time, 'monotonic',
+                               return_value=1000):
+            self.cache.get('a', loader)
+            self.cache.get_many(['a'], lambda ids: {'a': ['a1']},
+                                namespace='many')
+        with mock.patch.object(hierarchy_cache.time, 'monotonic',
+                               return_value=1000 + self.cache.timeout - 1):
+            self.cache.get('a', loader)
+        with mock.patch.object(hierarchy_cache.time, 'monotonic',
+                               return_value=1000 + self.cache.timeout):
+            self.cache.get('a', loader)
+            self.cache.get_many(['a'], lambda ids: {'a': ['a1']},
+                                namespace='many')
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 4))
+
+    def test_disabled(self):
+        # nothing is cached until a shared cache alias is configured
+        self.assertIsNone(hierarchy_cache.HIERARCHY_CACHE_ALIAS)
+        for cache in (HierarchyCache(),
+                      HierarchyCache(cache_alias='default', enabled=False)):
+            loader = Loader(['a1'])
+            cache.get('a', loader)
+            cache.get('a', loader)
+            self.assertEqual(loader.calls, 2)
+            cache.invalidate(['a'])
+            self.assertEqual(caches['default'].get_many(
+                ['quartet_integrations:hierarchy:a']), {})
+
+
+class TestHierarchyInvalidation(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        patcher = mock.patch.object(hierarchy_cache, '_hierarchy_cache',
+                                    HierarchyCache(cache_alias='default'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, step_class='quartet_integrations.generic.steps.'
+                               'HierarchyCacheEPCISParsingStep',
+              parameters=None):
+        rule = Rule.objects.create(name='Parse Hierarchies')
+        step = Step.objects.create(rule=rule, name='Parse', order=1,
+                                   step_class=step_class)
+        for name, value in (parameters or {}).items():
+            StepParameter.objects.create(step=step, name=name, value=value)
+        task = Task.objects.create(rule=rule, name='Hierarchies')
+        path = os.path.join(os.path.dirname(__file__),
+                            'data/comm_agg_decom_epcis.xml')
+        with open(path, 'rb') as f:
+            execute_rule(f.read(), task)
+
+    def test_invalidation(self):
+        for tag_id in (CASE, PALLET, OTHER):
+            self.assertEqual(
+                RocItQuery.get_lowest_saleable_units(None, tag_id), [tag_id])
+        with self.assertNumQueries(0):
+            RocItQuery.get_lowest_saleable_units(None, CASE)
+        self.parse()
+        self.assertEqual(
+            RocItQuery.get_lowest_saleable_units(None, CASE),
+            ['urn:epc:id:sgtin:0397799.007062.%d' % i
+             for i in range(1190390028373, 1190390028383)])
+        self.assertEqual(
+            RocItQuery.get_lowest_saleable_units(None, PALLET),
+            ['urn:epc:id:sgtin:0397799.007062.1190390028383'])
+        # a hierarchy the message did not touch is still cached
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                RocItQuery.get_lowest_saleable_units(None, OTHER), [OTHER])
+
+    def test_output_parsing_step(self):
+        EPCISOutputCriteria.objects.create(
+            name='Test Criteria', action='OBSERVE',
+            end_point=EndPoint.objects.create(name='Test EndPoint',
+                                              urn='http://testhost'))
+        self.assertEqual(
+            RocItQuery.get_lowest_saleable_units(None, CASE), [CASE])
+        self.parse('quartet_integrations.gs1ushc.steps.OutputParsingStep',
+                   {'EPCIS Output Criteria': 'Test Criteria'})
+        self.assertEqual(
+            len(RocItQuery.get_lowest_saleable_units(None, CASE)), 10)
+
+    def test_retrieve_packaging_hierarchy(self):
+        self.parse()
+        data = RocItQuery.RetrievePackagingHierarchy(CASE, 'true', 'false')
+        self.assertEqual(data['quantity'], 10)
+        self.assertEqual(data['child_tag_count'], 10)
+        with self.assertNumQueries(1):
+            cached = RocItQuery.RetrievePackagingHierarchy(CASE, 'true',
+                                                           'false')
+        self.assertEqual(cached['child_tags'], data['child_tags'])
+        self.assertEqual(cached['quantity'], 10)
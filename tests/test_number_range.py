@@ -0,0 +1,159 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import tracemalloc
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import TestCase
+from gs123.check_digit import calculate_check_digit
+from quartet_capture.models import Rule, Step, StepParameter, Task, \
+    TaskParameter
+from quartet_capture.rules import Rule as RuleEngine
+from serialbox.models import Pool, SequentialRegion
+
+from quartet_integrations.generic.check_digits import calculate_check_digits
+from quartet_integrations.serialbox import ranges
+from quartet_integrations.serialbox.ranges import NumberRange
+from quartet_integrations.serialbox.urns import UrnList
+
+SIZE = 1000000
+
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    try:
+        ret = function(*args)
+        return ret, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestNumberRange(TestCase):
+
+    def test_sequence(self):
+        numbers = NumberRange(5, 14)
+        self.assertEqual(len(numbers), 10)
+        self.assertEqual((numbers.start, numbers.end), (5, 14))
+        self.assertEqual(list(numbers), list(range(5, 15)))
+        self.assertEqual(numbers[-1], 14)
+        self.assertEqual(list(numbers[2:4]), [7, 8])
+        self.assertIsInstance(numbers[2:4], NumberRange)
+        self.assertEqual(len(NumberRange(5, 4)), 0)
+
+        padded = numbers.format('%04d'.__mod__)
+        self.assertEqual(list(numbers), list(range(5, 15)))
+        self.assertEqual(padded[0], '0005')
+        self.assertEqual(list(padded[-2:]), ['0013', '0014'])
+        self.assertEqual(list(padded.format('A'.__add__)),
+                         ['A%04d' % i for i in range(5, 15)])
+
+    def test_batch_format(self):
+        numbers = NumberRange(1, 25).format(
+            '0035199%010d'.__mod__
+        ).format(calculate_check_digits, batch=True)
+        expected = [calculate_check_digit('0035199%010d' % i)
+                    for i in range(1, 26)]
+        with mock.patch.object(ranges, 'NUMBER_RANGE_CHUNK_SIZE', 10):
+            self.assertEqual(list(numbers), expected)
+        self.assertEqual(numbers[12], expected[12])
+
+    def test_template(self):
+        template = Template('{% for number in data %}{{ number }},{% endfor %}'
+                            '{{ data|length }}')
+        numbers = NumberRange(1, 3).format('%03d'.__mod__)
+        self.assertEqual(template.render(Context({'data': numbers})),
+                         '001,002,003,3')
+
+    def test_memory(self):
+        numbers, lazy = peak_memory(
+            lambda: NumberRange(1, SIZE).format('%09d'.__mod__))
+        self.assertEqual(len(numbers), SIZE)
+        numbers, expanded = peak_memory(
+            lambda: ['%09d' % i for i in range(1, SIZE + 1)])
+        self.assertLess(lazy, 1024)
+        self.assertGreater(expanded, SIZE * 50)
+
+
+class TestSequentialResponses(TestCase):
+
+    def setUp(self):
+        self.pool = Pool.objects.create(readable_name='SSCC Pool',
+                                        machine_name='00377713',
+                                        active=True, request_threshold=1000)
+        SequentialRegion.objects.create(readable_name='SSCC Region',
+                                        machine_name='00377713-region',
+                                        pool=self.pool, active=True,
+                                        start=1, end=999999999, state=1)
+
+    def get_step(self, step_class, **parameters):
+        rule = Rule.objects.create(name='%s %d' % (step_class,
+                                                   Rule.objects.count()))
+        step = Step.objects.create(rule=rule, order=1, name=step_class,
+                                   step_class=step_class)
+        for name, value in parameters.items():
+            StepParameter.objects.create(step=step, name=name, value=value)
+        task = Task.objects.create(name='%s Task' % rule.name, rule=rule)
+        TaskParameter.objects.create(task=task, name='pool',
+                                     value=self.pool.machine_name)
+        engine = RuleEngine(rule, task)
+        return engine.steps[1], engine.context
+
+    def test_urn_conversion(self):
+        step, context = self.get_step(
+            'quartet_integrations.serialbox.steps.ListToUrnConversionStep',
+            **{'Lazy URNs': 'True'})
+        urns, peak = peak_memory(step.execute, [1, SIZE], context)
+        self.assertIsInstance(urns, UrnList)
+        self.assertEqual(len(urns), SIZE)
+        self.assertEqual(urns[0], 'urn:epc:id:sscc:0377713.0000000001')
+        self.assertEqual(urns[-1], 'urn:epc:id:sscc:0377713.0001000000')
+        # the database queries of the step, not the million URNs
+        self.assertLess(peak, 1024 * 1024)
+
+        step, context = self.get_step(
+            'quartet_integrations.serialbox.steps.ListToUrnConversionStep')
+        self.assertEqual(step.execute([1, 1000], context), list(urns[:1000]))
+
+    def test_barcode_conversion(self):
+        step_class = 'quartet_integrations.serialbox.steps.' \
+                     'ListToBarcodeConversionStep'
+        parameters = {'Company Prefix': '0377713', 'Create List': 'True'}
+        step, context = self.get_step(step_class, **parameters,
+                                      **{'Lazy Lists': 'True'})
+        ssccs, peak = peak_memory(step.execute, [1, SIZE], context)
+        self.assertIsInstance(ssccs, UrnList)
+        self.assertIsInstance(ssccs._parts[0], NumberRange)
+        self.assertEqual(len(ssccs), SIZE)
+        self.assertEqual(ssccs[-1], calculate_check_digit('00377713001000000'))
+        self.assertLess(peak, 1024 * 1024)
+
+        step, context = self.get_step(step_class, **parameters)
+        self.assertEqual(step.execute([1, 1000], context), list(ssccs[:1000]))
+
+    def test_rfxcel_sscc_conversion(self):
+        step, context = self.get_step(
+            'quartet_integrations.rfxcel.steps.SerialboxSSCCConversionStep',
+            **{'Lazy Lists': 'True'})
+        urns, peak = peak_memory(step.execute, [1, SIZE + 1], context)
+        self.assertIsInstance(urns, NumberRange)
+        self.assertEqual(len(urns), SIZE)
+        self.assertEqual(urns[-1], 'urn:epc:id:sscc:0377713.0001000000')
+        self.assertLess(peak, 1024 * 1024)
+
+        step, context = self.get_step(
+            'quartet_integrations.rfxcel.steps.SerialboxSSCCConversionStep',
+            **{'Create URNs': 'False'})
+        self.assertEqual(step.execute([1, 4], context),
+                         ['000000001', '000000002', '000000003'])
@@ -0,0 +1,191 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import os
+from contextlib import redirect_stdout
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from quartet_capture.models import Rule, Step, StepParameter, TaskParameter
+from quartet_templates.models import Template
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from serialbox.management.commands.load_serialbox_auth import \
+    Command as load_auth
+from serialbox.models import Pool, ResponseRule, SequentialRegion
+
+from quartet_integrations.opsm.views import OPSMNumberRangeView
+from quartet_integrations.systech.guardian.views import \
+    GuardianNumberRangeView
+from quartet_integrations.systech.unitrace.views import \
+    UniTraceNumberRangeView
+from quartet_integrations.tracelink.views import TraceLinkNumberRangeView
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def read(path):
+    with open(os.path.join(DATA, path), 'rb') as f:
+        return f.read()
+
+
+def parse(view_class, body):
+    view = view_class()
+    count = view.parse_xml(view.iterparse_request(body))
+    return view, count
+
+
+class TestNumberRangeRequests(TestCase):
+
+    def test_guardian(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            view, count = parse(
+                GuardianNumberRangeView,
+                read('systech/gtin_sequential_number_request.xml'))
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(count, '50')
+        self.assertEqual(view.machine_name, '00377700000136')
+        self.assertEqual(view.type, 'GTIN')
+        self.assertEqual(view.sending_system, 'Systech')
+        self.assertEqual(view.id_type, 'GS1_SER')
+        self.assertEqual(view.encoding_type, 'SGTIN')
+
+    def test_unitrace(self):
+        view, count = parse(UniTraceNumberRangeView,
+                            read('unitrace/list_sscc_request.xml'))
+        self.assertEqual(count, '50')
+        self.assertEqual((view.type, view.machine_name),
+                         ('COMPANY_PREFIX', '10355555'))
+        self.assertEqual(view.encoding_type, 'SSCC')
+
+    def test_tracelink(self):
+        view, count = parse(TraceLinkNumberRangeView,
+                            read('tracelink/SN_Request_SSCC_Range.xml'))
+        self.assertEqual(count, '2')
+        self.assertEqual(view.machine_name, '00355555')
+        self.assertEqual(view.extension_digit, '0')
+        self.assertEqual(view.company_prefix, '0355555')
+        self.assertEqual(view.id_type, 'GS1_SER')
+        self.assertEqual(view.sending_system, 'OPTEL_DEMO')
+        self.assertEqual(view.receiving_system, 'OPTEL_HQ')
+
+    def test_case_insensitive(self):
+        body = read('tracelink/SN_Request_SSCC_Range.xml')
+        for tag in (b'IDType', b'idtype', b'ID_TYPE'):
+            view, count = parse(
+                TraceLinkNumberRangeView,
+                body.replace(b'IdType>', tag + b'>'))
+            self.assertEqual(count, '2')
+            if tag == b'ID_TYPE':
+                self.assertIsNone(view.id_type)
+            else:
+                self.assertEqual(view.id_type, 'GS1_SER')
+
+    def test_early_termination(self):
+        body = read('systech/gtin_sequential_number_request.xml')
+        # nothing after the last field is read
+        view, count = parse(
+            GuardianNumberRangeView,
+            body.replace(b'</ObjectKey>',
+                         b'</ObjectKey><SendingSystem>x</SendingSystem>'
+                         b'<Broken><'))
+        self.assertEqual((view.machine_name, count), ('00377700000136', '50'))
+        self.assertEqual(view.sending_system, 'Systech')
+        # a missing field is read to the end of the request
+        view, count = parse(
+            GuardianNumberRangeView,
+            body.replace(b'<SendingSystem>Systech</SendingSystem>', b''))
+        self.assertIsNone(view.sending_system)
+        self.assertEqual(count, '50')
+
+
+def writes(queries):
+    return [query['sql'] for query in queries
+            if 'SAVEPOINT' not in query['sql']]
+
+
+class TestTaskParameters(APITestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser',
+                                        password='unittest',
+                                        email='testuser@seriallab.local')
+        load_auth().handle()
+        user.groups.add(Group.objects.get(name='Pool API Access'))
+        self.client.force_authenticate(user=user)
+        Template.objects.create(name='Number Range Reply',
+                                content='{{ data[0] }}-{{ data[1] }}')
+        rule = Rule.objects.create(name='Number Range Reply')
+        step = Step.objects.create(
+            name='Format', rule=rule, order=1,
+            step_class='quartet_templates.steps.TemplateStep')
+        StepParameter.objects.create(step=step, name='Template Name',
+                                     value='Number Range Reply')
+        pool = Pool.objects.create(machine_name='00377700000136',
+                                   readable_name='GTIN Pool', active=True)
+        SequentialRegion.objects.create(
+            machine_name=pool.machine_name, readable_name='GTIN Region',
+            start=1, end=999999999, order=1, state=1, pool=pool)
+        self.response_rule = ResponseRule.objects.create(
+            rule=rule, pool=pool, content_type='xml')
+
+    def set_task_parameters(self, view):
+        request = Request(APIRequestFactory().get('/?format=xml'))
+        with CaptureQueriesContext(connection) as queries:
+            db_task = view._set_task_parameters(
+                '00377700000136', None, self.response_rule, 10, request)
+        self.assertEqual(len(writes(queries)), 2)
+        return dict(TaskParameter.objects.filter(
+            task=db_task).values_list('name', 'value'))
+
+    def test_views(self):
+        view, count = parse(
+            GuardianNumberRangeView,
+            read('systech/gtin_sequential_number_request.xml'))
+        self.assertEqual(self.set_task_parameters(view), {
+            'source': 'serialbox-allocate', 'pool': '00377700000136',
+            'size': '10', 'format': 'xml', 'id_type': 'GS1_SER',
+            'sending_system': 'Systech', 'encoding_type': 'SGTIN',
+            'type': 'GTIN', 'machine_name': '00377700000136'
+        })
+
+        view, count = parse(TraceLinkNumberRangeView,
+                            read('tracelink/SN_Request_SSCC_Range.xml'))
+        parameters = self.set_task_parameters(view)
+        self.assertEqual(parameters['receiving_system'], 'OPTEL_HQ')
+        self.assertEqual(parameters['extension_digit'], '0')
+        self.assertEqual(parameters['company_prefix'], '0355555')
+        self.assertEqual(len(parameters), 12)
+
+        view = OPSMNumberRangeView()
+        view.location_name = 'Plant-GTIN'
+        parameters = self.set_task_parameters(view)
+        self.assertEqual(parameters['location_name'], 'Plant-GTIN')
+        self.assertEqual(len(parameters), 5)
+
+    def test_allocation_queries(self):
+        url = '%s?format=xml' % reverse('guardianNumberRangeService')
+        with CaptureQueriesContext(connection) as queries:
+            result = self.client.post(
+                url, read('systech/gtin_sequential_number_request.xml'),
+                content_type='application/xml')
+        self.assertEqual(result.status_code, 200)
+        inserts = [sql for sql in writes(queries) if sql.startswith(
+            'INSERT INTO "quartet_capture_taskparameter"')]
+        self.assertEqual(len(inserts), 1)
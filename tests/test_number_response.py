@@ -0,0 +1,218 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import os
+import shutil
+import sqlite3
+import tempfile
+import tracemalloc
+
+from django.test import TestCase
+from list_based_flavorpack.models import ListBasedRegion, \
+    ProcessingParameters
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_region_table
+from lxml import etree
+from quartet_capture.models import Rule, Task
+from quartet_capture.rules import RuleContext
+from serialbox import models as sb_models
+
+from quartet_integrations.frequentz.steps import IRISNumberRequestProcessStep
+from quartet_integrations.generic.number_response import \
+    SerialNumberExtractor
+
+IRIS_RESPONSE = '''<soapenv:Envelope
+    xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body>
+<ns2:getTagsResponse
+    xmlns:ns2="http://www.ibm.com/epcis/serialid/TagManagerTypes">
+<ns2:tagResponse>
+<ns2:quantity>{quantity}</ns2:quantity>
+<ns2:tagList>{tags}</ns2:tagList>
+</ns2:tagResponse>
+</ns2:getTagsResponse>
+</soapenv:Body>
+</soapenv:Envelope>'''
+
+
+def build_tl_response(count):
+    '''
+    :return: A tracelink number response with count serial numbers.
+    '''
+    return (
+        '<?xml version="1.0"?>'
+        '<S:Envelope xmlns:S="http://schemas.xmlsoap.org/soap/envelope/">'
+        '<S:Body><SNResponse>'
+        '<ObjectKey><Name>GTIN</Name><Value>00300077789102</Value></ObjectKey>'
+        '<RandomizedNumberList>%s</RandomizedNumberList>'
+        '</SNResponse></S:Body></S:Envelope>' %
+        ''.join('<SerialNo>%012d</SerialNo>' % i for i in range(count))
+    ).encode()
+
+
+class TestSerialNumberExtractor(TestCase):
+
+    def test_extract(self):
+        response = build_tl_response(10)
+        expected = ['%012d' % i for i in range(10)]
+        self.assertEqual(
+            list(SerialNumberExtractor(response, './/SerialNo')), expected)
+        self.assertEqual(
+            list(SerialNumberExtractor(response.decode(),
+                                       './/RandomizedNumberList/*')),
+            expected
+        )
+        # paths iterparse can not follow are run against the whole tree
+        extractor = SerialNumberExtractor(
+            response, './/RandomizedNumberList/SerialNo[2]')
+        self.assertFalse(extractor.streamable)
+        self.assertEqual(list(extractor), ['%012d' % 1])
+
+    def test_strip_namespaces(self):
+        path = os.path.join(os.path.dirname(__file__),
+                            'data/namespaced_response.xml')
+        with open(path, 'rb') as f:
+            response = f.read()
+        self.assertEqual(
+            list(SerialNumberExtractor(response, './/SerialNumber')), [])
+        numbers = list(SerialNumberExtractor(response, './/SerialNumber',
+                                             strip_namespaces=True))
+        self.assertEqual(len(numbers), 10)
+        self.assertEqual(
+            numbers,
+            list(SerialNumberExtractor(response, './/SerialNumber[1]/..'
+                                                 '/SerialNumber',
+                                       strip_namespaces=True))
+        )
+
+    def test_required(self):
+        response = build_tl_response(3)
+        self.assertEqual(len(list(SerialNumberExtractor(
+            response, './/SerialNo', required=['RandomizedNumberList']))), 3)
+        for path in ('.//SerialNo', './/SerialNo[1]'):
+            with self.assertRaises(SerialNumberExtractor.MissingElement):
+                list(SerialNumberExtractor(response, path,
+                                           required=['idList']))
+        fault = (
+            b'<S:Envelope xmlns:S="http://schemas.xmlsoap.org/soap/envelope/">'
+            b'<S:Body><S:Fault><faultcode>S:Server</faultcode>'
+            b'<faultstring>No numbers left</faultstring></S:Fault></S:Body>'
+            b'</S:Envelope>')
+        with self.assertRaisesRegex(SerialNumberExtractor.SoapFault,
+                                    'No numbers left'):
+            list(SerialNumberExtractor(fault, './/SerialNo'))
+
+    def test_skeleton(self):
+        root = SerialNumberExtractor(build_tl_response(100),
+                                     './/SerialNo').skeleton()
+        self.assertEqual(root.findtext('.//ObjectKey/Value'),
+                         '00300077789102')
+        self.assertEqual(root.findall('.//SerialNo'), [])
+        self.assertIsNotNone(root.find('.//RandomizedNumberList'))
+
+    def test_memory(self):
+        response = build_tl_response(20000)
+        tracemalloc.start()
+        try:
+            root = etree.fromstring(response)
+            numbers = [element.text for element in
+                       root.findall('.//SerialNo')]
+            dom_peak = tracemalloc.get_traced_memory()[1]
+            del root, numbers
+            tracemalloc.reset_peak()
+            count = sum(1 for number in
+                        SerialNumberExtractor(response, './/SerialNo'))
+            streaming_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(count, 20000)
+        self.assertLess(streaming_peak, dom_peak / 10)
+
+
+class TestIRISNumberResponse(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        pool = sb_models.Pool.objects.create(
+            readable_name='IRIS Pool', machine_name='00351991817017',
+            active=True, request_threshold=200
+        )
+        self.region = ListBasedRegion.objects.create(
+            pool=pool,
+            readable_name='IRIS Region',
+            machine_name='0351991.0',
+            processing_class_path=(
+                "list_based_flavorpack."
+                "processing_classes.third_party_processing."
+                "processing.ThirdPartyProcessingClass"
+            ),
+            directory_path=directory,
+            number_replenishment_size=200
+        )
+        ProcessingParameters.objects.create(
+            list_based_region=self.region, key='format', value='SGTIN-96'
+        )
+
+    def test_execute(self):
+        tags = ''.join(
+            '<ns2:tag>urn:epc:tag:sgtin-96:3.0351991.081701.%d</ns2:tag>' % i
+            for i in range(50)
+        )
+        rule_context = RuleContext('IRIS', 'IRIS Task', {
+            'NUMBER_RESPONSE': IRIS_RESPONSE.format(quantity=50, tags=tags),
+            'region_name': self.region.machine_name
+        })
+        rule = Rule.objects.create(name='IRIS')
+        step = IRISNumberRequestProcessStep(
+            db_task=Task.objects.create(name='IRIS Task', rule=rule))
+        step.execute(None, rule_context)
+        connection = sqlite3.connect(self.region.db_file_path)
+        try:
+            rows = connection.execute(
+                'select serial_number from %s order by rowid' %
+                get_region_table(self.region)
+            ).fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(rows, [(str(i),) for i in range(50)])
+
+    def test_errors(self):
+        rule = Rule.objects.create(name='IRIS')
+        step = IRISNumberRequestProcessStep(
+            db_task=Task.objects.create(name='IRIS Task', rule=rule))
+        tag = '<ns2:tag>urn:epc:tag:sgtin-96:3.0351991.081701.1</ns2:tag>'
+        for response in (
+            IRIS_RESPONSE.replace(
+                '<ns2:quantity>{quantity}</ns2:quantity>', '').format(
+                tags=tag),
+            '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/'
+            'soap/envelope/"><soapenv:Body><soapenv:Fault>'
+            '<faultcode>soapenv:Server</faultcode><faultstring>Failed'
+            '</faultstring></soapenv:Fault></soapenv:Body></soapenv:Envelope>'
+        ):
+            rule_context = RuleContext('IRIS', 'IRIS Task', {
+                'NUMBER_RESPONSE': response,
+                'region_name': self.region.machine_name
+            })
+            with self.assertRaises((SerialNumberExtractor.MissingElement,
+                                    SerialNumberExtractor.SoapFault)):
+                step.execute(None, rule_context)
+        connection = sqlite3.connect(self.region.db_file_path)
+        try:
+            self.assertEqual(connection.execute(
+                'select count(*) from %s' % get_region_table(self.region)
+            ).fetchone(), (0,))
+        finally:
+            connection.close()
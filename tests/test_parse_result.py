@@ -0,0 +1,102 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import os
+import pickle
+
+from django.test import TestCase
+from quartet_capture import models
+from quartet_capture.tasks import execute_rule
+from quartet_output.steps import ContextKeys
+from quartet_templates.models import Template
+
+from quartet_integrations.extended.parsers import ExtendedParser
+from quartet_integrations.generic.parse_result import ParseResult, \
+    PARSE_RESULT_KEY
+from quartet_integrations.traxeed.parsers import TraxeedParser
+from tests.test_extended_parser import \
+    build_document as build_extended_document
+from tests.test_traxeed_parsers import build_document, REG_EX
+
+
+class TestParseResult(TestCase):
+
+    def test_pickle(self):
+        result = ParseResult(
+            sscc_list=['urn:epc:id:sscc:0339822.3000146411'],
+            quantity=10, lot_number='LOT1', exp_date='2021-12-31',
+            ndc='0339-8221', gtin='00303398221001', PO='PO1',
+            biz_location='urn:epc:id:sgln:0351754.00000.0',
+            read_point='urn:epc:id:sgln:0351754.00000.0'
+        )
+        self.assertFalse(hasattr(result, '__dict__'))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertEqual(pickle.loads(pickle.dumps(result, protocol)),
+                             result)
+        self.assertIn('1 SSCCs', repr(result))
+
+    def test_parsers_emit_result(self):
+        parser = TraxeedParser(io.BytesIO(build_document(10)), reg_ex=REG_EX)
+        parser.parse()
+        result = parser.get_parse_result()
+        self.assertEqual(
+            result.sscc_list,
+            ['urn:epc:id:sscc:0339822.3%09d' % i for i in range(5, 10)]
+        )
+        self.assertEqual(result.lot_number, 'LOT1')
+        self.assertEqual(result.exp_date, '2021-12-31')
+        self.assertEqual(result.PO, 'PO1')
+        self.assertEqual(result.biz_location,
+                         'urn:epc:id:sgln:0351754.00000.0')
+        # the result does not share the parser's SSCC set
+        self.assertIsInstance(result.sscc_list, list)
+        self.assertLess(len(pickle.dumps(result)), 1024)
+
+        parser = ExtendedParser(io.BytesIO(build_extended_document(6)),
+                                reg_ex=REG_EX)
+        parser.parse()
+        result = parser.get_parse_result()
+        self.assertEqual(result.sscc_list, parser.sscc_list)
+        self.assertEqual(len(result.sscc_list), 3)
+        self.assertEqual(result.read_point,
+                         'urn:epc:id:sgln:0351754.00000.0')
+
+    def test_ship_step_uses_result(self):
+        curpath = os.path.dirname(__file__)
+        with open(os.path.join(curpath, 'data/ext-add-shipping.xml')) as f:
+            Template.objects.create(name='Shipping Event Template',
+                                    content=f.read())
+        rule = models.Rule.objects.create(name='Traxeed HK')
+        models.Step.objects.create(
+            name='Process', order=1, rule=rule,
+            step_class='quartet_integrations.traxeed.steps.ProcessTraxeedStep'
+        )
+        ship_step = models.Step.objects.create(
+            name='Ship', order=2, rule=rule,
+            step_class='quartet_integrations.traxeed.steps.ShipTraxeedStep'
+        )
+        models.StepParameter.objects.create(step=ship_step,
+                                            name='Template Name',
+                                            value='Shipping Event Template')
+        task = models.Task.objects.create(rule=rule, name=rule.name)
+        context = execute_rule(build_document(10), task)
+        self.assertNotIn('PARSER', context.context)
+        result = context.context[PARSE_RESULT_KEY]
+        self.assertEqual(result.PO, 'PO1')
+        pickle.dumps(context.context[PARSE_RESULT_KEY])
+        shipping = context.context[ContextKeys.OUTBOUND_EPCIS_MESSAGE_KEY.value]
+        for sscc in result.sscc_list:
+            self.assertIn(sscc, shipping)
+        self.assertIn('<tl:lot>LOT1</tl:lot>', shipping)
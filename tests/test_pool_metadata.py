@@ -0,0 +1,160 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from quartet_capture.models import Rule, Step, StepParameter, Task, \
+    TaskParameter
+from quartet_capture.rules import Rule as RuleEngine
+from quartet_masterdata.models import Company, TradeItem
+from serialbox.models import Pool, SequentialRegion
+
+from quartet_integrations.serialbox import metadata
+from quartet_integrations.serialbox.metadata import PoolMetadataCache
+
+
+class TestPoolMetadata(TestCase):
+
+    def setUp(self):
+        metadata.clear_pool_metadata()
+        self.company = Company.objects.create(name='Pharma Co',
+                                              gs1_company_prefix='0377713')
+        self.trade_item = TradeItem.objects.create(
+            company=self.company, GTIN14='00377713123454',
+            regulated_product_name='Pain Killer')
+        self.pool = Pool.objects.create(readable_name='GTIN Pool',
+                                        machine_name='00377713123454',
+                                        active=True, request_threshold=1000)
+        self.region = SequentialRegion.objects.create(
+            readable_name='GTIN Region', machine_name='00377713123454-1',
+            pool=self.pool, active=True, start=1, end=999999999, state=1)
+
+    def test_load(self):
+        with self.assertNumQueries(4):
+            pool_metadata = metadata.get_pool_metadata('00377713123454')
+        self.assertEqual(pool_metadata.pool, self.pool)
+        self.assertEqual(pool_metadata.region_type, metadata.SEQUENTIAL)
+        self.assertTrue(pool_metadata.region_active)
+        self.assertEqual(pool_metadata.company_prefix_length, 7)
+        self.assertEqual(pool_metadata.trade_item, self.trade_item)
+        with self.assertNumQueries(0):
+            self.assertIs(metadata.get_pool_metadata('00377713123454'),
+                          pool_metadata)
+        with self.assertRaises(Pool.DoesNotExist):
+            metadata.get_pool_metadata('00377713999999')
+
+    def test_no_master_data(self):
+        # an SSCC pool whose company is not in the master data
+        pool = Pool.objects.create(readable_name='SSCC Pool',
+                                   machine_name='099999900000000001',
+                                   active=True, request_threshold=1000)
+        SequentialRegion.objects.create(
+            readable_name='SSCC Region', machine_name='099999900000000001-1',
+            pool=pool, active=True, start=1, end=999999999, state=1)
+        pool_metadata = metadata.get_pool_metadata(pool.machine_name)
+        self.assertIsNone(pool_metadata.company_prefix_length)
+        self.assertIn('Company', pool_metadata.company_prefix_error)
+        self.assertEqual(pool_metadata.region_type, metadata.SEQUENTIAL)
+        with self.assertNumQueries(0):
+            self.assertIs(metadata.get_pool_metadata(pool.machine_name),
+                          pool_metadata)
+
+        def execute(step_class, **parameters):
+            rule = Rule.objects.create(name=step_class)
+            step = Step.objects.create(
+                rule=rule, order=1, name=step_class,
+                step_class='quartet_integrations.%s' % step_class)
+            for name, value in parameters.items():
+                StepParameter.objects.create(step=step, name=name,
+                                             value=value)
+            task = Task.objects.create(name='%s Task' % step_class,
+                                       rule=rule)
+            TaskParameter.objects.create(task=task, name='pool',
+                                         value=pool.machine_name)
+            engine = RuleEngine(rule, task)
+            return engine.steps[1].execute([1, 3], engine.context)
+
+        # the steps that do not use the company prefix length work as well
+        self.assertEqual(
+            len(execute('serialbox.steps.ListToBarcodeConversionStep',
+                        **{'Company Prefix': '0999999',
+                           'Create List': 'True'})), 3)
+        self.assertEqual(
+            len(execute('rfxcel.steps.SerialboxSSCCConversionStep')), 2)
+        # the URN step falls back to the machine name as it always did
+        self.assertEqual(
+            len(execute('serialbox.steps.ListToUrnConversionStep')), 3)
+
+    def test_ttl(self):
+        now = [0.0]
+        cache = PoolMetadataCache(ttl=60, clock=lambda: now[0])
+        pool_metadata = cache.get('00377713123454')
+        now[0] = 59
+        self.assertIs(cache.get('00377713123454'), pool_metadata)
+        now[0] = 60
+        self.assertIsNot(cache.get('00377713123454'), pool_metadata)
+
+    def test_invalidation(self):
+        def cached():
+            return metadata.get_pool_metadata('00377713123454')
+
+        pool_metadata = cached()
+        # serialbox saves the region state on every allocation
+        self.region.state = 1001
+        self.region.save()
+        self.assertIs(cached(), pool_metadata)
+
+        self.region.active = False
+        self.region.save()
+        self.assertFalse(cached().region_active)
+
+        pool_metadata = cached()
+        self.trade_item.regulated_product_name = 'Headache Relief'
+        self.trade_item.save()
+        self.assertEqual(cached().trade_item.regulated_product_name,
+                         'Headache Relief')
+
+        pool_metadata = cached()
+        self.company.gs1_company_prefix = '03777130'
+        self.company.save()
+        self.assertIsNot(cached(), pool_metadata)
+
+        pool_metadata = cached()
+        self.region.delete()
+        self.assertIsNone(cached().region_type)
+
+    def test_hot_allocation(self):
+        rule = Rule.objects.create(name='URNs')
+        Step.objects.create(
+            rule=rule, order=1, name='URNs',
+            step_class='quartet_integrations.serialbox.steps.'
+                       'ListToUrnConversionStep')
+        for i in range(2):
+            task = Task.objects.create(name='URN Task %d' % i, rule=rule)
+            TaskParameter.objects.create(task=task, name='pool',
+                                         value='00377713123454')
+            engine = RuleEngine(rule, task)
+            step = engine.steps[1]
+            if i == 0:
+                step.execute([1, 10], engine.context)
+                continue
+            with CaptureQueriesContext(connection) as queries:
+                urns = step.execute([1, 10], engine.context)
+        # only the task parameters and task messages are left
+        self.assertEqual([query['sql'] for query in queries
+                          if 'quartet_capture_task' not in query['sql']], [])
+        self.assertEqual(urns[0], 'urn:epc:id:sgtin:0377713.012345.1')
+        self.assertEqual(engine.context.context['trade_item'],
+                         self.trade_item)
@@ -0,0 +1,204 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+from list_based_flavorpack.models import ListBasedRegion
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_db_number_count
+from quartet_capture.models import Rule
+from rest_framework.response import Response
+from serialbox import models as sb_models
+
+from quartet_integrations.generic import prefetch
+from quartet_integrations.generic.region_store import RegionNumberStore
+from quartet_integrations.generic.replenishment import \
+    ReplenishmentScheduler
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingExecutor:
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append((function, args))
+
+
+class TestWatermarks(TestCase):
+
+    def test_draw_rate(self):
+        clock = Clock()
+        rate = prefetch.DrawRate(window=600, clock=clock)
+        self.assertEqual(rate.per_second, 0.0)
+        rate.record(300)
+        # a single burst is spread over at least a minute
+        self.assertEqual(rate.per_second, 5.0)
+        clock.now += 120
+        rate.record(300)
+        self.assertEqual(rate.per_second, 5.0)
+        clock.now += 550
+        # the first draw has left the window
+        self.assertEqual(rate.per_second, 300 / 550)
+        clock.now += 600
+        self.assertEqual(rate.per_second, 0.0)
+
+    def test_compute(self):
+        watermarks = prefetch.Watermarks.compute(10.0, 30.0, 5000,
+                                                 safety_factor=2.0)
+        self.assertEqual((watermarks.low, watermarks.high), (600, 5600))
+        watermarks = prefetch.Watermarks.compute(0.0, 30.0, None)
+        self.assertEqual((watermarks.low, watermarks.high), (0, 0))
+
+
+class TestPreFetcher(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        pool = sb_models.Pool.objects.create(
+            readable_name='Line Pool', machine_name='00300077789102',
+            active=True, request_threshold=1000
+        )
+        self.region = ListBasedRegion.objects.create(
+            pool=pool,
+            readable_name='Line Region',
+            machine_name='00300077789102-1',
+            active=True,
+            processing_class_path=(
+                "list_based_flavorpack."
+                "processing_classes.third_party_processing."
+                "processing.DBProcessingClass"
+            ),
+            directory_path=directory,
+            number_replenishment_size=500,
+            rule=Rule.objects.create(name='Replenish')
+        )
+        self.next_number = 0
+        self.requested = []
+        self.write(2000)
+        self.clock = Clock()
+        self.executor = RecordingExecutor()
+        self.prefetcher = prefetch.PreFetcher(
+            self.executor, ReplenishmentScheduler(self.replenish),
+            lead_time=30.0, clock=self.clock
+        )
+
+    def write(self, count):
+        start = self.next_number
+        self.next_number += count
+        with RegionNumberStore(self.region) as store:
+            return store.write(str(i) for i in range(start, self.next_number))
+
+    def replenish(self, region, size):
+        self.requested.append((region.machine_name, size))
+        return self.write(size)
+
+    def draw(self, count):
+        with RegionNumberStore(self.region) as store:
+            with store.connection:
+                store.connection.execute(
+                    'delete from %s where rowid in (select rowid from %s '
+                    'limit ?)' % (store.table, store.table), (count,))
+        self.prefetcher.record(self.region.pool.machine_name, count)
+
+    def test_check(self):
+        pool = self.region.pool.machine_name
+        self.draw(600)
+        self.assertEqual(self.executor.submitted,
+                         [(self.prefetcher._check_in_thread, (pool,))])
+        # 10 numbers a second for 30 seconds, twice over: low is 600
+        self.assertEqual(
+            self.prefetcher.get_watermarks(pool, self.region).low, 600)
+        self.assertEqual(self.prefetcher.check(pool), [])
+        self.assertEqual(self.requested, [])
+
+        self.clock.now += 60
+        self.draw(700)
+        # 1300 numbers over 60 seconds make the low watermark 1300, the 700
+        # left are topped up to 1300 plus the replenishment size
+        results = self.prefetcher.check(pool)
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0].succeeded)
+        self.assertEqual(self.requested,
+                         [(self.region.machine_name, 1300 + 500 - 700)])
+        self.assertEqual(get_db_number_count(self.region), 1800)
+        # the measured replenishment time replaces the assumed lead time
+        self.assertLess(
+            self.prefetcher.get_watermarks(pool, self.region).low, 1300)
+        self.assertEqual(self.prefetcher._in_flight, set())
+
+    def test_pending_checks(self):
+        pool = self.region.pool.machine_name
+        for i in range(5):
+            self.prefetcher.record(pool, 10)
+        self.prefetcher.record('other', 10)
+        # one check waits per pool however many allocations are made
+        self.assertEqual(
+            self.executor.submitted,
+            [(self.prefetcher._check_in_thread, (pool,)),
+             (self.prefetcher._check_in_thread, ('other',))])
+        self.prefetcher._check_in_thread(pool)
+        self.prefetcher.record(pool, 10)
+        self.assertEqual(len(self.executor.submitted), 3)
+
+    def test_flat_file_regions_are_skipped(self):
+        self.region.processing_class_path = (
+            "list_based_flavorpack."
+            "processing_classes.third_party_processing."
+            "processing.ThirdPartyProcessingClass"
+        )
+        self.region.save()
+        self.assertEqual(
+            self.prefetcher.get_regions(self.region.pool.machine_name), [])
+
+    def test_mixin(self):
+        self.assertFalse(prefetch.PREFETCH_ENABLED)
+
+        class View:
+            def get(self, request, pool=None, size=None, region=None):
+                if size == '0':
+                    return Response('No numbers.', status=400)
+                if size == '1':
+                    return Response('Failed.', exception=True)
+                return 'response'
+
+        class PreFetchView(prefetch.PreFetchMixin, View):
+            pass
+
+        fake = mock.Mock()
+        with mock.patch.object(prefetch, 'get_prefetcher',
+                               return_value=fake), \
+                mock.patch.object(prefetch, 'PREFETCH_ENABLED', True):
+            self.assertEqual(
+                PreFetchView().get(None, '00300077789102', '25'),
+                'response'
+            )
+            PreFetchView().get(None)
+            # the errors did not draw any numbers
+            PreFetchView().get(None, '00300077789102', '0')
+            PreFetchView().get(None, '00300077789102', '1')
+        fake.record.assert_called_once_with('00300077789102', 25)
@@ -0,0 +1,104 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.test import TestCase
+from list_based_flavorpack.models import ListBasedRegion
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_region_table
+from serialbox import models as sb_models
+
+from quartet_integrations.generic.region_store import RegionNumberStore
+
+
+class TestRegionNumberStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.region = self.create_region('00300077789102')
+
+    def create_region(self, machine_name):
+        pool = sb_models.Pool.objects.create(
+            readable_name=machine_name, machine_name=machine_name,
+            active=True, request_threshold=1000
+        )
+        return ListBasedRegion.objects.create(
+            pool=pool,
+            readable_name=machine_name,
+            machine_name=machine_name,
+            processing_class_path=(
+                "list_based_flavorpack."
+                "processing_classes.third_party_processing."
+                "processing.ThirdPartyProcessingClass"
+            ),
+            directory_path=self.directory,
+            number_replenishment_size=20
+        )
+
+    def fetch(self, query, region=None):
+        region = region or self.region
+        connection = sqlite3.connect(region.db_file_path)
+        try:
+            return connection.execute(
+                query % get_region_table(region)).fetchall()
+        finally:
+            connection.close()
+
+    def test_write(self):
+        numbers = ['%08d' % i for i in range(100)]
+        with RegionNumberStore(self.region) as store:
+            # a generator is consumed without building a list
+            self.assertEqual(store.write(n for n in numbers), 100)
+        self.assertEqual(
+            self.fetch('select serial_number from %s where used = 0 '
+                       'order by rowid'),
+            [(n,) for n in numbers]
+        )
+
+    def test_recreated_file(self):
+        with RegionNumberStore(self.region) as store:
+            store.write(['1'])
+        os.remove(self.region.db_file_path)
+        # the table is created again in the new file
+        with RegionNumberStore(self.region) as store:
+            self.assertEqual(store.write(['2']), 1)
+        self.assertEqual(self.fetch('select serial_number from %s'),
+                         [('2',)])
+
+    def test_pragmas_and_index(self):
+        with RegionNumberStore(self.region) as store:
+            store.write(['1'])
+            self.assertEqual(
+                store.connection.execute('pragma journal_mode').fetchone(),
+                ('wal',)
+            )
+        # only the unique serial number index is maintained on insert
+        indexes = self.fetch("pragma index_list(%s)")
+        self.assertEqual(len(indexes), 1)
+        self.assertEqual(indexes[0][3], 'u')
+
+    def test_duplicate(self):
+        with RegionNumberStore(self.region) as store:
+            store.write(['1', '2'])
+            with self.assertRaises(sqlite3.IntegrityError):
+                store.write(['3', '4', '2', '5'])
+            self.assertEqual(store.current, '2')
+        # the failed batch was rolled back as a whole
+        self.assertEqual(self.fetch('select serial_number from %s'),
+                         [('1',), ('2',)])
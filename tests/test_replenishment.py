@@ -0,0 +1,198 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, TransactionTestCase
+from list_based_flavorpack.models import ListBasedRegion, \
+    ProcessingParameters
+from list_based_flavorpack.processing_classes.third_party_processing.rules import \
+    get_db_number_count
+from quartet_capture.models import Rule, Step
+from quartet_output.models import EndPoint, AuthenticationInfo
+from quartet_templates.models import Template
+from serialbox import models as sb_models
+
+from quartet_integrations.generic import sessions
+from quartet_integrations.generic.replenishment import \
+    ReplenishmentScheduler
+from tests.test_sessions import StubSOAPHandler
+
+DELAY = 0.2
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """
+    Holds every request for DELAY seconds and records the highest number
+    of requests in flight per path and, under '*', in total.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            for key in (self.path, '*'):
+                server.in_flight[key] += 1
+                server.peak[key] = max(server.peak[key],
+                                       server.in_flight[key])
+        time.sleep(DELAY)
+        with server.lock:
+            for key in (self.path, '*'):
+                server.in_flight[key] -= 1
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(test_case, handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test_case.addCleanup(server.server_close)
+    test_case.addCleanup(server.shutdown)
+    test_case.addCleanup(sessions.close_sessions)
+    return server
+
+
+def post_to_end_point(region, size):
+    sessions.get_session(region.end_point).post(region.end_point.urn,
+                                                region.machine_name)
+    return 10
+
+
+class TestReplenishmentScheduler(TestCase):
+
+    def setUp(self):
+        self.server = start_server(self, SlowHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_flight = Counter()
+        self.server.peak = Counter()
+        self.regions = []
+        for name in ('partner1', 'partner2'):
+            end_point = EndPoint.objects.create(
+                name=name,
+                urn='http://127.0.0.1:%d/%s' % (self.server.server_port,
+                                                name)
+            )
+            self.regions.extend(
+                ListBasedRegion(machine_name='%s-%d' % (name, i),
+                                end_point=end_point)
+                for i in range(6)
+            )
+
+    def test_fan_out(self):
+        scheduler = ReplenishmentScheduler(post_to_end_point, concurrency=2)
+        results = scheduler.replenish(self.regions)
+        self.assertEqual([r.machine_name for r in results],
+                         [r.machine_name for r in self.regions])
+        self.assertTrue(all(r.succeeded and r.count == 10 for r in results))
+        # no end point sees more than two requests at once...
+        self.assertEqual(self.server.peak['/partner1'], 2)
+        self.assertEqual(self.server.peak['/partner2'], 2)
+        # ...but both are served at the same time
+        self.assertGreater(self.server.peak['*'], 2)
+        # latency includes the wait for the end point
+        self.assertGreater(max(r.latency for r in results), DELAY * 3)
+
+    def test_failure(self):
+        def replenish(region, size):
+            if region.machine_name == 'partner1-3':
+                raise ValueError('no numbers')
+            return post_to_end_point(region, size)
+
+        results = ReplenishmentScheduler(replenish).replenish(self.regions)
+        failed = [r for r in results if not r.succeeded]
+        self.assertEqual([r.machine_name for r in failed], ['partner1-3'])
+        self.assertIsInstance(failed[0].error, ValueError)
+        self.assertEqual(sum(r.count for r in results), 110)
+
+
+class TestIRISReplenishment(TransactionTestCase):
+
+    def setUp(self):
+        self.server = start_server(self, StubSOAPHandler)
+        self.server.connections = 0
+        self.server.requests = 0
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        rule = Rule.objects.create(name='IRIS')
+        for order, step_class in enumerate(
+            ('IRISNumberRequestTransportStep',
+             'IRISNumberRequestProcessStep'), 1):
+            Step.objects.create(
+                rule=rule, order=order, name=step_class,
+                step_class='quartet_integrations.frequentz.steps.%s' %
+                           step_class
+            )
+        end_point = EndPoint.objects.create(
+            name='IRIS',
+            urn='http://127.0.0.1:%d/tags' % self.server.server_port
+        )
+        template = Template.objects.create(name='IRIS Template',
+                                           content='{{ format }}')
+        self.regions = []
+        for i in range(3):
+            pool = sb_models.Pool.objects.create(
+                readable_name='IRIS Pool %d' % i,
+                machine_name='0035199181701%d' % i,
+                active=True, request_threshold=200
+            )
+            region = ListBasedRegion.objects.create(
+                pool=pool,
+                readable_name='IRIS Region %d' % i,
+                machine_name='0351991.%d' % i,
+                active=True,
+                processing_class_path=(
+                    "list_based_flavorpack."
+                    "processing_classes.third_party_processing."
+                    "processing.DBProcessingClass"
+                ),
+                directory_path=directory,
+                number_replenishment_size=200,
+                rule=rule,
+                template=template,
+                end_point=end_point,
+                authentication_info=AuthenticationInfo.objects.create(
+                    username='user', password='password')
+            )
+            for key, value in (('format', 'SGTIN-96'),
+                               ('gtin', region.machine_name)):
+                ProcessingParameters.objects.create(list_based_region=region,
+                                                    key=key, value=value)
+            self.regions.append(region)
+
+    def test_replenish(self):
+        # the in memory sqlite test database does not allow writes from
+        # parallel threads, so the rules run one at a time here
+        results = ReplenishmentScheduler(workers=1).replenish(
+            ListBasedRegion.objects.select_related(
+                'pool', 'rule', 'template', 'end_point',
+                'authentication_info')
+        )
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.count, 1)
+        for region in self.regions:
+            self.assertEqual(get_db_number_count(region), 1)
+        # create, get and confirm per region
+        self.assertEqual(self.server.requests, 9)
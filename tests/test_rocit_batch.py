@@ -0,0 +1,220 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from lxml import etree
+from quartet_epcis.models.entries import Entry, EntryEvent
+from quartet_epcis.models.events import Event, InstanceLotMasterData
+from rest_framework.test import APITestCase
+
+from quartet_integrations.environment import get_environment
+from quartet_integrations.generic import hierarchy_cache
+from quartet_integrations.generic.hierarchy_cache import HierarchyCache, \
+    get_hierarchy_cache
+from quartet_integrations.rocit import query as rocit_query
+from quartet_integrations.rocit import views as rocit_views
+from quartet_integrations.rocit.query import RocItQuery
+from quartet_integrations.rocit.views import TYPES_NS, VIEW_NS
+
+REQUEST = '''<soapenv:Envelope
+    xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns:typ="%s" xmlns:com="%s">
+   <soapenv:Header/>
+   <soapenv:Body>
+      <typ:retrievePackagingHierarchy>%%s</typ:retrievePackagingHierarchy>
+   </soapenv:Body>
+</soapenv:Envelope>''' % (TYPES_NS, VIEW_NS)
+
+ROW = '''
+         <typ:voRow>
+            <com:TagId>%s</com:TagId>
+            <com:SendChildren>%s</com:SendChildren>
+            <com:SendProductInformation>true</com:SendProductInformation>
+         </typ:voRow>'''
+
+
+def pallet_id(p):
+    return 'urn:epc:id:sscc:0355555.00000000%02d' % p
+
+
+def case_id(p, c):
+    return 'urn:epc:id:sscc:0355555.1%03d%05d' % (p, c)
+
+
+def unit_id(p, c, u):
+    return 'urn:epc:id:sgtin:0355555.055555.%02d%03d%03d' % (p, c, u)
+
+
+class TestRocItBatch(APITestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(hierarchy_cache, '_hierarchy_cache',
+                                    HierarchyCache(cache_alias='default'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        now = timezone.now()
+        event = Event.objects.create(type='ob', action='ADD', event_time=now,
+                                     event_timezone_offset='+00:00')
+        InstanceLotMasterData.objects.bulk_create([
+            InstanceLotMasterData(event=event, name='lotNumber',
+                                  value='LOT1'),
+            InstanceLotMasterData(event=event, name='itemExpirationDate',
+                                  value='2030-01-01'),
+        ])
+        for p in range(6):
+            pallet = Entry.objects.create(
+                identifier=pallet_id(p),
+                last_disposition='urn:epcglobal:cbv:disp:in_transit')
+            cases = Entry.objects.bulk_create([
+                Entry(identifier=case_id(p, c), parent_id=pallet)
+                for c in range(3)])
+            units = Entry.objects.bulk_create([
+                Entry(identifier=unit_id(p, c, u), parent_id=case)
+                for c, case in enumerate(cases) for u in range(4)])
+            EntryEvent.objects.bulk_create([
+                EntryEvent(event=event, event_type='ob', event_time=now,
+                           entry=unit, identifier=unit.identifier)
+                for unit in units])
+
+    def post(self, *rows):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.client.post(
+                reverse('retrievePackagingHierarchiesResponse'),
+                REQUEST % ''.join(ROW % row for row in rows),
+                content_type='application/xml')
+            self.assertEqual(result.status_code, 200)
+            self.assertTrue(result.streaming)
+            content = b''.join(result.streaming_content)
+        results = etree.fromstring(content).findall(
+            './/{%s}result' % TYPES_NS)
+        return results, len(queries)
+
+    def text(self, result, name):
+        return result.findtext('{%s}%s' % (VIEW_NS, name))
+
+    def test_batch(self):
+        results, count = self.post(
+            (pallet_id(0), 'true'),
+            ('urn:epc:id:sscc:0355555.0000009999', 'true'),
+            (case_id(1, 2), 'false'),
+            (unit_id(2, 0, 0), 'true'),
+        )
+        self.assertEqual(len(results), 4)
+        pallet, missing, case, unit = results
+        self.assertEqual(self.text(pallet, 'TagId'), pallet_id(0))
+        self.assertEqual(self.text(pallet, 'Status'), 'IN_TRANSIT')
+        self.assertEqual(self.text(pallet, 'State'), 'SHIPPING')
+        self.assertEqual(self.text(pallet, 'ChildTagCount'), '3')
+        self.assertEqual(
+            [child.text for child in pallet.iter('{%s}ChildTagId' % VIEW_NS)],
+            [case_id(0, c) for c in range(3)])
+        info = pallet.find('{%s}ProductInformationVO' % VIEW_NS)
+        self.assertEqual(self.text(info, 'Quantity'), '12')
+        self.assertEqual(self.text(info, 'Lot'), 'LOT1')
+        self.assertEqual(self.text(info, 'ExpiryDate'), '2030-01-01')
+        self.assertEqual(
+            missing.find('{%s}Status' % VIEW_NS).get(
+                '{http://www.w3.org/2001/XMLSchema-instance}nil'), 'true')
+        self.assertEqual(self.text(missing, 'ChildTagCount'), '0')
+        self.assertEqual(self.text(case, 'ParentTagId'), pallet_id(1))
+        self.assertEqual(self.text(case, 'ChildTagCount'), '0')
+        self.assertEqual(self.text(unit, 'ParentTagId'), case_id(2, 0))
+        unit_info = unit.find('{%s}ProductInformationVO' % VIEW_NS)
+        self.assertEqual(self.text(unit_info, 'Quantity'), '1')
+        self.assertEqual(self.text(unit_info, 'Lot'), 'LOT1')
+
+    def test_environment(self):
+        # the response template comes from the shared environment and the
+        # tag ids are escaped
+        with mock.patch.object(rocit_views, 'get_environment',
+                               wraps=get_environment) as environment:
+            results, count = self.post(('urn:x:a&amp;b&lt;c', 'true'))
+        environment.assert_called_once_with('quartet_integrations')
+        self.assertEqual(self.text(results[0], 'TagId'), 'urn:x:a&b<c')
+
+    def test_constant_queries(self):
+        results, few = self.post(*[(pallet_id(p), 'true') for p in range(2)])
+        get_hierarchy_cache().clear()
+        results, many = self.post(*[(pallet_id(p), 'true')
+                                    for p in range(6)])
+        self.assertEqual(len(results), 6)
+        self.assertEqual(few, many)
+        # the entries are still read, the hierarchies are cached
+        results, cached = self.post(*[(pallet_id(p), 'true')
+                                      for p in range(6)])
+        self.assertEqual(cached, 1)
+
+    def test_nested_tag_ids(self):
+        # a pallet, one of its cases and the pallet again
+        rows = [(pallet_id(0), 'true'), (case_id(0, 0), 'true'),
+                (pallet_id(0), 'true')]
+        for recursive in (True, False):
+            get_hierarchy_cache().clear()
+            with mock.patch.object(rocit_query, 'ROCIT_RECURSIVE_QUERIES',
+                                   recursive):
+                pallet, case, again = self.post(*rows)[0]
+            self.assertEqual(
+                [child.text for child in
+                 pallet.iter('{%s}ChildTagId' % VIEW_NS)],
+                [case_id(0, c) for c in range(3)])
+            self.assertEqual(
+                self.text(pallet.find('{%s}ProductInformationVO' % VIEW_NS),
+                          'Quantity'), '12')
+            self.assertEqual(
+                [child.text for child in
+                 case.iter('{%s}ChildTagId' % VIEW_NS)],
+                [unit_id(0, 0, u) for u in range(4)])
+            self.assertEqual(
+                self.text(case.find('{%s}ProductInformationVO' % VIEW_NS),
+                          'Quantity'), '4')
+            self.assertEqual(
+                [child.text for child in
+                 again.iter('{%s}ChildTagId' % VIEW_NS)],
+                [case_id(0, c) for c in range(3)])
+
+    def test_limits(self):
+        # each pallet has 15 entries below it
+        for recursive in (True, False):
+            with mock.patch.object(rocit_query, 'ROCIT_RECURSIVE_QUERIES',
+                                   recursive):
+                hierarchy = RocItQuery.get_hierarchy(
+                    [pallet_id(p) for p in range(6)] + [case_id(0, 0)],
+                    max_size=15)
+                self.assertEqual(len(hierarchy), 6 * 4)
+                with self.assertRaises(RocItQuery.HierarchyLimitExceeded):
+                    RocItQuery.get_hierarchy([case_id(0, 0), pallet_id(0)],
+                                             max_size=14)
+        with mock.patch.object(rocit_views, 'ROCIT_MAX_BATCH_ROWS', 2):
+            self.assertEqual(self.client.post(
+                reverse('retrievePackagingHierarchiesResponse'),
+                REQUEST % ''.join(ROW % (pallet_id(p), 'true')
+                                  for p in range(3)),
+                content_type='application/xml').status_code, 400)
+
+    def test_bad_requests(self):
+        url = reverse('retrievePackagingHierarchiesResponse')
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(
+            self.client.post(url, REQUEST % '',
+                             content_type='application/xml').status_code,
+            400)
+        self.assertEqual(
+            self.client.post(url, '<broken',
+                             content_type='application/xml').status_code,
+            400)
@@ -0,0 +1,174 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from quartet_epcis.db_api.queries import EPCISDBProxy
+from quartet_epcis.models.entries import Entry, EntryEvent
+from quartet_epcis.models.events import Event, InstanceLotMasterData
+from quartet_masterdata.models import Company, TradeItem, TradeItemField
+
+from quartet_integrations.rocit import query as rocit_query
+from quartet_integrations.rocit.query import RocItQuery
+
+PALLET = 'urn:epc:id:sscc:0355555.0000000001'
+
+
+def case_id(i):
+    return 'urn:epc:id:sscc:0355555.10%08d' % i
+
+
+def unit_id(i, j):
+    return 'urn:epc:id:sgtin:0355555.055555.%03d%03d' % (i, j)
+
+
+def recursive_saleable_units(query, tag_id):
+    # the per node recursion this module used to run
+    ret_val = []
+    children = query.get_epcs_by_parent_identifier(identifier=tag_id,
+                                                   select_for_update=False)
+    if len(children) == 0:
+        ret_val.append(tag_id)
+    else:
+        for child in children:
+            ret_val += recursive_saleable_units(query, child)
+    return ret_val
+
+
+class TestRocItHierarchy(TestCase):
+
+    def setUp(self):
+        pallet = Entry.objects.create(identifier=PALLET)
+        cases = [Entry(identifier=case_id(i), parent_id=pallet,
+                       decommissioned=i == 3) for i in range(20)]
+        Entry.objects.bulk_create(cases)
+        # case 5 is empty and case 3 is decommissioned
+        Entry.objects.bulk_create([
+            Entry(identifier=unit_id(i, j), parent_id=case)
+            for i, case in enumerate(cases) if i != 5
+            for j in range(20)
+        ])
+
+    def expected(self):
+        return [unit_id(i, j) if i != 5 else case_id(5)
+                for i in range(20) if i != 3
+                for j in (range(20) if i != 5 else [0])]
+
+    def test_matches_recursion(self):
+        query = EPCISDBProxy()
+        with self.assertNumQueries(1):
+            units = RocItQuery.get_lowest_saleable_units(query, PALLET)
+        self.assertEqual(units, self.expected())
+        self.assertEqual(units, recursive_saleable_units(query, PALLET))
+        self.assertEqual(
+            RocItQuery.get_lowest_saleable_units(query, unit_id(0, 0)),
+            [unit_id(0, 0)])
+
+    def test_by_level(self):
+        with mock.patch.object(rocit_query, 'ROCIT_RECURSIVE_QUERIES', False):
+            # the pallet, the cases, the units and the (empty) next level
+            with self.assertNumQueries(4):
+                units = RocItQuery.get_lowest_saleable_units(None, PALLET)
+            self.assertEqual(units, self.expected())
+            with mock.patch.object(rocit_query, 'ROCIT_HIERARCHY_BATCH_SIZE',
+                                   7):
+                self.assertEqual(
+                    RocItQuery.get_lowest_saleable_units(None, PALLET),
+                    self.expected())
+
+    def test_limits(self):
+        for recursive in (True, False):
+            with mock.patch.object(rocit_query, 'ROCIT_RECURSIVE_QUERIES',
+                                   recursive):
+                self.assertEqual(len(RocItQuery.get_hierarchy(
+                    [PALLET], max_depth=2, max_size=19 + 360)), 19)
+                with self.assertRaises(RocItQuery.HierarchyLimitExceeded):
+                    RocItQuery.get_hierarchy([PALLET], max_depth=1)
+                with self.assertRaises(RocItQuery.HierarchyLimitExceeded):
+                    RocItQuery.get_hierarchy([PALLET], max_size=19 + 359)
+
+    def test_retrieve_packaging_hierarchy(self):
+        data = RocItQuery.RetrievePackagingHierarchy(PALLET, 'true', 'false')
+        self.assertEqual(data['child_tag_count'], 19)
+        self.assertEqual(data['child_tags'],
+                         [case_id(i) for i in range(20) if i != 3])
+        self.assertEqual(data['quantity'], len(self.expected()))
+
+
+class TestRocItProductInfo(TestCase):
+
+    def setUp(self):
+        self.units = [unit_id(0, j) for j in range(200)]
+        entries = Entry.objects.bulk_create(
+            [Entry(identifier=unit) for unit in self.units])
+        start = timezone.now()
+        self.commissioning = self.create_event(entries, start, {
+            'lotNumber': 'LOT1', 'itemExpirationDate': '2030-01-01',
+            'measurementUnitCode': ''
+        })
+        # a later event does not override the commissioning values
+        self.create_event(entries[:10], start + datetime.timedelta(hours=1), {
+            'lotNumber': 'LOT2', 'measurementUnitCode': 'EA'
+        })
+
+    def create_event(self, entries, event_time, ilmd):
+        event = Event.objects.create(type='ob', action='ADD',
+                                     event_time=event_time,
+                                     event_timezone_offset='+00:00')
+        EntryEvent.objects.bulk_create([
+            EntryEvent(event=event, event_type='ob', event_time=event_time,
+                       entry=entry, identifier=entry.identifier)
+            for entry in entries
+        ])
+        InstanceLotMasterData.objects.bulk_create([
+            InstanceLotMasterData(event=event, name=name, value=value)
+            for name, value in ilmd.items()
+        ])
+        return event
+
+    def test_single_query(self):
+        # the ILMD of the sampled units and the trade item of the product
+        with self.assertNumQueries(2):
+            info = RocItQuery.get_product_info(self.units)
+        self.assertEqual(info['lot'], 'LOT1')
+        self.assertEqual(info['expiry'], '2030-01-01')
+        self.assertEqual(info['uom'], 'EA')
+        self.assertEqual(info['product'], '')
+        self.assertEqual(RocItQuery.get_product_info([]),
+                         {'lot': '', 'expiry': '', 'uom': '', 'product': ''})
+
+    def test_sample(self):
+        with mock.patch.object(rocit_query, 'ROCIT_ILMD_SAMPLE_SIZE', 5):
+            info = RocItQuery.get_product_info(self.units[50:])
+        self.assertEqual(info['lot'], 'LOT1')
+        self.assertEqual(info['uom'], '')
+
+    def test_trade_item(self):
+        company = Company.objects.create(name='Test Co')
+        trade_item = TradeItem.objects.create(
+            GTIN14='00355555555551', additional_id='063915',
+            package_uom='CS', company=company)
+        with self.assertNumQueries(3):
+            info = RocItQuery.get_product_info(self.units[50:])
+        self.assertEqual((info['product'], info['uom']), ('063915', 'CS'))
+        TradeItemField.objects.create(trade_item=trade_item, name='uom',
+                                      value='Bx')
+        info = RocItQuery.get_product_info(self.units[50:])
+        self.assertEqual((info['product'], info['uom']), ('063915', 'Bx'))
+        # the ILMD is used before the master data
+        info = RocItQuery.get_product_info(self.units)
+        self.assertEqual((info['product'], info['uom']), ('063915', 'EA'))
@@ -0,0 +1,158 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import TestCase
+from list_based_flavorpack.models import ListBasedRegion, \
+    ProcessingParameters
+from quartet_capture.models import Rule, Task
+from quartet_capture.rules import RuleContext
+from quartet_output.models import EndPoint, AuthenticationInfo
+from serialbox import models as sb_models
+
+from quartet_integrations.frequentz.steps import \
+    IRISNumberRequestTransportStep
+from quartet_integrations.generic import sessions
+
+SOAP_RESPONSE = '''<soapenv:Envelope
+    xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body>
+<ns2:{name}
+    xmlns:ns2="http://www.ibm.com/epcis/serialid/TagManagerTypes">
+{body}
+</ns2:{name}>
+</soapenv:Body>
+</soapenv:Envelope>'''
+
+
+class StubSOAPHandler(BaseHTTPRequestHandler):
+    """
+    Answers the IRIS create, get and confirm calls over keep-alive
+    connections and counts the connections it was sent.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        self.server.requests += 1
+        if 'createTagRequest' in body:
+            response = SOAP_RESPONSE.format(
+                name='createTagResponse',
+                body='<ns2:requestId>REQ1</ns2:requestId>')
+        elif 'confirmTagsRequest' in body:
+            response = SOAP_RESPONSE.format(name='confirmTagsResponse',
+                                            body='')
+        else:
+            response = SOAP_RESPONSE.format(
+                name='getTagsResponse',
+                body='<ns2:tagResponse><ns2:quantity>1</ns2:quantity>'
+                     '<ns2:tagList>'
+                     '<ns2:tag>urn:epc:tag:sgtin-96:3.0351991.081701.1'
+                     '</ns2:tag></ns2:tagList></ns2:tagResponse>')
+        response = response.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestEndPointSessions(TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubSOAPHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.requests = 0
+        thread = threading.Thread(target=self.server.serve_forever,
+                                  daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(sessions.close_sessions)
+        self.url = 'http://127.0.0.1:%d/tags' % self.server.server_port
+        self.end_point = EndPoint.objects.create(name='IRIS', urn=self.url)
+
+    def test_get_session(self):
+        session = sessions.get_session(self.end_point)
+        self.assertIs(session, sessions.get_session(
+            EndPoint(name='copy', urn=self.url)))
+        # the cookies of one set of credentials are not sent with another
+        first, second = (AuthenticationInfo.objects.create(
+            username=username, password='password')
+            for username in ('first', 'second'))
+        first_session = sessions.get_session(self.end_point, first)
+        self.assertIsNot(first_session, session)
+        self.assertIs(first_session,
+                      sessions.get_session(self.end_point, first))
+        self.assertIsNot(first_session,
+                         sessions.get_session(self.end_point, second))
+        adapter = session.get_adapter(self.url)
+        self.assertEqual(adapter._pool_maxsize, sessions.HTTP_POOL_SIZE)
+        self.assertEqual(adapter.max_retries.connect, sessions.HTTP_RETRIES)
+        self.assertEqual(adapter.max_retries.read, 0)
+        # requests wait as long as they did without a session unless a
+        # timeout is configured
+        self.assertIsNone(session.timeout)
+        sessions.close_sessions()
+        self.assertIsNot(session, sessions.get_session(self.end_point))
+
+    def test_connection_reuse(self):
+        for i in range(3):
+            requests.post(self.url, 'createTagRequest')
+        self.assertEqual(self.server.connections, 3)
+
+        self.server.connections = self.server.requests = 0
+        pool = sb_models.Pool.objects.create(
+            readable_name='IRIS Pool', machine_name='00351991817017',
+            active=True, request_threshold=200
+        )
+        region = ListBasedRegion.objects.create(
+            pool=pool,
+            readable_name='IRIS Region',
+            machine_name='0351991.0',
+            processing_class_path=(
+                "list_based_flavorpack."
+                "processing_classes.third_party_processing."
+                "processing.ThirdPartyProcessingClass"
+            ),
+            directory_path='/tmp',
+            number_replenishment_size=200,
+            end_point=self.end_point,
+            authentication_info=AuthenticationInfo.objects.create(
+                username='user', password='password')
+        )
+        for key, value in (('format', 'SGTIN-96'), ('gtin', '0351991.0')):
+            ProcessingParameters.objects.create(list_based_region=region,
+                                                key=key, value=value)
+        rule = Rule.objects.create(name='IRIS')
+        task = Task.objects.create(name='IRIS Task', rule=rule)
+        step = IRISNumberRequestTransportStep(db_task=task)
+        context = RuleContext(rule.name, task.name)
+        for i in range(2):
+            response = step._send_message(None, context, region)
+            self.assertIn(b'urn:epc:tag:sgtin-96', response.content)
+        # create, get and confirm twice over one kept alive connection
+        self.assertEqual(self.server.requests, 6)
+        self.assertEqual(self.server.connections, 1)
@@ -0,0 +1,100 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import os
+
+from django.test import TestCase
+from lxml import etree
+
+from quartet_integrations.generic.soap import SoapFields, iterparse_fields, \
+    parse_request
+from quartet_integrations.opsm.views import NAMESPACES, \
+    OPSMNumberRangeView
+from quartet_integrations.rocit.views import RetrievePackagingHierarchyView
+from quartet_integrations.systech.guardian.views import \
+    GuardianNumberRangeView
+from quartet_integrations.tracelink.views import TraceLinkNumberRangeView
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def read(path):
+    with open(os.path.join(DATA, path), 'rb') as f:
+        return f.read()
+
+
+def parse_opsm_uncompiled(body):
+    # how the OPSM view read a request before its expressions were compiled
+    prefix = '//soapenv:Body/typ:createProcessSerialGenerationRequest/' \
+             'typ:serialGenerationRequest/'
+    root = etree.fromstring(body)
+    return [
+        root.xpath('//soapenv:Header/wsse:Security/wsse:UsernameToken/'
+                   'wsse:Username', namespaces=NAMESPACES)[0].text,
+        root.xpath('//soapenv:Header/wsse:Security/wsse:UsernameToken/'
+                   'wsse:Password', namespaces=NAMESPACES)[0].text,
+        root.xpath('%scom:Location' % prefix, namespaces=NAMESPACES)[0].text,
+        root.xpath('%scom:SerialQuantity' % prefix,
+                   namespaces=NAMESPACES)[0].text,
+        root.xpath('%scom:Gtin' % prefix, namespaces=NAMESPACES)[0].text,
+    ]
+
+
+class TestSoap(TestCase):
+
+    def test_soap_fields(self):
+        fields = SoapFields({'a': 'x:a', 'b': 'x:b', 'c': 'x:c'},
+                            {'x': 'urn:x'}, prefix='/x:root/')
+        root = parse_request(
+            b'<root xmlns="urn:x"><a>1</a><!-- comment --><b/></root>')
+        self.assertEqual(fields.extract(root),
+                         {'a': '1', 'b': None, 'c': None})
+
+    def test_entities(self):
+        root = parse_request(
+            b'<!DOCTYPE root [<!ENTITY e SYSTEM "file:///etc/passwd">]>'
+            b'<root>&e;</root>')
+        self.assertNotIn('root:', etree.tostring(root).decode())
+        with self.assertRaises(etree.XMLSyntaxError):
+            parse_request(b'<root>')
+
+    def test_iterparse_fields(self):
+        elements = [element.text for event, element in iterparse_fields(
+            b'<a xmlns="urn:x"><b>1</b><c>2</c><d>3</d></a>', ['b', 'd'])]
+        self.assertEqual(elements, ['1', '3'])
+
+    def test_opsm(self):
+        values = OPSMNumberRangeView().parse_request(
+            read('opsm_gtin_request.xml'))
+        self.assertEqual(values, {
+            'username': 'testuser', 'password': 'unittest',
+            'location': '03130000000-GTIN', 'count': '20',
+            'gtin': '00313000007772'
+        })
+        self.assertEqual(
+            parse_opsm_uncompiled(read('opsm_gtin_request.xml')),
+            [values[name] for name in
+             ('username', 'password', 'location', 'count', 'gtin')])
+        values = OPSMNumberRangeView().parse_request(
+            read('opsm_sscc_request.xml'))
+        self.assertIsNone(values['gtin'])
+
+    def test_rocit(self):
+        view = RetrievePackagingHierarchyView()
+        self.assertEqual(
+            view.get_rows(parse_request(
+                read('rocit-search-sscc-request.xml'))),
+            [('urn:epc:id:sscc:305555.0000000001', 'true', 'true')])
+        self.assertEqual(view.get_rows(parse_request(
+            read('rocit-search-missing-tagid.xml'))), [])
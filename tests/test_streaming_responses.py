@@ -0,0 +1,162 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import tracemalloc
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+from jinja2 import Environment, UndefinedError
+from quartet_capture.models import Rule, Step, StepParameter
+from quartet_templates.models import Template
+from rest_framework.test import APITestCase
+from serialbox.management.commands.load_serialbox_auth import \
+    Command as load_auth
+from serialbox.models import Pool, ResponseRule, SequentialRegion
+
+from quartet_integrations.generic.streaming import StreamingTemplate
+from quartet_integrations.serialbox.ranges import NumberRange
+from quartet_integrations.systech.guardian.views import \
+    GuardianNumberRangeRenderer
+
+SERIALS_TEMPLATE = '''<SOAP:Envelope>
+  <ObjectKey>{{ task_parameters.machine_name }}</ObjectKey>
+  <SerialNumbers>
+{% for number in data %}
+    <SerialNumber>{{ number }}</SerialNumber>
+{% endfor %}
+  </SerialNumbers>
+</SOAP:Envelope>
+'''
+
+REQUEST = '''<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+    <soapenv:Body>
+        <ain:NumberRangeRequestMessage xmlns:ain="http://sap.com/xi/AIN">
+            <SendingSystem>Systech</SendingSystem>
+            <IDType>GS1_SER</IDType>
+            <EncodingType>SGTIN</EncodingType>
+            <Size>%d</Size>
+            <ObjectKey>
+                <Name>GTIN</Name>
+                <Value>00377700000990</Value>
+            </ObjectKey>
+        </ain:NumberRangeRequestMessage>
+    </soapenv:Body>
+</soapenv:Envelope>
+'''
+
+
+def serials(size):
+    environment = Environment(trim_blocks=True, lstrip_blocks=True)
+    return StreamingTemplate(
+        environment.from_string(SERIALS_TEMPLATE),
+        {'data': NumberRange(1, size).format('%012d'.__mod__),
+         'task_parameters': {'machine_name': '00377700000990'}}
+    )
+
+
+def first_chunk(size):
+    tracemalloc.start()
+    try:
+        chunk = next(iter(serials(size)))
+        return chunk, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestStreamingTemplate(TestCase):
+
+    def test_chunks(self):
+        template = serials(10000)
+        template.chunk_size = 1000
+        chunks = list(template)
+        self.assertTrue(all(len(chunk) < 1100 for chunk in chunks))
+        self.assertEqual(''.join(chunks), str(template))
+        self.assertEqual(str(template).count('<SerialNumber>'), 10000)
+        self.assertIn('<SerialNumber>000000010000</SerialNumber>',
+                      chunks[-1])
+
+    def test_prime(self):
+        template = serials(10)
+        template.prime()
+        self.assertEqual(str(template), str(serials(10)))
+        template = StreamingTemplate(
+            Environment().from_string('{{ data.number.missing }}'),
+            {'data': {}})
+        with self.assertRaises(UndefinedError):
+            template.prime()
+
+    def test_request_size(self):
+        small, small_peak = first_chunk(1000)
+        large, large_peak = first_chunk(1000000)
+        self.assertEqual(small[:10000], large[:10000])
+        self.assertLess(large_peak, 1024 * 1024)
+        self.assertLess(large_peak, small_peak * 2)
+
+        tracemalloc.start()
+        try:
+            size = sum(len(chunk) for chunk in serials(100000))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(size, 100000 * 40)
+        self.assertLess(peak, 1024 * 1024)
+
+    def test_renderer(self):
+        self.assertEqual(
+            GuardianNumberRangeRenderer().render(serials(3)),
+            str(serials(3)).encode('utf-8')
+        )
+
+
+class TestStreamingNumberRangeView(APITestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser',
+                                        password='unittest',
+                                        email='testuser@seriallab.local')
+        load_auth().handle()
+        user.groups.add(Group.objects.get(name='Pool API Access'))
+        self.client.force_authenticate(user=user)
+        Template.objects.create(
+            name='Streaming Serials',
+            content=SERIALS_TEMPLATE.replace(
+                'in data', 'in range(data[0], data[1] + 1)'))
+        rule = Rule.objects.create(name='Streaming Number Reply')
+        step = Step.objects.create(
+            name='Stream With Template', rule=rule, order=1,
+            step_class='quartet_integrations.generic.steps.'
+                       'StreamingTemplateStep')
+        StepParameter.objects.create(step=step, name='Template Name',
+                                     value='Streaming Serials')
+        pool = Pool.objects.create(machine_name='00377700000990',
+                                   readable_name='Streaming Pool',
+                                   active=True, request_threshold=100000)
+        SequentialRegion.objects.create(
+            machine_name=pool.machine_name, readable_name='Streaming Region',
+            start=1, end=999999999, order=1, state=1, pool=pool)
+        ResponseRule.objects.create(rule=rule, pool=pool, content_type='xml')
+
+    def test_streamed_response(self):
+        url = '%s?format=xml' % reverse('guardianNumberRangeService')
+        result = self.client.post(url, REQUEST % 75000,
+                                  content_type='application/xml')
+        self.assertEqual(result.status_code, 200)
+        self.assertTrue(result.streaming)
+        self.assertEqual(result['Content-Type'], 'text/xml; charset=utf-8')
+        content = b''.join(result.streaming_content).decode('utf-8')
+        self.assertEqual(content.count('<SerialNumber>'), 75000)
+        self.assertIn('<ObjectKey>00377700000990</ObjectKey>', content)
+        self.assertIn('<SerialNumber>75000</SerialNumber>', content)
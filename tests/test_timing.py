@@ -0,0 +1,139 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import os
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+from quartet_capture.models import Rule, Step, StepParameter
+from quartet_templates.models import Template
+from rest_framework.test import APITestCase
+from serialbox.management.commands.load_serialbox_auth import \
+    Command as load_auth
+from serialbox.models import Pool, ResponseRule, SequentialRegion
+
+from quartet_integrations.generic.timing import LatencyHistogram, \
+    PoolTimings, get_timings
+
+
+class TestLatencyHistogram(TestCase):
+
+    def test_record(self):
+        histogram = LatencyHistogram(bounds=(1, 10, 100))
+        for ms in (0.5, 0.9, 5, 50, 50, 500):
+            histogram.record(ms / 1000)
+        ret = histogram.as_dict()
+        self.assertEqual(ret['count'], 6)
+        self.assertEqual(ret['buckets'],
+                         {'1': 2, '10': 1, '100': 2, '+Inf': 1})
+        self.assertEqual(ret['max_ms'], 500)
+        self.assertEqual(ret['p50_ms'], 10)
+        self.assertEqual(ret['p95_ms'], 500)
+        self.assertIsNone(LatencyHistogram().percentile(.5))
+
+    def test_partners(self):
+        timings = PoolTimings(max_partners=2)
+        for partner in ('a', 'b', 'c', 'a', 'd'):
+            timings.record({}, partner=partner)
+        self.assertEqual(timings.partners, {'a': 2, 'b': 1, 'other': 2})
+
+
+class TestNumberRangeTimings(APITestCase):
+
+    def setUp(self):
+        get_timings().clear()
+        self.user = User.objects.create_user(username='testuser',
+                                             password='unittest',
+                                             email='testuser@seriallab.local')
+        load_auth().handle()
+        self.user.groups.add(Group.objects.get(name='Pool API Access'))
+        self.client.force_authenticate(user=self.user)
+        Template.objects.create(name='Number Range Reply',
+                                content='{{ data[0] }}-{{ data[1] }}')
+        self.rule = Rule.objects.create(name='Number Range Reply')
+        self.step = Step.objects.create(
+            name='Format', rule=self.rule, order=1,
+            step_class='quartet_templates.steps.TemplateStep')
+        StepParameter.objects.create(step=self.step, name='Template Name',
+                                     value='Number Range Reply')
+        pool = Pool.objects.create(machine_name='00377700000136',
+                                   readable_name='GTIN Pool', active=True)
+        SequentialRegion.objects.create(
+            machine_name=pool.machine_name, readable_name='GTIN Region',
+            start=1, end=999999999, order=1, state=1, pool=pool)
+        ResponseRule.objects.create(rule=self.rule, pool=pool,
+                                    content_type='xml')
+
+    def tearDown(self):
+        get_timings().clear()
+
+    def request(self, pool='00377700000136', status_code=200):
+        path = os.path.join(os.path.dirname(__file__),
+                            'data/systech/gtin_sequential_number_request.xml')
+        with open(path, 'rb') as f:
+            result = self.client.post(
+                '%s?format=xml' % reverse('guardianNumberRangeService'),
+                f.read().replace(b'00377700000136', pool.encode()),
+                content_type='application/xml')
+        self.assertEqual(result.status_code, status_code)
+        return result
+
+    def timings(self):
+        result = self.client.get(reverse('numberRangeTimings'))
+        self.assertEqual(result.status_code, 200)
+        return result.json()
+
+    def test_timings(self):
+        self.request()
+        self.request()
+        timings = self.timings()['GuardianNumberRangeView']['00377700000136']
+        self.assertEqual(timings['requests'], 2)
+        self.assertEqual(timings['numbers'], 100)
+        self.assertEqual(timings['errors'], 0)
+        self.assertEqual(timings['partners'], {'Systech': 2})
+        self.assertEqual(
+            sorted(timings['phases']),
+            ['allocate', 'parse', 'rule', 'task_parameters', 'total'])
+        for phase in timings['phases'].values():
+            self.assertEqual(phase['count'], 2)
+            self.assertEqual(sum(phase['buckets'].values()), 2)
+
+        # only staff may clear the timings
+        result = self.client.delete(reverse('numberRangeTimings'))
+        self.assertEqual(result.status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        result = self.client.delete(reverse('numberRangeTimings'))
+        self.assertEqual(result.status_code, 204)
+        self.assertEqual(self.timings(), {})
+
+    def test_unknown_pool(self):
+        self.request(pool='00377700000999', status_code=404)
+        timings = self.timings()['GuardianNumberRangeView']
+        self.assertEqual(list(timings), [''])
+        self.assertEqual(timings['']['errors'], 1)
+
+    def test_streamed_render(self):
+        self.step.step_class = \
+            'quartet_integrations.generic.steps.StreamingTemplateStep'
+        self.step.save()
+        result = self.request()
+        phases = self.timings()['GuardianNumberRangeView'][
+            '00377700000136']['phases']
+        self.assertNotIn('render', phases)
+        self.assertEqual(b''.join(result.streaming_content), b'1-50')
+        phases = self.timings()['GuardianNumberRangeView'][
+            '00377700000136']['phases']
+        self.assertEqual(phases['render']['count'], 1)
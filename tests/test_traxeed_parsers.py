@@ -0,0 +1,151 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.generic.ordered_set import OrderedSet
+from quartet_integrations.traxeed import parsers
+from quartet_integrations.traxeed.parsers import (
+    TraxeedParser,
+    TraxeedRfxcelParser,
+    TraxeedIRISParser,
+    TraxeedCIVICAParser
+)
+
+REG_EX = '^urn:epc:id:sgtin:[0-9]{6,12}\.[0-9]{1,7}'
+
+DOCUMENT = '''<?xml version="1.0"?>
+<epcis:EPCISDocument schemaVersion="1.2" xmlns:epcis="urn:epcglobal:epcis:xsd:1" xmlns:cbvmda="urn:epcglobal:cbv:mda">
+  <EPCISBody>
+    <EventList>
+      <ObjectEvent>
+        <eventTime>2019-12-19T11:00:53Z</eventTime>
+        <recordTime>2019-12-19T11:00:53Z</recordTime>
+        <eventTimeZoneOffset>-05:00</eventTimeZoneOffset>
+        <epcList>
+          {epcs}
+        </epcList>
+        <action>ADD</action>
+        <bizStep>urn:epcglobal:cbv:bizstep:commissioning</bizStep>
+        <disposition>urn:epcglobal:cbv:disp:active</disposition>
+        <readPoint><id>urn:epc:id:sgln:0351754.00000.0</id></readPoint>
+        <bizLocation><id>urn:epc:id:sgln:0351754.00000.0</id></bizLocation>
+        <bizTransactionList>
+          <bizTransaction type="urn:epcglobal:cbv:btt:po">urn:epcglobal:cbv:bt:0351754000007:PO1</bizTransaction>
+        </bizTransactionList>
+        <extension>
+          <ilmd>
+            <cbvmda:lotNumber>LOT1</cbvmda:lotNumber>
+            <cbvmda:itemExpirationDate>2021-12-31</cbvmda:itemExpirationDate>
+          </ilmd>
+        </extension>
+      </ObjectEvent>
+      {aggregations}
+    </EventList>
+  </EPCISBody>
+</epcis:EPCISDocument>
+'''
+
+AGGREGATION = '''<AggregationEvent>
+        <eventTime>2019-12-19T11:00:53Z</eventTime>
+        <recordTime>2019-12-19T11:00:53Z</recordTime>
+        <eventTimeZoneOffset>-05:00</eventTimeZoneOffset>
+        <parentID>{parent}</parentID>
+        <childEPCs><epc>{child}</epc></childEPCs>
+        <action>ADD</action>
+        <bizStep>urn:epcglobal:cbv:bizstep:packing</bizStep>
+        <disposition>urn:epcglobal:cbv:disp:in_progress</disposition>
+        <readPoint><id>urn:epc:id:sgln:0351754.00000.0</id></readPoint>
+        <bizLocation><id>urn:epc:id:sgln:0351754.00000.0</id></bizLocation>
+      </AggregationEvent>'''
+
+
+def build_document(sscc_count):
+    """
+    Builds a document commissioning `sscc_count` SSCCs where the first half
+    are aggregated into the second half.
+    """
+    ssccs = ['urn:epc:id:sscc:0339822.3%09d' % i for i in range(sscc_count)]
+    half = sscc_count // 2
+    epcs = ''.join('<epc>%s</epc>' % sscc for sscc in ssccs)
+    aggregations = ''.join(
+        AGGREGATION.format(parent=ssccs[half + i], child=ssccs[i])
+        for i in range(half)
+    )
+    return DOCUMENT.format(epcs=epcs, aggregations=aggregations).encode()
+
+
+class TestTraxeedParsers(SimpleTestCase):
+
+    def test_parsers(self):
+        curpath = os.path.dirname(__file__)
+        data_path = os.path.join(curpath, 'data/tx_rf_comm_agg_epcis.xml')
+        with open(data_path, 'rb') as data_file:
+            data = data_file.read()
+        for parser_class in (TraxeedParser, TraxeedRfxcelParser,
+                             TraxeedIRISParser, TraxeedCIVICAParser):
+            parser = parser_class(io.BytesIO(data), reg_ex=REG_EX)
+            parser.parse()
+            self.assertEqual(parser.sscc_list,
+                             ['urn:epc:id:sscc:0339822.3000146411'])
+            self.assertEqual(parser.lot_number, 'STMX1')
+            self.assertEqual(
+                list(parser.comm_pallets_event.epc_list),
+                ['urn:epc:id:sscc:0339822.3000146411']
+            )
+        self.assertEqual(parser.PO,
+                         'urn:epcglobal:cbv:bt:0684276000010:APO000123')
+
+    def test_aggregated_ssccs_are_removed(self):
+        parser = TraxeedRfxcelParser(io.BytesIO(build_document(10)),
+                                     reg_ex=REG_EX)
+        parser.parse()
+        expected = ['urn:epc:id:sscc:0339822.3%09d' % i for i in range(5, 10)]
+        self.assertEqual(parser.sscc_list, expected)
+        self.assertEqual(list(parser.comm_pallets_event.epc_list), expected)
+        self.assertEqual(len(parser._aggregation_events), 5)
+
+    def test_one_partial_event(self):
+        # two partial SSCCs go into the same commissioning event
+        for parser_class in (TraxeedParser, TraxeedRfxcelParser,
+                             TraxeedIRISParser, TraxeedCIVICAParser):
+            parser = parser_class(io.BytesIO(build_document(4)),
+                                  reg_ex=REG_EX)
+            parser.parse()
+            partials = [event for event in parser._object_events
+                        if event is parser.comm_partial_event]
+            self.assertEqual(len(partials), 1)
+            self.assertEqual(
+                list(parser.comm_partial_event.epc_list),
+                ['urn:epc:id:sscc:0339822.3%09d' % i for i in range(2)])
+            self.assertEqual(len(parser._object_events), 2)
+
+    def test_aggregation_uses_sets(self):
+        # the aggregated SSCCs are removed from sets, not scanned lists, and
+        # every event shares the parser's environment
+        data = build_document(2000)
+        with mock.patch.object(parsers, 'get_default_environment',
+                               wraps=parsers.get_default_environment) as env:
+            parser = TraxeedRfxcelParser(io.BytesIO(data), reg_ex=REG_EX)
+            parser.parse()
+        self.assertEqual(env.call_count, 1)
+        self.assertIsInstance(parser._ssccs, OrderedSet)
+        self.assertIsInstance(parser.comm_pallets_event.epc_list, OrderedSet)
+        self.assertEqual(len(parser.sscc_list), 1000)
+        for event in parser._aggregation_events:
+            self.assertIs(event._env, parser._env)
@@ -0,0 +1,82 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from django.test import TestCase
+from lxml import etree
+from quartet_capture import models
+from quartet_capture.tasks import execute_rule
+from quartet_output.steps import ContextKeys
+
+from quartet_integrations.traxeed import profiles
+from quartet_integrations.traxeed.parsers import TraxeedRfxcelParser
+from tests.test_traxeed_parsers import build_document
+
+SOURCE_OWNER = 'urn:epc:id:sgln:0684276.00001.0'
+DESTINATION_OWNER = 'urn:epc:id:sgln:0339822.00010.0'
+
+
+class TestTraxeedProfiles(TestCase):
+
+    def test_get_profile(self):
+        self.assertIs(profiles.get_profile('rfxcel'),
+                      profiles.get_profile('RFXCEL'))
+        self.assertIs(profiles.get_profile('iris').parser_class,
+                      profiles.get_profile('IRIS').parser_class)
+        self.assertFalse(profiles.get_profile('hk').ship)
+        with self.assertRaises(profiles.ProfileNotFound):
+            profiles.get_profile('unknown')
+
+    def test_templates_are_resolved_once(self):
+        profile = profiles.get_profile('CIVICA')
+        self.assertIs(profile.document_template, profile.document_template)
+        self.assertIs(profile.shipping_template, profile.shipping_template)
+
+    def test_configured_profile(self):
+        profiles.register_profile(profiles.TraxeedProfile(
+            'partner',
+            'quartet_integrations.traxeed.parsers.TraxeedRfxcelParser',
+            'traxeed/tx_seton_epcis_document.xml'
+        ))
+        self.addCleanup(profiles._profiles.pop, 'partner')
+        self.assertIs(profiles.get_profile('partner').parser_class,
+                      TraxeedRfxcelParser)
+        document = self._execute('partner')
+        root = etree.fromstring(document.encode())
+        events = list(root.iter('ObjectEvent'))
+        shipping = events[-1]
+        self.assertEqual(shipping.findtext('bizStep'),
+                         'urn:epcglobal:cbv:bizstep:shipping')
+        self.assertEqual(len(list(shipping.iter('epc'))), 5)
+        self.assertIn(SOURCE_OWNER, [s.text for s in shipping.iter('source')])
+        self.assertIn(DESTINATION_OWNER,
+                      [d.text for d in shipping.iter('destination')])
+        self.assertEqual(
+            shipping.findtext('bizTransactionList/bizTransaction'),
+            'urn:epcglobal:cbv:bt:0351754000007:PO1'
+        )
+
+    def _execute(self, profile_name):
+        rule = models.Rule.objects.create(name='Traxeed %s' % profile_name)
+        step = models.Step.objects.create(
+            name='Traxeed', order=1, rule=rule,
+            step_class='quartet_integrations.traxeed.steps.TraxeedOutputStep'
+        )
+        for name, value in (('Target Profile', profile_name),
+                            ('Source Owning Party', SOURCE_OWNER),
+                            ('Destination Owning Party', DESTINATION_OWNER)):
+            models.StepParameter.objects.create(step=step, name=name,
+                                                value=value)
+        task = models.Task.objects.create(rule=rule, name=rule.name)
+        context = execute_rule(build_document(10), task)
+        return context.context[ContextKeys.OUTBOUND_EPCIS_MESSAGE_KEY.value]
@@ -0,0 +1,127 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import io
+import tracemalloc
+from unittest import mock
+
+from django.test import TestCase
+from EPCPyYes.core.v1_2 import template_events
+from lxml import etree
+from quartet_capture import models
+from quartet_capture.tasks import execute_rule
+from quartet_output.steps import ContextKeys
+
+from quartet_integrations.extended.environment import get_default_environment
+from quartet_integrations.generic import streaming
+from quartet_integrations.generic.streaming import StreamingEPCISDocument
+from quartet_integrations.traxeed.parsers import TraxeedRfxcelParser
+from tests.test_traxeed_parsers import build_document, REG_EX
+
+STEP_CLASSES = (
+    'quartet_integrations.traxeed.steps.ProcessTraxeedStep',
+    'quartet_integrations.traxeed.steps.TraxeedRfxcel',
+    'quartet_integrations.traxeed.steps.TraxeedIRIS',
+    'quartet_integrations.traxeed.steps.TraxeedCIVICA',
+)
+
+
+def get_events(document):
+    '''
+    Returns the event tags and EPCs of a rendered document in order.
+    '''
+    root = etree.fromstring(document)
+    ret = []
+    for event in root.iter('ObjectEvent', 'AggregationEvent'):
+        ret.append((event.tag, tuple(epc.text for epc in event.iter('epc')),
+                    event.findtext('parentID')))
+    return ret
+
+
+class TestTraxeedStreaming(TestCase):
+
+    def test_streamed_document_matches(self):
+        data = build_document(20)
+        for step_class in STEP_CLASSES:
+            rendered = self._execute(step_class, data, False)
+            streamed = self._execute(step_class, data, True)
+            self.assertTrue(hasattr(streamed, 'read'))
+            streamed = streamed.read()
+            rendered_events = get_events(rendered.encode())
+            streamed_events = get_events(streamed)
+            # same events, the aggregation events just come first
+            self.assertEqual(sorted(rendered_events, key=str),
+                             sorted(streamed_events, key=str))
+            self.assertEqual(streamed_events[0][0], 'AggregationEvent')
+            rendered_root = etree.fromstring(rendered.encode())
+            streamed_root = etree.fromstring(streamed)
+            self.assertEqual(rendered_root.tag, streamed_root.tag)
+            self.assertEqual(rendered_root.nsmap, streamed_root.nsmap)
+
+    def test_stream_is_rewound(self):
+        env = get_default_environment()
+        document = StreamingEPCISDocument(
+            env.get_template('traxeed/tx_rfxcel_epcis_document.xml'),
+            additional_context={'identifier': 'abc'}
+        )
+        stream = document.close()
+        content = stream.read().decode()
+        self.assertIn('<EventList>', content)
+        self.assertIn('abc', content)
+        self.assertEqual(document.event_count, 0)
+
+    def test_peak_memory(self):
+        data = build_document(20000)
+        env = get_default_environment()
+        template = env.get_template('traxeed/tx_rfxcel_epcis_document.xml')
+
+        tracemalloc.start()
+        parser = TraxeedRfxcelParser(io.BytesIO(data), reg_ex=REG_EX)
+        parser.parse()
+        template_events.EPCISEventListDocument(
+            parser._object_events + parser._aggregation_events,
+            None,
+            template=template
+        ).render()
+        rendered_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # the spool keeps up to SPOOL_MAX_SIZE of the document in memory,
+        # a small one measures what is held while the events are streamed
+        tracemalloc.start()
+        with mock.patch.object(streaming, 'SPOOL_MAX_SIZE', 1024 * 1024):
+            document = StreamingEPCISDocument(template)
+        parser = TraxeedRfxcelParser(io.BytesIO(data), reg_ex=REG_EX,
+                                     event_sink=document)
+        parser.parse()
+        document.write_events(parser._object_events)
+        document.close()
+        streamed_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(parser._aggregation_events, [])
+        self.assertEqual(document.event_count,
+                         10000 + len(parser._object_events))
+        self.assertLess(streamed_peak, rendered_peak / 2)
+
+    def _execute(self, step_class, data, stream_output):
+        rule = models.Rule.objects.create(
+            name='%s %s' % (step_class, stream_output))
+        step = models.Step.objects.create(name='Traxeed', order=1,
+                                          step_class=step_class, rule=rule)
+        models.StepParameter.objects.create(step=step, name='Stream Output',
+                                            value=stream_output)
+        task = models.Task.objects.create(rule=rule, name=rule.name)
+        context = execute_rule(data, task)
+        return context.context[ContextKeys.OUTBOUND_EPCIS_MESSAGE_KEY.value]
@@ -0,0 +1,73 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+import datetime
+import io
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+
+from quartet_integrations.traxeed import timeshift
+from quartet_integrations.traxeed.parsers import TraxeedRfxcelParser
+from tests.test_traxeed_parsers import build_document, REG_EX
+
+RECORD_TIMES = ['2019-12-19T11:00:%02dZ' % i for i in range(5)]
+
+
+def uncached_shift(value):
+    # what the parser used to do for every aggregation event
+    try:
+        t = datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
+    except ValueError:
+        t = datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+    dt = t + timedelta(seconds=10)
+    return [dt.strftime('%Y-%m-%dT%H:%M:%SZ') for i in range(4)]
+
+
+class TestTimeShift(SimpleTestCase):
+
+    def setUp(self):
+        timeshift.shift_time.cache_clear()
+
+    def test_shift_time(self):
+        self.assertEqual(timeshift.shift_time('2019-12-19T11:00:53Z', 10),
+                         '2019-12-19T11:01:03Z')
+        self.assertEqual(timeshift.shift_time('2019-12-31T23:59:55Z', 10),
+                         '2020-01-01T00:00:05Z')
+        self.assertEqual(timeshift.shift_time('2019-12-19T11:00:53Z', -10),
+                         '2019-12-19T11:00:43Z')
+        self.assertEqual(
+            timeshift.shift_time('2019-12-19T11:00:53.123456', 10),
+            '2019-12-19T11:01:03Z')
+        with self.assertRaises(ValueError):
+            timeshift.shift_time('19/12/2019', 10)
+
+    def test_distinct_times_are_parsed_once(self):
+        parser = TraxeedRfxcelParser(io.BytesIO(build_document(200)),
+                                     reg_ex=REG_EX)
+        parser.parse()
+        info = timeshift.shift_time.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 99)
+        self.assertEqual(parser.record_time, '2019-12-19T11:01:03Z')
+        self.assertEqual(parser._aggregation_events[0].event_time,
+                         '2019-12-19T11:01:03Z')
+
+    def test_matches_uncached_shift(self):
+        values = [RECORD_TIMES[i % len(RECORD_TIMES)] for i in range(100)]
+        for value in values:
+            self.assertEqual(timeshift.shift_time(value, 10),
+                             uncached_shift(value)[0])
+        info = timeshift.shift_time.cache_info()
+        self.assertEqual((info.misses, info.hits), (len(RECORD_TIMES), 95))
@@ -0,0 +1,112 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2019 SerialLab Corp.  All rights reserved.
+from django.template import Context, Template
+from django.test import TestCase
+from quartet_capture.models import Rule, Step, Task
+from quartet_capture.rules import Rule as RuleEngine
+
+from quartet_integrations.serialbox.urns import UrnList, UrnSequence
+
+CP, INDICATOR, ITEM_REF, EXTENSION = '0377713', '0', '12345', '0'
+
+
+class TestUrnBatch(TestCase):
+
+    def setUp(self):
+        rule = Rule.objects.create(name='URNs')
+        for order, step_class in enumerate((
+            'serialbox.steps.ListToUrnConversionStep',
+            'opsm.steps.ListToUrnConversionStep',
+            'opsm.steps.ListBasedRegionConversionStep'), 1):
+            Step.objects.create(rule=rule, order=order, name=step_class,
+                                step_class='quartet_integrations.%s' %
+                                           step_class)
+        task = Task.objects.create(name='URN Task', rule=rule)
+        steps = RuleEngine(rule, task).steps
+        self.step, self.opsm_step, self.list_based_step = \
+            steps[1], steps[2], steps[3]
+
+    def format_one_by_one(self, step, numbers, sscc=False):
+        # how handle_gtins and handle_ssccs formatted every number before
+        if sscc:
+            return [step.format_sscc_urn(CP, EXTENSION, number, 9)
+                    for number in numbers]
+        return [step.format_gtin_urn(CP, INDICATOR, ITEM_REF, number)
+                for number in numbers]
+
+    def test_matches_format_methods(self):
+        for numbers in (range(1, 1001), [str(i) for i in range(990, 1010)],
+                        ['A1B2', 'XYZ']):
+            urns = self.step.format_gtin_urns(CP, INDICATOR, ITEM_REF,
+                                              numbers)
+            self.assertIsInstance(urns, UrnSequence)
+            self.assertEqual(list(urns),
+                             self.format_one_by_one(self.step, numbers))
+            urns = self.step.format_sscc_urns(CP, EXTENSION, numbers, 9)
+            self.assertEqual(list(urns),
+                             self.format_one_by_one(self.step, numbers, True))
+        self.assertEqual(urns[0], 'urn:epc:id:sscc:0377713.000000A1B2')
+
+    def test_overridden_format(self):
+        numbers = ['01003777130123482112345']
+        urns = self.list_based_step.format_gtin_urns(CP, INDICATOR, ITEM_REF,
+                                                     numbers)
+        self.assertEqual(urns, ['0.0377713.001234.12345'])
+        step = self.opsm_step
+        urns = step.format_gtin_urns(CP, INDICATOR, ITEM_REF, range(5, 7))
+        self.assertEqual(list(urns), self.format_one_by_one(step, range(5, 7)))
+
+    def test_sequence(self):
+        urns = UrnSequence('urn:epc:id:sscc:0377713.0', range(1, 1000001), 9)
+        self.assertEqual(len(urns), 1000000)
+        self.assertEqual(urns[-1], 'urn:epc:id:sscc:0377713.0001000000')
+        self.assertEqual(list(urns[10:12]),
+                         ['urn:epc:id:sscc:0377713.0000000011',
+                          'urn:epc:id:sscc:0377713.0000000012'])
+        self.assertIn('urn:epc:id:sscc:0377713.0000000500', urns[:1000])
+
+        urn_list = UrnList()
+        urn_list.append('first')
+        urn_list.extend(urns)
+        urn_list.extend(['second', 'third'])
+        self.assertEqual(len(urn_list), 1000003)
+        self.assertEqual(urn_list[0], 'first')
+        self.assertEqual(urn_list[1], 'urn:epc:id:sscc:0377713.0000000001')
+        self.assertEqual(urn_list[-1], 'third')
+        self.assertEqual(urn_list[-3], urns[-1])
+        with self.assertRaises(IndexError):
+            urn_list[1000003]
+
+    def test_template_rendering(self):
+        template = Template('{% for serial_number in data %}'
+                            '<id>{{ serial_number }}</id>{% endfor %}'
+                            '{{ data|length }}')
+        urn_list = UrnList()
+        urn_list.extend(UrnSequence('0.0377713.012345.', range(1, 75001)))
+        rendered = template.render(Context({'data': urn_list}))
+        expected = self.format_one_by_one(self.opsm_step, range(1, 75001))
+        self.assertEqual(rendered,
+                         '<id>%s</id>75000' % '</id><id>'.join(expected))
+
+    def test_lazy_extend(self):
+        urns = self.step.format_sscc_urns(CP, EXTENSION, range(1, 1000001), 9)
+        urn_list = UrnList()
+        urn_list.append('first')
+        urn_list.extend(urns)
+        # the sequence is kept as it is, none of its URNs are rendered
+        self.assertEqual(len(urn_list._parts), 2)
+        self.assertIs(urn_list._parts[1], urns)
+        self.assertIsInstance(urns, UrnSequence)
+        self.assertEqual(len(urn_list), 1000001)